@@ -0,0 +1,52 @@
+"""Micro-benchmark for `ControllerBank` against separate `SmartController`s.
+
+NumPy has a fixed cost per operation, so the bank only pays off once it
+replaces enough controllers; this prints the time per loop for a range of
+bank sizes to show where that is.
+
+Run from the repository root:
+```
+python -m benchmarks.controller_bank
+```
+"""
+
+import time
+
+import numpy as np
+
+from lemonlib.smart import SmartProfile
+
+ITERATIONS = 2000
+SIZES = (4, 8, 16, 32, 64)
+GAINS = {"kP": 1.0, "kI": 0.5, "kD": 0.01, "kS": 0.1, "kV": 2.0, "kMaxV": 3.0, "kMaxA": 6.0}
+
+
+def measure(step) -> float:
+    """Returns microseconds per call of step."""
+    step()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        step()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    profile = SmartProfile("benchmark", GAINS, False)
+    print(f"{'controller':10} {'size':>4} {'separate':>12} {'bank':>12}")
+    for kind in ("flywheel", "turret"):
+        for size in SIZES:
+            bank = getattr(profile, f"create_{kind}_bank")(size)
+            controllers = [
+                getattr(profile, f"create_{kind}_controller")(f"{kind}{i}", False)
+                for i in range(size)
+            ]
+            measurements = np.linspace(-1, 1, size)
+            references = np.ones(size)
+            pairs = list(zip(controllers, measurements.tolist(), references.tolist()))
+            separate = measure(lambda: [c.calculate(m, r) for c, m, r in pairs])
+            banked = measure(lambda: bank.calculate(measurements, references))
+            print(f"{kind:10} {size:4} {separate:9.1f} us {banked:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Micro-benchmark for `LemonSwerve.drive()`.
+
+Compares building a fresh `FieldCentric` request every call (the old
+behaviour) against mutating the request owned by `LemonSwerve`. The
+drivetrain is replaced by a stub so only the Python side is measured.
+
+Run from the repository root:
+```
+python -m benchmarks.drive_requests
+```
+"""
+
+import time
+import tracemalloc
+
+from phoenix6.swerve import SwerveDrivetrain
+from phoenix6.swerve.requests import FieldCentric, ForwardPerspectiveValue
+from wpimath.geometry import Pose2d
+from wpimath.kinematics import SwerveModuleState
+
+from components.drivetrain import LemonSwerve
+from lemonlib.smart import SmartNT
+
+ITERATIONS = 20000
+DRIVES_PER_LOOP = 3
+
+
+class StubDrivetrain:
+    def __init__(self):
+        self.set_control_calls = 0
+        self.state = SwerveDrivetrain.SwerveDriveState()
+        self.state.module_states = [SwerveModuleState()] * 4
+        self.state.module_targets = [SwerveModuleState()] * 4
+
+    def get_state(self):
+        return self.state
+
+    def set_control(self, request):
+        self.set_control_calls += 1
+
+
+def old_drive(drivetrain, max_speed, vX, vY, rotations):
+    request = (
+        FieldCentric()
+        .with_forward_perspective(ForwardPerspectiveValue.OPERATOR_PERSPECTIVE)
+        .with_velocity_x(vX * max_speed)
+        .with_velocity_y(vY * max_speed)
+        .with_rotational_rate(rotations * max_speed)
+    )
+    drivetrain.set_control(request)
+
+
+def make_swerve(drivetrain) -> LemonSwerve:
+    swerve = LemonSwerve.__new__(LemonSwerve)
+    swerve.drivetrain = drivetrain
+    swerve.max_speed = 2.0
+    swerve.field_centric_request = FieldCentric().with_forward_perspective(
+        ForwardPerspectiveValue.OPERATOR_PERSPECTIVE
+    )
+    swerve.robot_centric_request = None
+    swerve.pending_request = None
+    # execute() publishes the drivetrain state every loop
+    swerve.telemetry = SmartNT("LemonSwerveBenchmark")
+    swerve.pose_channel = swerve.telemetry.struct_channel("pose", Pose2d)
+    swerve.module_states_channel = swerve.telemetry.struct_array_channel(
+        "module_states", SwerveModuleState, 4
+    )
+    swerve.module_targets_channel = swerve.telemetry.struct_array_channel(
+        "module_targets", SwerveModuleState, 4
+    )
+    return swerve
+
+
+def measure(loop) -> tuple[float, float]:
+    """Returns (microseconds per drive call, peak bytes allocated per loop)."""
+    loop(0)
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        loop(i)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(1000):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        loop(i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return elapsed / (ITERATIONS * DRIVES_PER_LOOP) * 1e6, peak
+
+
+def main():
+    old_drivetrain = StubDrivetrain()
+
+    def old_loop(i):
+        for _ in range(DRIVES_PER_LOOP):
+            old_drive(old_drivetrain, 2.0, 0.5, -0.25, i * 1e-4)
+
+    new_drivetrain = StubDrivetrain()
+    swerve = make_swerve(new_drivetrain)
+
+    def new_loop(i):
+        for _ in range(DRIVES_PER_LOOP):
+            swerve.drive(0.5, -0.25, i * 1e-4, "field")
+        swerve.execute()
+
+    old_us, old_bytes = measure(old_loop)
+    new_us, new_bytes = measure(new_loop)
+    loops = ITERATIONS + 1001
+    print(f"{DRIVES_PER_LOOP} drive() calls per loop, {ITERATIONS} loops")
+    print(
+        f"before: {old_us:7.3f} us/drive, {old_bytes:6d} B peak/loop, "
+        f"{old_drivetrain.set_control_calls / loops:.0f} set_control/loop"
+    )
+    print(
+        f"after:  {new_us:7.3f} us/drive, {new_bytes:6d} B peak/loop, "
+        f"{new_drivetrain.set_control_calls / loops:.0f} set_control/loop"
+    )
+
+
+if __name__ == "__main__":
+    main()
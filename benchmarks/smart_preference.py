@@ -0,0 +1,82 @@
+"""Micro-benchmark for reading a `SmartPreference`.
+
+Compares the old descriptor, which asked `Preferences` for the value on
+every access, against the listener-updated cache, with a plain class
+attribute as the baseline. Also checks that a remote change still shows up.
+
+Run from the repository root:
+```
+python -m benchmarks.smart_preference
+```
+"""
+
+import time
+
+import hal
+import ntcore
+from wpilib import Preferences
+
+from lemonlib.smart import SmartPreference
+
+ITERATIONS = 200000
+
+
+class OldSmartPreference:
+    """`SmartPreference.__get__` before values were cached."""
+
+    def __init__(self, value) -> None:
+        self._value = value
+        self._type = type(value)
+
+    def __set_name__(self, obj, name):
+        self._low_bandwidth = False
+        self._key = name
+        Preferences.initDouble(self._key, self._value)
+
+    def __get__(self, obj, objtype=None):
+        if self._low_bandwidth:
+            return self._value
+        new = None
+        if self._type is int or self._type is float:
+            new = Preferences.getDouble(self._key, self._value)
+        elif self._type is str:
+            new = Preferences.getString(self._key, self._value)
+        elif self._type is bool:
+            new = Preferences.getBoolean(self._key, self._value)
+        if new != self._value:
+            SmartPreference._changed_flag = True
+            self._value = new
+        return self._value
+
+
+def measure(obj, attr: str) -> float:
+    """Returns nanoseconds per attribute read."""
+    getattr(obj, attr)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        getattr(obj, attr)
+    return (time.perf_counter() - start) / ITERATIONS * 1e9
+
+
+def main():
+    hal.initialize(500, 0)
+    ntcore.NetworkTableInstance.getDefault().startLocal()
+
+    class Component:
+        plain = 0.5
+        old_pref = OldSmartPreference(0.5)
+        new_pref = SmartPreference(0.5)
+
+    component = Component()
+    print(f"{'plain attribute':24} {measure(component, 'plain'):8.1f} ns/read")
+    print(f"{'old SmartPreference':24} {measure(component, 'old_pref'):8.1f} ns/read")
+    print(f"{'cached SmartPreference':24} {measure(component, 'new_pref'):8.1f} ns/read")
+
+    # an edit from the dashboard must still reach the cached value
+    Preferences.setDouble("new_pref", 0.75)
+    ntcore.NetworkTableInstance.getDefault().waitForListenerQueue(1.0)
+    print(f"after remote edit: {component.new_pref}, changed: {SmartPreference.has_changed()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,17 +9,108 @@ from phoenix6.swerve import (
 from phoenix6.configs import TalonFXConfiguration, CurrentLimitsConfigs
 from wpimath.geometry import Translation2d
 from wpimath.units import amperes, kilogram_square_meters, volts,inchesToMeters
+import hashlib
 import json
-import os
+from pathlib import Path
+from typing import Optional
+from lemonlib.ctre import DeviceMap, module_groups_from_ids
 from lemonlib.smart import SmartProfile
+
+# Tuner X swerve project export, deployed next to robot.py
+CONSTANTS_PATH = Path(__file__).resolve().parent.parent / "constants.json"
+
+MODULE_KEYS = ("fl", "fr", "bl", "br")
+
+# the parts of the Tuner X export that are read below; anything else is ignored
+_DEVICE_SCHEMA = {"Id": int, "CANbus": str}
+_MOTOR_SCHEMA = {**_DEVICE_SCHEMA, "SelectedMotorType": {"SlipCurrentLimit": (int, float)}}
+SCHEMA = {
+    "Modules": [
+        {
+            "ModuleName": str,
+            "Encoder": _DEVICE_SCHEMA,
+            "SteerMotor": _MOTOR_SCHEMA,
+            "DriveMotor": _MOTOR_SCHEMA,
+            "EncoderOffset": (int, float),
+            "IsEncoderInverted": bool,
+            "IsSteerInverted": bool,
+        }
+    ],
+    "SwerveOptions": {
+        "kSpeedAt12Volts": (int, float),
+        "Gyro": _DEVICE_SCHEMA,
+        "WheelRadiusInches": (int, float),
+        "IsLeftSideInverted": bool,
+        "IsRightSideInverted": bool,
+        "SwerveModuleConfiguration": {
+            "DriveRatio": (int, float),
+            "SteerRatio": (int, float),
+            "CouplingRatio": (int, float),
+        },
+    },
+}
+
+# parsed constants by sha256 of the file contents, so the Tuner X export is
+# only parsed and turned into module constants once per process
+_cache: dict[str, tuple[dict, SwerveDrivetrainConstants, tuple[SwerveModuleConstants, ...]]] = {}
+
+
+def validate(data, schema=SCHEMA, path: str = "constants") -> None:
+    """Raises ValueError naming the first entry of data that is missing or
+    has the wrong type for schema."""
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            raise ValueError(f"{path} should be an object")
+        for key, value_schema in schema.items():
+            if key not in data:
+                raise ValueError(f"{path}.{key} is missing")
+            validate(data[key], value_schema, f"{path}.{key}")
+    elif isinstance(schema, list):
+        if not isinstance(data, list):
+            raise ValueError(f"{path} should be a list")
+        for i, item in enumerate(data):
+            validate(item, schema[0], f"{path}[{i}]")
+    # bool is a subclass of int, so don't let true pass as a number
+    elif not isinstance(data, schema) or (
+        isinstance(data, bool) and schema is not bool
+    ):
+        raise ValueError(f"{path} should be {schema}, got {data!r}")
+
+
+def _apply_device_map(constants: dict, device_map: DeviceMap) -> None:
+    """Replaces the CAN IDs and bus in a Tuner X export with discovered ones.
+    Modules in the export are in MODULE_KEYS order."""
+    for mod, key in zip(constants["Modules"], MODULE_KEYS):
+        devices = device_map.modules[key]
+        mod["DriveMotor"]["Id"] = devices.drive_id
+        mod["SteerMotor"]["Id"] = devices.steer_id
+        mod["Encoder"]["Id"] = devices.encoder_id
+        for device in ("DriveMotor", "SteerMotor", "Encoder"):
+            mod[device]["CANbus"] = device_map.canbus
+    constants["SwerveOptions"]["Gyro"]["Id"] = device_map.pigeon_id
+    constants["SwerveOptions"]["Gyro"]["CANbus"] = device_map.canbus
+
+
+def module_groups(path: Path = CONSTANTS_PATH) -> dict[int, str]:
+    """CAN ID tens digit of each module in a Tuner X export, to tell
+    `lemonlib.ctre.SwerveDiscovery` which corner each module it finds is."""
+    constants = json.loads(Path(path).read_text())
+    validate(constants)
+    return module_groups_from_ids(
+        {
+            key: [mod[device]["Id"] for device in ("DriveMotor", "SteerMotor", "Encoder")]
+            for mod, key in zip(constants["Modules"], MODULE_KEYS)
+        }
+    )
+
+
 class LemonSwerveConstants:
-    def _init_constants(self, module_number: int, module_key: str) -> SwerveModuleConstants:
-        mod = self.constants["Modules"][module_number]
+    def _create_factory(self) -> SwerveModuleConstantsFactory:
         opts = self.constants["SwerveOptions"]
         steer_config = TalonFXConfiguration().with_current_limits(
             CurrentLimitsConfigs().with_stator_current_limit(amperes(120)).with_stator_current_limit_enable(True)
         )
-        factory = (
+        return (
             SwerveModuleConstantsFactory()
             .with_drive_motor_gear_ratio(opts["SwerveModuleConfiguration"]["DriveRatio"])
             .with_steer_motor_gear_ratio(opts["SwerveModuleConfiguration"]["SteerRatio"])
@@ -27,7 +118,6 @@ class LemonSwerveConstants:
             .with_coupling_gear_ratio(opts["SwerveModuleConfiguration"]["CouplingRatio"])
             .with_steer_motor_closed_loop_output(ClosedLoopOutputType.VOLTAGE)
             .with_drive_motor_closed_loop_output(ClosedLoopOutputType.VOLTAGE)
-            .with_slip_current(amperes(mod["DriveMotor"]["SelectedMotorType"]["SlipCurrentLimit"]))
             .with_speed_at12_volts(opts["kSpeedAt12Volts"])
             .with_drive_motor_type(DriveMotorArrangement.TALON_FX_INTEGRATED) #default for 5113
             .with_steer_motor_type(DriveMotorArrangement.TALON_FX_INTEGRATED)
@@ -36,9 +126,75 @@ class LemonSwerveConstants:
             .with_drive_inertia(kilogram_square_meters(0.01))
             .with_steer_friction_voltage(volts(0.0))
             .with_drive_friction_voltage(volts(0.0))
-            .with_drive_motor_initial_configs(TalonFXConfiguration()) 
+            .with_drive_motor_initial_configs(TalonFXConfiguration())
             .with_steer_motor_initial_configs(steer_config)
         )
+
+    def _init_constants(
+        self, factory: SwerveModuleConstantsFactory, module_number: int, module_key: str
+    ) -> SwerveModuleConstants:
+        mod = self.constants["Modules"][module_number]
+        opts = self.constants["SwerveOptions"]
+        # slip current is per module in the export, but the factory sets it for all
+        factory.with_slip_current(amperes(mod["DriveMotor"]["SelectedMotorType"]["SlipCurrentLimit"]))
+        return factory.create_module_constants(
+            steer_motor_id=mod["SteerMotor"]["Id"],
+            drive_motor_id=mod["DriveMotor"]["Id"],
+            encoder_id=mod["Encoder"]["Id"],
+            encoder_offset=mod["EncoderOffset"],
+            drive_motor_inverted=opts["IsRightSideInverted"] if "Right" in mod["ModuleName"] else opts["IsLeftSideInverted"],
+            steer_motor_inverted=mod["IsSteerInverted"],
+            encoder_inverted=mod["IsEncoderInverted"],
+            location_x=self.MODULE_POSITIONS[module_key].X(),
+            location_y=self.MODULE_POSITIONS[module_key].Y(),
+        )
+
+    def _load(self, path: Path, device_map: Optional[DeviceMap]):
+        """Reads path once and returns its parsed constants, reusing the
+        result of an earlier load if the contents are unchanged."""
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if device_map is not None:
+            digest += json.dumps(device_map.to_dict(), sort_keys=True)
+        if digest not in _cache:
+            self.constants = json.loads(raw)
+            validate(self.constants)
+            if len(self.constants["Modules"]) != len(MODULE_KEYS):
+                raise ValueError(
+                    f"{path.name} has {len(self.constants['Modules'])} modules, expected {len(MODULE_KEYS)}"
+                )
+            if device_map is not None:
+                _apply_device_map(self.constants, device_map)
+            opts = self.constants["SwerveOptions"]
+            drivetrain = (
+                SwerveDrivetrainConstants()
+                .with_pigeon2_id(opts["Gyro"]["Id"])
+                .with_can_bus_name(self.constants["Modules"][0]["Encoder"]["CANbus"])
+            )
+            factory = self._create_factory()
+            modules = tuple(
+                self._init_constants(factory, i, key) for i, key in enumerate(MODULE_KEYS)
+            )
+            _cache[digest] = (self.constants, drivetrain, modules)
+        return _cache[digest]
+
+    def __init__(self, path: Path = CONSTANTS_PATH, device_map: Optional[DeviceMap] = None):
+        """
+        :param path: Tuner X swerve project export
+        :param device_map: Discovered hardware (see `lemonlib.ctre.SwerveDiscovery`),
+            overriding the CAN IDs and bus in the export
+        """
+        offset = 0.381  # 15 inches
+        self.MODULE_POSITIONS = {
+            "fr": Translation2d(offset, offset),
+            "fl": Translation2d(-offset, offset),
+            "br": Translation2d(offset, -offset),
+            "bl": Translation2d(-offset, -offset),
+        }
+
+        self.constants, self.DRIVETRAIN, modules = self._load(Path(path), device_map)
+        self.FL, self.FR, self.BL, self.BR = modules
+
         self.steer_profile = SmartProfile(
             "steer",
             {
@@ -62,286 +218,12 @@ class LemonSwerveConstants:
                 "kA": 0.01
             },
             True,
-        )                           
-
-        return factory.create_module_constants(
-            steer_motor_id=mod["SteerMotor"]["Id"],
-            drive_motor_id=mod["DriveMotor"]["Id"],
-            encoder_id=mod["Encoder"]["Id"],
-            encoder_offset=mod["EncoderOffset"],
-            drive_motor_inverted=opts["IsRightSideInverted"] if "Right" in mod["ModuleName"] else opts["IsLeftSideInverted"],
-            steer_motor_inverted=mod["IsSteerInverted"],
-            encoder_inverted=mod["IsEncoderInverted"],
-            location_x=self.MODULE_POSITIONS[module_key].X(),
-            location_y=self.MODULE_POSITIONS[module_key].Y(),
         )
 
-
-    def __init__(self):
-        self.constants = json.loads(json_file)
-        opts = self.constants["SwerveOptions"]
-
-        self.DRIVETRAIN = (
-            SwerveDrivetrainConstants()
-            .with_pigeon2_id(opts["Gyro"]["Id"])
-            .with_can_bus_name(self.constants["Modules"][0]["Encoder"]["CANbus"])
+        # gains for following trajectories with LemonSwerve.follow_trajectory()
+        self.translation_profile = SmartProfile(
+            "translation", {"kP": 5.0, "kI": 0.0, "kD": 0.0}, True
+        )
+        self.rotation_profile = SmartProfile(
+            "rotation", {"kP": 5.0, "kI": 0.0, "kD": 0.0}, True
         )
-
-        offset = 0.381  # 15 inches
-        self.MODULE_POSITIONS = {
-            "fr": Translation2d(offset, offset),
-            "fl": Translation2d(-offset, offset),
-            "br": Translation2d(offset, -offset),
-            "bl": Translation2d(-offset, -offset),
-        }
-
-        self.FL = self._init_constants(0, "fl")
-        self.FR = self._init_constants(1, "fr")
-        self.BL = self._init_constants(2, "bl")
-        self.BR = self._init_constants(3, "br")
-
-
-json_file = """{
-  "Version": "1.0.0.0",
-  "LastState": 11,
-  "Modules": [
-    {
-      "ModuleName": "Front Left",
-      "ModuleId": 0,
-      "Encoder": {
-        "Id": 23,
-        "Name": "Swerve (front left)",
-        "Model": "CANCoder",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": null,
-        "IsStandaloneFx": false
-      },
-      "SteerMotor": {
-        "Id": 22,
-        "Name": "Swerve (front left steer)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "DriveMotor": {
-        "Id": 21,
-        "Name": "Swerve (front left drive)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "IsEncoderInverted": true,
-      "IsSteerInverted": false,
-      "SelectedEncoderType": "CANcoder",
-      "EncoderOffset": 0.15380859375,
-      "DriveMotorSelectionState": 1,
-      "SteerMotorSelectionState": 1,
-      "SteerEncoderSelectionState": 1,
-      "IsModuleValidationComplete": true,
-      "ValidatedSteerId": 22,
-      "ValidatedDriveId": 21,
-      "ValidatedEncoderId": 23
-    },
-    {
-      "ModuleName": "Front Right",
-      "ModuleId": 1,
-      "Encoder": {
-        "Id": 33,
-        "Name": "Swerve (front right)",
-        "Model": "CANCoder",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": null,
-        "IsStandaloneFx": false
-      },
-      "SteerMotor": {
-        "Id": 32,
-        "Name": "Swerve (front right steer)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "DriveMotor": {
-        "Id": 31,
-        "Name": "Swerve (front right drive)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "IsEncoderInverted": true,
-      "IsSteerInverted": false,
-      "SelectedEncoderType": "CANcoder",
-      "EncoderOffset": -0.250244140625,
-      "DriveMotorSelectionState": 1,
-      "SteerMotorSelectionState": 1,
-      "SteerEncoderSelectionState": 1,
-      "IsModuleValidationComplete": true,
-      "ValidatedSteerId": 32,
-      "ValidatedDriveId": 31,
-      "ValidatedEncoderId": 33
-    },
-    {
-      "ModuleName": "Back Left",
-      "ModuleId": 2,
-      "Encoder": {
-        "Id": 13,
-        "Name": "Swerve (back left)",
-        "Model": "CANCoder",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": null,
-        "IsStandaloneFx": false
-      },
-      "SteerMotor": {
-        "Id": 12,
-        "Name": "Swerve (back left steer)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "DriveMotor": {
-        "Id": 11,
-        "Name": "Swerve (back left drive)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "IsEncoderInverted": true,
-      "IsSteerInverted": false,
-      "SelectedEncoderType": "CANcoder",
-      "EncoderOffset": -0.314208984375,
-      "DriveMotorSelectionState": 1,
-      "SteerMotorSelectionState": 1,
-      "SteerEncoderSelectionState": 1,
-      "IsModuleValidationComplete": true,
-      "ValidatedSteerId": 12,
-      "ValidatedDriveId": 11,
-      "ValidatedEncoderId": 13
-    },
-    {
-      "ModuleName": "Back Right",
-      "ModuleId": 3,
-      "Encoder": {
-        "Id": 43,
-        "Name": "Swerve (back right)",
-        "Model": "CANCoder",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": null,
-        "IsStandaloneFx": false
-      },
-      "SteerMotor": {
-        "Id": 42,
-        "Name": "Swerve (back right steer)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "DriveMotor": {
-        "Id": 41,
-        "Name": "Swerve (back right drive)",
-        "Model": "Talon FX",
-        "CANbus": "can0",
-        "CANbusFriendly": "",
-        "SelectedMotorType": {
-          "Name": "WCP Kraken x60",
-          "FreeSpeedRps": 96.7,
-          "SlipCurrentLimit": 120,
-          "StatorCurrentLimit": 60
-        },
-        "IsStandaloneFx": false
-      },
-      "IsEncoderInverted": true,
-      "IsSteerInverted": false,
-      "SelectedEncoderType": "CANcoder",
-      "EncoderOffset": -0.33642578125,
-      "DriveMotorSelectionState": 1,
-      "SteerMotorSelectionState": 1,
-      "SteerEncoderSelectionState": 1,
-      "IsModuleValidationComplete": true,
-      "ValidatedSteerId": 42,
-      "ValidatedDriveId": 41,
-      "ValidatedEncoderId": 43
-    }
-  ],
-  "SwerveOptions": {
-    "kSpeedAt12Volts": 4.731460295787658,
-    "Gyro": {
-      "Id": 30,
-      "Name": "Pigeon 2 vers. S (Device ID 30)",
-      "Model": "Pigeon 2 vers. S",
-      "CANbus": "can0",
-      "CANbusFriendly": "",
-      "SelectedMotorType": null,
-      "IsStandaloneFx": false
-    },
-    "IsValidGyroCANbus": true,
-    "VerticalTrackSizeInches": 25,
-    "HorizontalTrackSizeInches": 25,
-    "WheelRadiusInches": 2,
-    "IsLeftSideInverted": false,
-    "IsRightSideInverted": true,
-    "SwerveModuleType": 4,
-    "SwerveModuleConfiguration": {
-      "ModuleBrand": 4,
-      "DriveRatio": 6.746031746031747,
-      "SteerRatio": 21.428571428571427,
-      "CouplingRatio": 3.5714285714285716,
-      "CustomName": "L2"
-    },
-    "HasVerifiedSteer": true,
-    "SelectedModuleManufacturer": "Swerve Drive Specialties (SDS)",
-    "HasVerifiedDrive": true,
-    "IsValidConfiguration": true
-  }
-}"""
\ No newline at end of file
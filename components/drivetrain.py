@@ -5,12 +5,17 @@ from phoenix6.swerve import *
 from phoenix6.configs import *
 from .constants import LemonSwerveConstants
 from wpimath.units import meters_per_second, radians_per_second
+from wpimath.geometry import Pose2d
+from wpimath.kinematics import SwerveModuleState
 from typing import Literal
-from lemonlib.smart import SmartPreference,SmartProfile
+from lemonlib.smart import SmartPreference,SmartProfile,SmartNT
+from lemonlib.drive import SwerveKinematics, SwerveStateHistory, SwerveTrajectory, HolonomicController
+from lemonlib.ctre import ConfigManager
 class LemonSwerve:
+    foo = SmartPreference(4)
+
     def setup(self):
         self.constants = LemonSwerveConstants()
-        self.foo = SmartPreference(4)
         self.drivetrain = SwerveDrivetrain(
             hardware.TalonFX,
             hardware.TalonFX,
@@ -25,42 +30,136 @@ class LemonSwerve:
         )
         self.max_speed = meters_per_second(2) #This is a placeholder value
         self.drivetrain_state = self.drivetrain.SwerveDriveState()
+        # python-side kinematics for planning and analysis, same module order as above
+        self.kinematics = SwerveKinematics.from_module_positions(self.constants.MODULE_POSITIONS)
+        # filled by the odometry thread at the odometry rate, holds ~2 seconds
+        self.state_history = SwerveStateHistory(
+            int(2 * self.drivetrain.get_odometry_frequency()), 4
+        )
+        self.drivetrain.register_telemetry(self.state_history.record)
+        # publishers are created once and reused every loop; period 0 sends
+        # every loop, a 0.02 period would drop loops that start a bit early
+        self.telemetry = SmartNT("LemonSwerve")
+        self.pose_channel = self.telemetry.struct_channel("pose", Pose2d)
+        self.module_states_channel = self.telemetry.struct_array_channel(
+            "module_states", SwerveModuleState, 4
+        )
+        self.module_targets_channel = self.telemetry.struct_array_channel(
+            "module_targets", SwerveModuleState, 4
+        )
+
+        # one long-lived request per drive mode, mutated in place every loop
+        self.field_centric_request = FieldCentric().with_forward_perspective(
+            ForwardPerspectiveValue.OPERATOR_PERSPECTIVE
+        )
+        self.robot_centric_request = RobotCentric()
+        # field speeds in m/s from the blue alliance origin, used for trajectories
+        self.field_speeds_request = ApplyFieldSpeeds()
+        # request to send in execute(), None if nothing was commanded this loop
+        self.pending_request: SwerveRequest = None
+        # applies motor configs off the main loop, skipping unchanged ones
+        self.config_manager = ConfigManager()
+        # the applies from on_enable() and from the latest gain edits
+        self.enable_configs = self.config_manager.apply_all([])
+        self.steer_configs = self.enable_configs
+        self.drive_configs = self.enable_configs
+        # rebuild only what depends on a gain when it is tuned
+        self.constants.steer_profile.on_change(self._steer_gains_changed)
+        self.constants.drive_profile.on_change(self._drive_gains_changed)
+        self.constants.translation_profile.on_change(self._trajectory_gains_changed)
+        self.constants.rotation_profile.on_change(self._trajectory_gains_changed)
 
     def on_enable(self):
         self.steer_controller = self.constants.steer_profile.create_ctre_turret_controller()
         self.drive_controller = self.constants.drive_profile.create_ctre_turret_controller()
-        steer_config = TalonFXConfiguration().with_slot0(self.steer_controller)
-        drive_config = TalonFXConfiguration().with_slot0(self.drive_controller)
-        for i in range(0, 4):
-            module = self.drivetrain.get_module(i)
-            drive = module.drive_motor
-            steer = module.steer_motor
-            drive.configurator.apply(drive_config)
-            steer.configurator.apply(steer_config)
+        self.trajectory_controller = HolonomicController(
+            self.constants.translation_profile, self.constants.rotation_profile
+        )
+        # apply only Slot0: a full TalonFXConfiguration would reset the
+        # feedback (remote CANcoder), current limits and inverts set by phoenix6
+        configs = []
+        for module in self.drivetrain.modules:
+            configs.append((module.drive_motor, self.drive_controller))
+            configs.append((module.steer_motor, self.steer_controller))
+        self.enable_configs = self.config_manager.apply_all(configs)
+
+    def _steer_gains_changed(self, gains: dict[str, float]) -> None:
+        self.steer_controller = self.constants.steer_profile.create_ctre_turret_controller()
+        self.steer_configs = self.config_manager.apply_all(
+            [(module.steer_motor, self.steer_controller) for module in self.drivetrain.modules]
+        )
+
+    def _drive_gains_changed(self, gains: dict[str, float]) -> None:
+        self.drive_controller = self.constants.drive_profile.create_ctre_turret_controller()
+        self.drive_configs = self.config_manager.apply_all(
+            [(module.drive_motor, self.drive_controller) for module in self.drivetrain.modules]
+        )
 
+    def _trajectory_gains_changed(self, gains: dict[str, float]) -> None:
+        self.trajectory_controller = HolonomicController(
+            self.constants.translation_profile, self.constants.rotation_profile
+        )
 
-    def drive_field_centric(self, vX: meters_per_second, vY: meters_per_second, rotations: radians_per_second) -> None:
-        request = (
-            FieldCentric()
-            .with_forward_perspective(ForwardPerspectiveValue.OPERATOR_PERSPECTIVE)
-            .with_velocity_x(vX * self.max_speed)
-            .with_velocity_y(vY * self.max_speed)
-            .with_rotational_rate(rotations * self.max_speed)
+    def configs_ready(self) -> bool:
+        """True once the gains from the last enable, and any tuned since,
+        reached every motor."""
+        return all(
+            future.done() and future.result()
+            for future in (self.enable_configs, self.steer_configs, self.drive_configs)
         )
-        self.drivetrain.set_control(request)
+
+    def drive_field_centric(self, vX: meters_per_second, vY: meters_per_second, rotations: radians_per_second) -> None:
+        request = self.field_centric_request
+        request.velocity_x = vX * self.max_speed
+        request.velocity_y = vY * self.max_speed
+        request.rotational_rate = rotations * self.max_speed
+        self.pending_request = request
     def drive_robot_centric(self, vX: meters_per_second, vY: meters_per_second, rotations: radians_per_second) -> None:
-        request = (
-            RobotCentric()
-            .with_velocity_x(vX * self.max_speed)
-            .with_velocity_y(vY * self.max_speed)
-            .with_rotational_rate(rotations * self.max_speed)
-        )
-        self.drivetrain.set_control(request)
+        request = self.robot_centric_request
+        request.velocity_x = vX * self.max_speed
+        request.velocity_y = vY * self.max_speed
+        request.rotational_rate = rotations * self.max_speed
+        self.pending_request = request
+    def drive_field_speeds(self, vX: meters_per_second, vY: meters_per_second, omega: radians_per_second) -> None:
+        """Drives at field-relative speeds (not scaled by max_speed), with +X
+        pointing away from the blue alliance wall regardless of alliance."""
+        speeds = self.field_speeds_request.speeds
+        speeds.vx = vX
+        speeds.vy = vY
+        speeds.omega = omega
+        self.pending_request = self.field_speeds_request
+    def get_pose(self) -> Pose2d:
+        """Returns the latest estimated pose from the odometry thread."""
+        latest = self.state_history.latest()
+        if latest is None:
+            return self.drivetrain.get_state().pose
+        return latest.pose
+    def follow_trajectory(self, trajectory: SwerveTrajectory, timestamp: float) -> None:
+        """Drives towards the trajectory sample at timestamp (seconds since the
+        trajectory started). Call once per loop while following."""
+        sample = trajectory.sample(timestamp)
+        self.drive_field_speeds(*self.trajectory_controller.calculate(self.get_pose(), sample))
     def drive(self, vX: meters_per_second, vY: meters_per_second, rotations: radians_per_second, drive_mode: Literal["field", "robot"]):
+        """Commands the drivetrain for this loop. Only the last call before
+        `execute()` is sent, so calling this several times per loop costs a
+        single `set_control()`.
+        """
         if drive_mode == "field":
             self.drive_field_centric(vX, vY, rotations)
         else:
             self.drive_robot_centric(vX, vY, rotations)
+    def add_vision_measurement(self, pose: Pose2d, timestamp: float, std_devs: tuple[float, float, float]) -> None:
+        """Fuses a vision pose into the drivetrain pose estimator.
+        timestamp is the frame capture time in the FPGA timebase (as reported
+        by photonlib), std_devs are x, y (meters) and heading (radians).
+        """
+        self.drivetrain.add_vision_measurement(pose, utils.fpga_to_current_time(timestamp), std_devs)
     def execute(self):
         self.foo
-        pass
\ No newline at end of file
+        if self.pending_request is not None:
+            self.drivetrain.set_control(self.pending_request)
+            self.pending_request = None
+        state = self.drivetrain.get_state()
+        self.pose_channel.publish(state.pose)
+        self.module_states_channel.publish(state.module_states)
+        self.module_targets_channel.publish(state.module_targets)
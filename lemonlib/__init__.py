@@ -1,6 +1,7 @@
-from .control import LemonInput
+from .control import LemonInput, ControllerWatcher
+from .recording import InputRecorder, InputPlayer
 
-from .vision import LemonCamera
+from .vision import LemonCamera, LemonVisionFusion, VisionMeasurement
 
 from .lemonbot.commandcomponent import LemonComponent
 from .lemonbot.commandmagicrobot import LemonRobot
@@ -9,7 +10,12 @@ from .lemonbot.tunable import fms_feedback
 
 __all__ = [
     "LemonInput",
+    "ControllerWatcher",
+    "InputRecorder",
+    "InputPlayer",
     "LemonCamera",
+    "LemonVisionFusion",
+    "VisionMeasurement",
     "LemonComponent",
     "LemonRobot",
     "fms_feedback",
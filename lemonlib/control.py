@@ -1,22 +1,131 @@
+import hal
+import threading
 from wpilib import DriverStation, RobotBase
+from wpilib.event import BooleanEvent, EventLoop
 from wpilib.interfaces import GenericHID
 from wpilib.simulation import GenericHIDSim
 from wpiutil import Sendable
 from lemonlib.util import Alert, AlertType
 from enum import IntEnum
+from types import SimpleNamespace
+from typing import Callable, Optional
 import math
 
 RIGHT_RUMBLE = GenericHID.RumbleType.kRightRumble
 LEFT_RUMBLE = GenericHID.RumbleType.kLeftRumble
 
+# never equal to LemonInput._loop, so unsynchronized inputs always re-read
+_LIVE = object()
+_AXES = {"kLeftX", "kLeftY", "kRightX", "kRightY", "kLeftTrigger", "kRightTrigger"}
+_layouts: dict[type, SimpleNamespace] = {}
+
+
+def _layout(button_map: type[IntEnum]) -> SimpleNamespace:
+    """Plain ints for a button map, so getters skip the enum lookups:
+    button keys hold their bit in the button bitmask, axis keys their index."""
+    layout = _layouts.get(button_map)
+    if layout is None:
+        layout = SimpleNamespace(
+            **{
+                name: member.value if name in _AXES else 1 << (member.value - 1)
+                for name, member in button_map.__members__.items()
+            }
+        )
+        _layouts[button_map] = layout
+    return layout
+
+
+class ControllerWatcher:
+    """Keeps a cached map of which controller is plugged into each driver
+    station port, refreshed from its own background thread every `period`
+    seconds.
+
+    `ports` maps each port with a controller to (name, is_xbox). It is
+    replaced as a whole, never edited, and `generation` goes up after each
+    change, so a `LemonInput` only has to compare one int per snapshot to
+    notice a hot-plug. Use the shared instance from `ControllerWatcher.get()`.
+    """
+
+    _instance: Optional["ControllerWatcher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, period: float = 0.5):
+        self.ports: dict[int, tuple[str, bool]] = {}
+        self.generation = 0
+        # poll() may also be called from the robot thread
+        self._lock = threading.Lock()
+        # one synchronous scan, so controllers created at startup already
+        # find their port; every later scan runs in the background
+        self.poll()
+        self.period = period
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ControllerWatcher", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> "ControllerWatcher":
+        """Returns the process-wide watcher, starting it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.period):
+            self.poll()
+
+    def poll(self) -> None:
+        """Scans the driver station ports and publishes a new map if
+        anything was plugged, unplugged or swapped."""
+        ports = {}
+        for port in range(DriverStation.kJoystickPorts):
+            # the DS gives an empty name if no joystick is at the port
+            name = DriverStation.getJoystickName(port)
+            if name != "":
+                ports[port] = (name, DriverStation.getJoystickIsXbox(port))
+        with self._lock:
+            if ports != self.ports:
+                self.ports = ports
+                self.generation += 1
+
+    def find(self, type: str = "auto") -> Optional[int]:
+        """Returns the first port with a controller of type ("auto", "Xbox"
+        or "PS5"), or None."""
+        for port, (_, is_xbox) in sorted(self.ports.items()):
+            if type == "auto" or is_xbox == (type == "Xbox"):
+                return port
+        return None
+
+    def stop(self) -> None:
+        self._stop.set()
+
 
 class LemonInput(GenericHID):
     """
     LemonInput is a wrapper class for Xbox
     and PS5 controllers allowing automatic
     or manual detection and use in code.
+
+    The first read in each robot loop takes a snapshot of the whole
+    controller (a button bitmask, every axis and the POV) in three HAL
+    calls, and every getter in that loop reads from it. `LemonRobot`
+    marks the end of each loop with `LemonInput.next_loop()`; without it
+    every read takes a fresh snapshot.
+
+    Button edges (`getRawButtonPressed`, `getButtonPressed`...) are
+    collected from every snapshot until read, and each one is reported
+    once, like `GenericHID`: a read of other buttons in between doesn't
+    lose a press.
+
+    The port and button map come from the cached port map of
+    `ControllerWatcher`, so creating a controller never scans the driver
+    station. When a controller is plugged in, unplugged or swapped, the
+    next snapshot picks the port and button map again from the new map.
     """
 
+    # advanced once per robot loop by next_loop(); None if nothing does
+    _loop: Optional[int] = None
+
     class xbox_buttons(IntEnum):
         kLeftTrigger = 2
         kLeftX = 0
@@ -84,50 +193,275 @@ class LemonInput(GenericHID):
         """
         # Sendable.__init__(self)
 
-        if port is None:
-            port = 0
-            while port < 5:
-                # assumes DS gives empty string if no joystick at port
-                if DriverStation.getJoystickName(port) != "":
-                    if type == "auto":
-                        break
-                    if type == "Xbox" and DriverStation.getJoystickIsXbox(port):
-                        break
-                    if type == "PS5" and not DriverStation.getJoystickIsXbox(port):
-                        break
-                port += 1
-            else:
-                print(f"ERROR: No Joystick found matching type: {type}")
-        GenericHID.__init__(self, port)
-
+        self._requested_port = port
+        self._requested_type = type
+        self._watcher = ControllerWatcher.get()
+        self._port = 0 if port is None else port
+        self.button_map = None
+        self._resolve()
+        if port is None and self._watcher.find(type) is None:
+            print(f"ERROR: No Joystick found matching type: {type}")
+        GenericHID.__init__(self, self._port)
+        self._hal_buttons = hal.JoystickButtons()
+        self._hal_axes = hal.JoystickAxes()
+        self._hal_povs = hal.JoystickPOVs()
+        self._read_loop = _LIVE
+        self.buttons = 0
+        self.previous_buttons = 0
+        # edges seen in snapshots and not read yet
+        self._pressed = 0
+        self._released = 0
+        self.axes = [0.0] * len(self._hal_axes.axes)
+        self.axis_count = 0
+        self.pov = -1
+        self._source = None
+        self._pov_xy = (0, 0)
+        # sent with every rumble or output change, to whichever port is current
+        self._outputs = 0
+        self._rumble = [0, 0]
+
+    def _resolve(self) -> None:
+        """Picks the port and button map from the watcher's port map."""
+        # read the generation first: if the map changes in between, the
+        # next snapshot resolves again
+        self._generation = self._watcher.generation
+        ports = self._watcher.ports
+        port = self._port
+        if self._requested_port is None:
+            found = self._watcher.find(self._requested_type)
+            if found is not None:
+                port = found
+
+        type = self._requested_type
         if type == "auto":
             if RobotBase.isSimulation():
-                self.button_map = self.xbox_buttons
-                self.contype = "Xbox"
-
-            elif DriverStation.getJoystickIsXbox(port):
-                self.button_map = self.xbox_buttons
-                self.contype = "Xbox"
-
-            else:
-                self.button_map = self.ps5_buttons
-                self.contype = "PS5"
-
-        elif type == "Xbox":
-            if RobotBase.isSimulation():
-                self.button_map = self.xbox_buttons
-                self.contype = "Xbox"
+                type = "Xbox"
+            elif port in ports:
+                type = "Xbox" if ports[port][1] else "PS5"
+            elif self.button_map is None:
+                type = "PS5"
             else:
-                self.button_map = self.xbox_buttons
-                self.contype = "Xbox"
-
-        elif type == "PS5":
-            if RobotBase.isSimulation():
-                self.button_map = self.ps5_buttons
-                self.contype = "PS5"
-            else:
-                self.button_map = self.ps5_buttons
-                self.contype = "PS5"
+                # unplugged: keep the mapping until something replaces it
+                type = self.contype
+
+        if type == "Xbox":
+            button_map = self.xbox_buttons
+        else:
+            button_map = self.ps5_buttons
+        # getters only read these between snapshots, on the same thread
+        self._port = port
+        self.button_map = button_map
+        self.contype = type
+        self._layout = _layout(button_map)
+
+    @classmethod
+    def next_loop(cls) -> None:
+        """Marks the end of a robot loop: the next read of each LemonInput
+        takes a new snapshot. Called by `LemonRobot`."""
+        cls._loop = 0 if cls._loop is None else cls._loop + 1
+
+    def set_source(self, source: Optional[Callable[[], tuple[int, list, int]]]) -> None:
+        """Takes snapshots from source, which returns (button bitmask, axes,
+        POV), instead of the driver station; eg. `InputPlayer.sample_now`.
+        None reads the driver station again."""
+        self._source = source
+        self._read_loop = _LIVE
+
+    def update(self) -> None:
+        """Takes a new snapshot of the controller."""
+        self.previous_buttons = self.buttons
+        remapped = False
+        if self._watcher.generation != self._generation:
+            old_port = self._port
+            self._resolve()
+            remapped = self._port != old_port
+        if self._source is None:
+            port = self._port
+            hal.getJoystickButtons(port, self._hal_buttons)
+            hal.getJoystickAxes(port, self._hal_axes)
+            hal.getJoystickPOVs(port, self._hal_povs)
+            self.buttons = self._hal_buttons.buttons
+            self.axes = self._hal_axes.axes.tolist()
+            self.axis_count = self._hal_axes.count
+            pov = self._hal_povs.povs[0] if self._hal_povs.count else -1
+        else:
+            self.buttons, axes, pov = self._source()
+            self.axis_count = len(axes)
+            self.axes[: len(axes)] = axes
+        if pov != self.pov:
+            self.pov = pov
+            self._pov_xy = self.__pov_xy(pov)
+        if remapped:
+            # outputs and rumble move with the controller
+            hal.setJoystickOutputs(old_port, 0, 0, 0)
+            self._send_outputs()
+            # no edges from comparing two different controllers
+            self.previous_buttons = self.buttons
+            self._pressed = self._released = 0
+        changed = self.buttons ^ self.previous_buttons
+        self._pressed |= changed & self.buttons
+        self._released |= changed & self.previous_buttons
+        loop = self._loop
+        self._read_loop = _LIVE if loop is None else loop
+
+    def snapshot(self) -> tuple[int, list[float], int]:
+        """Returns this loop's (button bitmask, axes, POV)."""
+        if self._read_loop != self._loop:
+            self.update()
+        return self.buttons, self.axes[: self.axis_count], self.pov
+
+    # named getters look the key up after the snapshot, which may have
+    # switched the button map
+    def _button(self, key: str) -> bool:
+        if self._read_loop != self._loop:
+            self.update()
+        return bool(self.buttons & getattr(self._layout, key))
+
+    def _axis(self, key: str) -> float:
+        if self._read_loop != self._loop:
+            self.update()
+        return self.axes[getattr(self._layout, key)]
+
+    # GenericHID's own methods keep using the port it was created with, so
+    # everything that touches the port is overridden to use the current one
+
+    def getPort(self) -> int:
+        """Returns the port the controller is currently read from."""
+        return self._port
+
+    def isConnected(self) -> bool:
+        return DriverStation.isJoystickConnected(self._port)
+
+    def getName(self) -> str:
+        return DriverStation.getJoystickName(self._port)
+
+    def getAxisCount(self) -> int:
+        return DriverStation.getStickAxisCount(self._port)
+
+    def getButtonCount(self) -> int:
+        return DriverStation.getStickButtonCount(self._port)
+
+    def getPOVCount(self) -> int:
+        return DriverStation.getStickPOVCount(self._port)
+
+    def getAxisType(self, axis: int) -> int:
+        return DriverStation.getJoystickAxisType(self._port, axis)
+
+    def button(self, button: int, loop: EventLoop) -> BooleanEvent:
+        return BooleanEvent(loop, lambda: self.getRawButton(button))
+
+    def axisGreaterThan(self, axis: int, threshold: float, loop: EventLoop) -> BooleanEvent:
+        return BooleanEvent(loop, lambda: self.getRawAxis(axis) > threshold)
+
+    def axisLessThan(self, axis: int, threshold: float, loop: EventLoop) -> BooleanEvent:
+        return BooleanEvent(loop, lambda: self.getRawAxis(axis) < threshold)
+
+    def POV(self, *args) -> BooleanEvent:
+        """POV(angle, loop) or POV(pov, angle, loop)."""
+        pov, angle, loop = (0, *args) if len(args) == 2 else args
+        return BooleanEvent(loop, lambda: self.getPOV(pov) == angle)
+
+    def POVUp(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(0, loop)
+
+    def POVUpRight(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(45, loop)
+
+    def POVRight(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(90, loop)
+
+    def POVDownRight(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(135, loop)
+
+    def POVDown(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(180, loop)
+
+    def POVDownLeft(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(225, loop)
+
+    def POVLeft(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(270, loop)
+
+    def POVUpLeft(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(315, loop)
+
+    def POVCenter(self, loop: EventLoop) -> BooleanEvent:
+        return self.POV(-1, loop)
+
+    def getRawButton(self, button: int) -> bool:
+        """Returns the state of a button, numbered from 1."""
+        if self._read_loop != self._loop:
+            self.update()
+        return bool(self.buttons & 1 << (button - 1))
+
+    def getRawButtonPressed(self, button: int) -> bool:
+        """Returns True if the button was pressed since the last check."""
+        if self._read_loop != self._loop:
+            self.update()
+        bit = 1 << (button - 1)
+        pressed = self._pressed & bit
+        self._pressed &= ~bit
+        return bool(pressed)
+
+    def getRawButtonReleased(self, button: int) -> bool:
+        """Returns True if the button was released since the last check."""
+        if self._read_loop != self._loop:
+            self.update()
+        bit = 1 << (button - 1)
+        released = self._released & bit
+        self._released &= ~bit
+        return bool(released)
+
+    def getButtonPressed(self, key: str) -> bool:
+        """Returns True if the button named key (eg. "kA") in the button
+        map was pressed since the last check."""
+        return self.getRawButtonPressed(self.button_map[key].value)
+
+    def getButtonReleased(self, key: str) -> bool:
+        """Returns True if the button named key (eg. "kA") in the button
+        map was released since the last check."""
+        return self.getRawButtonReleased(self.button_map[key].value)
+
+    def getRawAxis(self, axis: int) -> float:
+        """Returns the value of an axis, or 0.0 if the controller doesn't
+        have it."""
+        if self._read_loop != self._loop:
+            self.update()
+        return self.axes[axis] if axis < self.axis_count else 0.0
+
+    def getPOV(self, pov: int = 0) -> int:
+        """Returns the angle of the POV in degrees, or -1 if not pressed."""
+        if self._read_loop != self._loop:
+            self.update()
+        if pov == 0:
+            return self.pov
+        if self._source is not None or pov >= self._hal_povs.count:
+            return -1
+        return self._hal_povs.povs[pov]
+
+    def _send_outputs(self) -> None:
+        hal.setJoystickOutputs(self._port, self._outputs, *self._rumble)
+
+    def setOutput(self, outputNumber: int, value: bool) -> None:
+        """Sets one HID output, numbered from 1."""
+        bit = 1 << (outputNumber - 1)
+        self._outputs = self._outputs | bit if value else self._outputs & ~bit
+        self._send_outputs()
+
+    def setOutputs(self, value: int) -> None:
+        """Sets all HID outputs from a bitmask."""
+        self._outputs = value
+        self._send_outputs()
+
+    def setRumble(self, type: GenericHID.RumbleType, value: float) -> None:
+        """Sets the rumble of the port the controller is currently read
+        from, so rumble follows the controller when it moves."""
+        rumble = int(min(max(value, 0.0), 1.0) * 65535)
+        if type != RIGHT_RUMBLE:
+            self._rumble[0] = rumble
+        if type != LEFT_RUMBLE:
+            self._rumble[1] = rumble
+        self._send_outputs()
 
     def getType(self):
         """Returns the type of controller (Xbox or PS5)."""
@@ -137,7 +471,7 @@ class LemonInput(GenericHID):
 
     def getLeftBumper(self):
         """Returns the state of the left bumper button."""
-        return self.getRawButton(self.button_map.kLeftBumper.value)
+        return self._button("kLeftBumper")
 
     def getRightBumper(self):
         """
@@ -146,7 +480,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the right bumper button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kRightBumper.value)
+        return self._button("kRightBumper")
 
     def getStartButton(self):
         """
@@ -155,7 +489,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the start button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kStart.value)
+        return self._button("kStart")
 
     def getBackButton(self):
         """
@@ -164,7 +498,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the back button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kBack.value)
+        return self._button("kBack")
 
     def getAButton(self):
         """
@@ -173,7 +507,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the 'A' button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kA.value)
+        return self._button("kA")
 
     def getBButton(self):
         """
@@ -182,7 +516,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the 'B' button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kB.value)
+        return self._button("kB")
 
     def getXButton(self):
         """
@@ -191,7 +525,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the 'X' button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kX.value)
+        return self._button("kX")
 
     def getYButton(self):
         """
@@ -200,7 +534,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the 'Y' button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kY.value)
+        return self._button("kY")
 
     def getLeftStickButton(self):
         """
@@ -209,7 +543,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the left stick button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kLeftStick.value)
+        return self._button("kLeftStick")
 
     def getRightStickButton(self):
         """
@@ -218,7 +552,7 @@ class LemonInput(GenericHID):
         Returns:
             bool: The state of the right stick button (pressed or not).
         """
-        return self.getRawButton(self.button_map.kRightStick.value)
+        return self._button("kRightStick")
 
     def getRightTriggerAxis(self) -> float:
         """
@@ -227,7 +561,7 @@ class LemonInput(GenericHID):
         Returns:
             float: The state of the right trigger button ranging from 0.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kRightTrigger.value)
+        return self._axis("kRightTrigger")
 
     def getLeftTriggerAxis(self) -> float:
         """
@@ -236,57 +570,57 @@ class LemonInput(GenericHID):
         Returns:
             float: The state of the left trigger button ranging from 0.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kLeftTrigger.value)
+        return self._axis("kLeftTrigger")
 
     """PS5 funcs still work with Xbox just for ease of use"""
 
     def getL1Button(self):
         """Returns the state of the L1 button."""
-        return self.getRawButton(self.button_map.kLeftBumper.value)
+        return self._button("kLeftBumper")
 
     def getR1Button(self):
         """Returns the state of the R1 button."""
-        return self.getRawButton(self.button_map.kRightBumper.value)
+        return self._button("kRightBumper")
 
     def getOptionsButton(self):
         """Returns the state of the Options button."""
-        return self.getRawButton(self.button_map.kStart.value)
+        return self._button("kStart")
 
     def getCreateButton(self):
         """Returns the state of the Create button."""
-        return self.getRawButton(self.button_map.kBack.value)
+        return self._button("kBack")
 
     def getCrossButton(self):
         """Returns the state of the Cross (X) button."""
-        return self.getRawButton(self.button_map.kA.value)
+        return self._button("kA")
 
     def getCircleButton(self):
         """Returns the state of the Circle (O) button."""
-        return self.getRawButton(self.button_map.kB.value)
+        return self._button("kB")
 
     def getSquareButton(self):
         """Returns the state of the Square button."""
-        return self.getRawButton(self.button_map.kX.value)
+        return self._button("kX")
 
     def getTriangleButton(self):
         """Returns the state of the Triangle button."""
-        return self.getRawButton(self.button_map.kY.value)
+        return self._button("kY")
 
     def getL3(self):
         """Returns the state of the L3 (left stick) button."""
-        return self.getRawButton(self.button_map.kLeftStick.value)
+        return self._button("kLeftStick")
 
     def getR3(self):
         """Returns the state of the R3 (right stick) button."""
-        return self.getRawButton(self.button_map.kRightStick.value)
+        return self._button("kRightStick")
 
     def getR2Axis(self) -> float:
         """Returns the state of the R2 trigger."""
-        return self.getRawAxis(self.button_map.kRightTrigger.value)
+        return self._axis("kRightTrigger")
 
     def getL2Axis(self) -> float:
         """Returns the state of the L2 trigger."""
-        return self.getRawAxis(self.button_map.kLeftTrigger.value)
+        return self._axis("kLeftTrigger")
 
     """Both Xbox and PS5 funcs"""
 
@@ -315,7 +649,7 @@ class LemonInput(GenericHID):
         Returns:
             float: The X-axis value of the left joystick, ranging from -1.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kLeftX.value)
+        return self._axis("kLeftX")
 
     def getLeftY(self) -> float:
         """
@@ -324,7 +658,7 @@ class LemonInput(GenericHID):
         Returns:
             float: The Y-axis value of the left joystick, ranging from -1.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kLeftY.value)
+        return self._axis("kLeftY")
 
     def getRightX(self) -> float:
         """
@@ -333,7 +667,7 @@ class LemonInput(GenericHID):
         Returns:
             float: The X-axis value of the right joystick, ranging from -1.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kRightX.value)
+        return self._axis("kRightX")
 
     def getRightY(self) -> float:
         """
@@ -342,9 +676,10 @@ class LemonInput(GenericHID):
         Returns:
             float: The Y-axis value of the right joystick, ranging from -1.0 to 1.0.
         """
-        return self.getRawAxis(self.button_map.kRightY)
+        return self._axis("kRightY")
 
-    def __pov_xy(self):
+    @staticmethod
+    def __pov_xy(pov_value: int):
         """
         Returns the X and Y values of the POV as a tuple using sin and cos,
         or (0, 0) if the POV is not pressed (-1).
@@ -352,8 +687,6 @@ class LemonInput(GenericHID):
         Returns:
             tuple: The X and Y values of the POV as a tuple.
         """
-        pov_value = self.getPOV()
-
         # If POV is -1 (not pressed), return (0, 0)
         if pov_value == -1:
             return (0, 0)
@@ -386,7 +719,9 @@ class LemonInput(GenericHID):
         Returns:
             float: The X-axis value of the POV.
         """
-        return self.__pov_xy()[0]
+        if self._read_loop != self._loop:
+            self.update()
+        return self._pov_xy[0]
 
     def getPovY(self) -> float:
         """
@@ -404,7 +739,9 @@ class LemonInput(GenericHID):
         Returns:
             float: The Y-axis value of the POV.
         """
-        return self.__pov_xy()[1]
+        if self._read_loop != self._loop:
+            self.update()
+        return self._pov_xy[1]
 
     def initSendable(self, builder):
         """
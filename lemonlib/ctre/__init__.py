@@ -1,4 +1,23 @@
 from .pigeon import LemonPigeon
 from .talonfx import LemonTalonFX
+from .configmanager import ConfigManager
+from .discovery import (
+    DeviceMap,
+    ModuleDevices,
+    PhoenixBus,
+    SimulatedBus,
+    SwerveDiscovery,
+    module_groups_from_ids,
+)
 
-__all__ = ["LemonPigeon", "LemonTalonFX"]
+__all__ = [
+    "LemonPigeon",
+    "LemonTalonFX",
+    "ConfigManager",
+    "DeviceMap",
+    "ModuleDevices",
+    "PhoenixBus",
+    "SimulatedBus",
+    "SwerveDiscovery",
+    "module_groups_from_ids",
+]
@@ -0,0 +1,317 @@
+"""Finds the swerve hardware on a CAN bus so CAN IDs do not have to be
+written down anywhere.
+
+```
+groups = module_groups_from_ids({"fl": (21, 22, 23), "fr": (31, 32, 33), ...})
+discovery = SwerveDiscovery(PhoenixBus("rio"), module_groups=groups)
+device_map = discovery.discover()
+constants = LemonSwerveConstants(device_map=device_map)
+```
+
+A full scan probes every candidate ID of every device type concurrently.
+The result is saved to a device map file, and later boots only verify the
+devices listed in it, falling back to a full scan if any have gone missing.
+The bus itself is behind a small interface (`probe` and `remote_sensor_id`)
+so `SimulatedBus` can stand in for real hardware.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from phoenix6 import CANBus
+from phoenix6.configs import FeedbackConfigs
+from phoenix6.hardware import CANcoder, Pigeon2, TalonFX
+from phoenix6.signals import FeedbackSensorSourceValue
+from wpilib import getOperatingDirectory
+
+__all__ = [
+    "ModuleDevices",
+    "DeviceMap",
+    "PhoenixBus",
+    "SimulatedBus",
+    "SwerveDiscovery",
+    "module_groups_from_ids",
+]
+
+TALON_FX = "talonfx"
+CANCODER = "cancoder"
+PIGEON2 = "pigeon2"
+DEVICE_TYPES = (TALON_FX, CANCODER, PIGEON2)
+
+# valid phoenix6 device IDs (0 is the factory default, so skip it)
+DEFAULT_IDS = range(1, 63)
+
+MODULE_KEYS = ("fl", "fr", "bl", "br")
+
+
+def module_groups_from_ids(modules: dict[str, Iterable[int]]) -> dict[int, str]:
+    """Returns the CAN ID tens digit of each module, eg. from the IDs in a
+    Tuner X export, for `SwerveDiscovery`'s module_groups. Raises
+    ValueError if a module's IDs span several tens digits or two modules
+    share one, since the layout can't be inferred then."""
+    groups = {}
+    for key, can_ids in modules.items():
+        digits = {can_id // 10 for can_id in can_ids}
+        if len(digits) != 1:
+            raise ValueError(
+                f"CAN IDs of module {key} ({sorted(can_ids)}) don't share a tens digit"
+            )
+        group = digits.pop()
+        if group in groups:
+            raise ValueError(
+                f"Modules {groups[group]} and {key} both use CAN IDs {group}0-{group}9"
+            )
+        groups[group] = key
+    return groups
+
+
+class ModuleDevices(NamedTuple):
+    """CAN IDs making up one swerve module."""
+
+    drive_id: int
+    steer_id: int
+    encoder_id: int
+
+
+class DeviceMap(NamedTuple):
+    """Discovered swerve hardware: module key to devices, plus the gyro."""
+
+    canbus: str
+    pigeon_id: int
+    modules: dict[str, ModuleDevices]
+
+    def device_ids(self) -> list[tuple[str, int]]:
+        """Every (device type, ID) in the map."""
+        devices = [(PIGEON2, self.pigeon_id)]
+        for module in self.modules.values():
+            devices += [
+                (TALON_FX, module.drive_id),
+                (TALON_FX, module.steer_id),
+                (CANCODER, module.encoder_id),
+            ]
+        return devices
+
+    def to_dict(self) -> dict:
+        return {
+            "canbus": self.canbus,
+            "pigeon_id": self.pigeon_id,
+            "modules": {key: module._asdict() for key, module in self.modules.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeviceMap":
+        return cls(
+            data["canbus"],
+            data["pigeon_id"],
+            {key: ModuleDevices(**module) for key, module in data["modules"].items()},
+        )
+
+
+class PhoenixBus:
+    """Probes real (or phoenix6-simulated) devices on a CAN bus."""
+
+    _classes = {TALON_FX: TalonFX, CANCODER: CANcoder, PIGEON2: Pigeon2}
+
+    def __init__(self, canbus: str = "", timeout: float = 0.1):
+        """
+        :param canbus: CAN bus name, "" or "rio" for the roboRIO's bus
+        :param timeout: Seconds to wait for each device to answer
+        """
+        self.canbus = canbus
+        self.timeout = timeout
+        self._bus = CANBus(canbus)
+
+    def probe(self, device_type: str, can_id: int) -> bool:
+        """Returns True if a device of device_type answers at can_id."""
+        device = self._classes[device_type](can_id, self._bus)
+        version = device.get_version().wait_for_update(self.timeout, False)
+        return version.status.is_ok()
+
+    def remote_sensor_id(self, talon_id: int) -> Optional[int]:
+        """Returns the CANcoder ID a TalonFX is configured to use as its
+        feedback sensor, or None if it uses its own rotor."""
+        configs = FeedbackConfigs()
+        status = TalonFX(talon_id, self._bus).configurator.refresh(
+            configs, self.timeout
+        )
+        if not status.is_ok():
+            return None
+        if configs.feedback_sensor_source in (
+            FeedbackSensorSourceValue.REMOTE_CANCODER,
+            FeedbackSensorSourceValue.FUSED_CANCODER,
+            FeedbackSensorSourceValue.SYNC_CANCODER,
+        ):
+            return configs.feedback_remote_sensor_id
+        return None
+
+
+class SimulatedBus:
+    """In-memory CAN bus for testing discovery without hardware. Each probe
+    takes `latency` seconds and only succeeds for the listed devices."""
+
+    def __init__(
+        self,
+        devices: Iterable[tuple[str, int]],
+        remote_sensors: Optional[dict[int, int]] = None,
+        canbus: str = "sim",
+        latency: float = 0.0,
+    ):
+        """
+        :param devices: (device type, CAN ID) of every device on the bus
+        :param remote_sensors: TalonFX ID to the CANcoder ID it uses for feedback
+        :param latency: Seconds each probe takes, to mimic CAN round trips
+        """
+        self.devices = set(devices)
+        self.remote_sensors = dict(remote_sensors or {})
+        self.canbus = canbus
+        self.latency = latency
+        self.probes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_device_map(cls, device_map: DeviceMap, **kwargs) -> "SimulatedBus":
+        """A bus holding exactly the devices in device_map, with each steer
+        motor configured to use its module's CANcoder."""
+        return cls(
+            device_map.device_ids(),
+            {m.steer_id: m.encoder_id for m in device_map.modules.values()},
+            device_map.canbus,
+            **kwargs,
+        )
+
+    def probe(self, device_type: str, can_id: int) -> bool:
+        with self._lock:
+            self.probes += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return (device_type, can_id) in self.devices
+
+    def remote_sensor_id(self, talon_id: int) -> Optional[int]:
+        return self.remote_sensors.get(talon_id)
+
+
+class SwerveDiscovery:
+    """Discovers the devices of a four-module swerve drive on a bus.
+
+    Devices are grouped into modules by the tens digit of their CAN ID (the
+    Tuner X convention: 11, 12, 13 for one module; 21, 22, 23 for the next).
+    A group with two TalonFXs and one CANcoder is a module. The TalonFX
+    configured to use the CANcoder as its remote sensor is the steer motor;
+    on a fresh robot with no such config the lower ID is taken as drive.
+
+    Which group is which corner can't be seen on the bus, so it is given
+    as module_groups, eg. from the IDs of an existing Tuner X export with
+    `module_groups_from_ids`. Guessing it would put each module's encoder
+    offset and inverts on the wrong hardware.
+    """
+
+    def __init__(
+        self,
+        bus,
+        cache_path: Optional[Path] = None,
+        candidate_ids: Iterable[int] = DEFAULT_IDS,
+        module_groups: Optional[dict[int, str]] = None,
+        max_workers: int = 16,
+    ):
+        """
+        :param bus: `PhoenixBus`, `SimulatedBus` or anything with the same methods
+        :param cache_path: Device map file, defaults to device_map.json in the
+            operating directory (outside deploy, so deploys don't erase it)
+        :param candidate_ids: CAN IDs probed by a full scan
+        :param module_groups: CAN ID tens digit to module key (fl, fr, bl,
+            br); required for a full scan
+        :param max_workers: Probes in flight at once
+        """
+        self.bus = bus
+        if cache_path is None:
+            cache_path = Path(getOperatingDirectory()) / "device_map.json"
+        self.cache_path = Path(cache_path)
+        self.candidate_ids = list(candidate_ids)
+        self.module_groups = module_groups
+        self.max_workers = max_workers
+
+    def _probe_all(self, devices: list[tuple[str, int]]) -> list[tuple[str, int]]:
+        """Probes devices concurrently and returns the ones that answered."""
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            found = pool.map(lambda device: self.bus.probe(*device), devices)
+            return [device for device, ok in zip(devices, found) if ok]
+
+    def scan(self) -> DeviceMap:
+        """Probes every candidate ID and infers the module layout."""
+        found = self._probe_all(
+            [(kind, can_id) for kind in DEVICE_TYPES for can_id in self.candidate_ids]
+        )
+        talons = sorted(can_id for kind, can_id in found if kind == TALON_FX)
+        encoders = sorted(can_id for kind, can_id in found if kind == CANCODER)
+        pigeons = sorted(can_id for kind, can_id in found if kind == PIGEON2)
+        if not pigeons:
+            raise RuntimeError(f"No Pigeon2 found on CAN bus '{self.bus.canbus}'")
+
+        groups = {}
+        for encoder_id in encoders:
+            group = encoder_id // 10
+            group_talons = [t for t in talons if t // 10 == group]
+            if len(group_talons) == 2:
+                groups[group] = self._assign_roles(group_talons, encoder_id)
+        if len(groups) != len(MODULE_KEYS):
+            raise RuntimeError(
+                f"Found {len(groups)} swerve modules on CAN bus '{self.bus.canbus}',"
+                f" expected {len(MODULE_KEYS)} (TalonFX: {talons}, CANcoder: {encoders})"
+            )
+
+        if self.module_groups is None:
+            raise RuntimeError(
+                "Can't tell which corner each swerve module (CAN ID tens digits"
+                f" {sorted(groups)}) is on; pass module_groups"
+            )
+        if set(self.module_groups) != set(groups) or set(
+            self.module_groups.values()
+        ) != set(MODULE_KEYS):
+            raise RuntimeError(
+                f"module_groups {self.module_groups} doesn't match the modules found"
+                f" on CAN bus '{self.bus.canbus}' (tens digits {sorted(groups)})"
+            )
+        modules = {self.module_groups[group]: groups[group] for group in sorted(groups)}
+        return DeviceMap(self.bus.canbus, pigeons[0], modules)
+
+    def _assign_roles(self, talon_ids: list[int], encoder_id: int) -> ModuleDevices:
+        first, second = talon_ids
+        if self.bus.remote_sensor_id(first) == encoder_id:
+            return ModuleDevices(second, first, encoder_id)
+        return ModuleDevices(first, second, encoder_id)
+
+    def load_cached(self) -> Optional[DeviceMap]:
+        """Returns the saved device map, or None if there isn't a usable one."""
+        try:
+            data = json.loads(self.cache_path.read_text())
+            device_map = DeviceMap.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if device_map.canbus != self.bus.canbus:
+            return None
+        return device_map
+
+    def verify(self, device_map: DeviceMap) -> bool:
+        """Returns True if every device in device_map still answers."""
+        devices = device_map.device_ids()
+        return len(self._probe_all(devices)) == len(devices)
+
+    def save(self, device_map: DeviceMap) -> None:
+        """Writes device_map to the cache file, replacing it atomically."""
+        temp = self.cache_path.with_suffix(".tmp")
+        temp.write_text(json.dumps(device_map.to_dict(), indent=2))
+        temp.replace(self.cache_path)
+
+    def discover(self) -> DeviceMap:
+        """Returns the cached device map if all of its devices answer,
+        otherwise scans the bus and saves the new map."""
+        cached = self.load_cached()
+        if cached is not None and self.verify(cached):
+            return cached
+        device_map = self.scan()
+        self.save(device_map)
+        return device_map
@@ -1,4 +1,18 @@
 from .swagdrive import SwagDrive
 from .killoughdrive import KilloughDrive
+from .swervekinematics import SwerveKinematics
+from .swervehistory import SwerveStateHistory, SwerveStateSample, SwerveStateBatch
+from .trajectory import SwerveTrajectory, TrajectorySample, HolonomicController
 
-__all__ = ["Vector2d", "SwagDrive", "KilloughDrive"]
+__all__ = [
+    "Vector2d",
+    "SwagDrive",
+    "KilloughDrive",
+    "SwerveKinematics",
+    "SwerveStateHistory",
+    "SwerveStateSample",
+    "SwerveStateBatch",
+    "SwerveTrajectory",
+    "TrajectorySample",
+    "HolonomicController",
+]
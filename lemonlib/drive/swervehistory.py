@@ -0,0 +1,201 @@
+import math
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveModuleState
+
+__all__ = ["SwerveStateHistory", "SwerveStateSample", "SwerveStateBatch"]
+
+
+class SwerveStateSample(NamedTuple):
+    """Drivetrain state at a single (possibly interpolated) timestamp."""
+
+    timestamp: float
+    pose: Pose2d
+    speeds: ChassisSpeeds
+    module_states: list[SwerveModuleState]
+
+
+class SwerveStateBatch(NamedTuple):
+    """Several recorded states as parallel arrays, oldest first.
+    Module arrays have shape (N, M)."""
+
+    timestamp: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    heading: np.ndarray
+    vx: np.ndarray
+    vy: np.ndarray
+    omega: np.ndarray
+    module_speeds: np.ndarray
+    module_angles: np.ndarray
+
+
+class SwerveStateHistory:
+    """Fixed-capacity ring buffer of phoenix6 `SwerveDriveState`s.
+
+    Register `record` as the drivetrain telemetry function so that every
+    odometry update is stored, not just the one visible during the 50 Hz
+    robot loop:
+    ```
+    history = SwerveStateHistory(500)
+    drivetrain.register_telemetry(history.record)
+    ...
+    # pose at the moment a camera frame was captured
+    sample = history.sample(capture_timestamp)
+    ```
+    Timestamps are in the timebase of `phoenix6.utils.get_current_time_seconds()`.
+    `record` runs on the odometry thread, so every method takes a lock.
+    """
+
+    def __init__(self, capacity: int, num_modules: int = 4):
+        """
+        :param capacity: Number of states kept before the oldest is overwritten
+        :param num_modules: Number of swerve modules on the drivetrain
+        """
+        self.capacity = capacity
+        self.num_modules = num_modules
+        self._timestamp = np.zeros(capacity)
+        # columns: x, y, heading, vx, vy, omega
+        self._chassis = np.zeros((capacity, 6))
+        self._module_speeds = np.zeros((capacity, num_modules))
+        self._module_angles = np.zeros((capacity, num_modules))
+        # total number of states ever recorded / returned by read_new()
+        self._written = 0
+        self._read = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def record(self, state) -> None:
+        """Stores a `SwerveDrivetrain.SwerveDriveState`. Suitable for use as
+        a telemetry function. States older than the newest one are ignored."""
+        pose = state.pose
+        speeds = state.speeds
+        with self._lock:
+            if self._written and state.timestamp <= self._timestamp[
+                (self._written - 1) % self.capacity
+            ]:
+                return
+            i = self._written % self.capacity
+            self._timestamp[i] = state.timestamp
+            chassis = self._chassis[i]
+            chassis[0] = pose.X()
+            chassis[1] = pose.Y()
+            chassis[2] = pose.rotation().radians()
+            chassis[3] = speeds.vx
+            chassis[4] = speeds.vy
+            chassis[5] = speeds.omega
+            module_speeds = self._module_speeds[i]
+            module_angles = self._module_angles[i]
+            for j, module_state in enumerate(state.module_states):
+                module_speeds[j] = module_state.speed
+                module_angles[j] = module_state.angle.radians()
+            self._written += 1
+
+    def clear(self) -> None:
+        """Forgets every recorded state, eg. after a pose reset."""
+        with self._lock:
+            self._written = 0
+            self._read = 0
+
+    def _ordered(self, start: int, stop: int) -> np.ndarray:
+        """Physical indices of the logical states [start, stop)."""
+        return np.arange(start, stop) % self.capacity
+
+    def _find(self, timestamp: float) -> Optional[int]:
+        """Binary search for the logical index of the last state recorded at
+        or before timestamp. The live region of the buffer is at most two
+        sorted runs, so this is O(log n)."""
+        size = min(self._written, self.capacity)
+        if size == 0:
+            return None
+        oldest = self._written - size
+        lo, hi = oldest, self._written
+        ts = self._timestamp
+        cap = self.capacity
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts[mid % cap] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1 if lo > oldest else None
+
+    def sample(self, timestamp: float) -> Optional[SwerveStateSample]:
+        """Returns the state at timestamp, interpolated between the two
+        surrounding records. Timestamps past the newest record return the
+        newest record; timestamps before the oldest record return None."""
+        with self._lock:
+            index = self._find(timestamp)
+            if index is None:
+                return None
+            cap = self.capacity
+            a = index % cap
+            if index + 1 >= self._written:
+                t = 0.0
+                b = a
+            else:
+                b = (index + 1) % cap
+                span = self._timestamp[b] - self._timestamp[a]
+                t = (timestamp - self._timestamp[a]) / span if span > 0 else 0.0
+            chassis = _lerp(self._chassis[a], self._chassis[b], t)
+            chassis[2] = _lerp_angle(self._chassis[a, 2], self._chassis[b, 2], t)
+            module_speeds = _lerp(self._module_speeds[a], self._module_speeds[b], t)
+            module_angles = _lerp_angle(
+                self._module_angles[a], self._module_angles[b], t
+            )
+            sample_time = timestamp if b != a else self._timestamp[a]
+        x, y, heading, vx, vy, omega = chassis.tolist()
+        return SwerveStateSample(
+            float(sample_time),
+            Pose2d(x, y, Rotation2d(heading)),
+            ChassisSpeeds(vx, vy, omega),
+            [
+                SwerveModuleState(speed, Rotation2d(angle))
+                for speed, angle in zip(module_speeds.tolist(), module_angles.tolist())
+            ],
+        )
+
+    def sample_pose(self, timestamp: float) -> Optional[Pose2d]:
+        """Shortcut for `sample(timestamp).pose`."""
+        sample = self.sample(timestamp)
+        return None if sample is None else sample.pose
+
+    def latest(self) -> Optional[SwerveStateSample]:
+        """Returns the newest recorded state."""
+        return self.sample(math.inf)
+
+    def read_new(self) -> SwerveStateBatch:
+        """Returns every state recorded since the previous call as one batch.
+        If more than `capacity` states arrived in between, only the newest
+        `capacity` are returned."""
+        with self._lock:
+            start = max(self._read, self._written - self.capacity)
+            indices = self._ordered(start, self._written)
+            self._read = self._written
+            chassis = self._chassis[indices]
+            return SwerveStateBatch(
+                self._timestamp[indices],
+                chassis[:, 0],
+                chassis[:, 1],
+                chassis[:, 2],
+                chassis[:, 3],
+                chassis[:, 4],
+                chassis[:, 5],
+                self._module_speeds[indices],
+                self._module_angles[indices],
+            )
+
+
+def _lerp(a, b, t: float):
+    return a + (b - a) * t
+
+
+def _lerp_angle(a, b, t: float):
+    """Interpolates angles in radians along the shortest arc."""
+    delta = (b - a + math.pi) % (2 * math.pi) - math.pi
+    return a + delta * t
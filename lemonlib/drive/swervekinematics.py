@@ -0,0 +1,175 @@
+import math
+from typing import Sequence
+
+import numpy as np
+from wpimath.geometry import Translation2d
+
+__all__ = ["SwerveKinematics"]
+
+# order the modules are passed to the phoenix6 SwerveDrivetrain in LemonSwerve
+DEFAULT_MODULE_ORDER = ("fl", "fr", "bl", "br")
+
+
+class SwerveKinematics:
+    r"""Vectorized swerve drive kinematics.
+
+    Every method works on arrays of N samples at once, so checking a whole
+    trajectory or a log file is a handful of NumPy calls instead of a Python
+    loop over `SwerveDrive4Kinematics`.
+
+    Shapes used throughout:
+
+    * chassis speeds ``vx``, ``vy``, ``omega``: ``(N,)`` (scalars are accepted)
+    * module speeds and angles: ``(N, M)`` where M is the number of modules
+
+    Units follow WPILib: meters, seconds and radians, +X forward, +Y left and
+    counter-clockwise positive. Module order is the order of the locations
+    passed to the constructor.
+    """
+
+    def __init__(self, module_locations: Sequence[Translation2d]):
+        """
+        :param module_locations: Location of each module relative to the robot center
+        """
+        self.locations = np.array(
+            [[location.X(), location.Y()] for location in module_locations],
+            dtype=float,
+        )
+        self.num_modules = len(self.locations)
+        self._cor = (0.0, 0.0)
+        self.inverse_matrix = self._inverse_matrix(0.0, 0.0)
+        # forward kinematics always reports speeds about the robot center
+        self.forward_matrix = np.linalg.pinv(self.inverse_matrix)
+
+    @classmethod
+    def from_module_positions(
+        cls,
+        positions: dict[str, Translation2d],
+        order: Sequence[str] = DEFAULT_MODULE_ORDER,
+    ) -> "SwerveKinematics":
+        """Builds the kinematics from a ``MODULE_POSITIONS`` style dict, such
+        as the one on `LemonSwerveConstants`.
+
+        :param positions: Module key to module location
+        :param order: Module keys in drivetrain order (default: fl, fr, bl, br)
+        """
+        return cls([positions[key] for key in order])
+
+    def _inverse_matrix(self, cor_x: float, cor_y: float) -> np.ndarray:
+        """Builds the (2M x 3) matrix mapping [vx, vy, omega] to module
+        velocity components, rows alternating [vx_i, vy_i]."""
+        rel = self.locations - (cor_x, cor_y)
+        matrix = np.zeros((2 * self.num_modules, 3))
+        matrix[0::2, 0] = 1.0
+        matrix[0::2, 2] = -rel[:, 1]
+        matrix[1::2, 1] = 1.0
+        matrix[1::2, 2] = rel[:, 0]
+        return matrix
+
+    def to_module_vectors(
+        self,
+        vx,
+        vy,
+        omega,
+        center_of_rotation: Translation2d = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Converts chassis speeds into module velocity components.
+
+        :param vx: Forward speeds (m/s)
+        :param vy: Leftward speeds (m/s)
+        :param omega: Angular rates (rad/s)
+        :param center_of_rotation: Defaults to the robot center
+        :returns: ``(module_vx, module_vy)``, each of shape (N, M)
+        """
+        if center_of_rotation is None:
+            cor = (0.0, 0.0)
+        else:
+            cor = (center_of_rotation.X(), center_of_rotation.Y())
+        if cor != self._cor:
+            self._cor = cor
+            self.inverse_matrix = self._inverse_matrix(*cor)
+        chassis = np.stack(np.broadcast_arrays(
+            np.atleast_1d(np.asarray(vx, dtype=float)),
+            np.atleast_1d(np.asarray(vy, dtype=float)),
+            np.atleast_1d(np.asarray(omega, dtype=float)),
+        ))
+        module = self.inverse_matrix @ chassis
+        return module[0::2].T, module[1::2].T
+
+    def to_module_states(
+        self,
+        vx,
+        vy,
+        omega,
+        center_of_rotation: Translation2d = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Inverse kinematics for N chassis speeds at once.
+
+        Modules with (near) zero speed report an angle of 0; pass the result
+        through `optimize()` with the current angles to hold them instead.
+
+        :returns: ``(speeds, angles)`` in m/s and radians, each of shape (N, M)
+        """
+        module_vx, module_vy = self.to_module_vectors(vx, vy, omega, center_of_rotation)
+        return np.hypot(module_vx, module_vy), np.arctan2(module_vy, module_vx)
+
+    def to_chassis_speeds(
+        self, speeds, angles
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forward kinematics (least squares) for N sets of module states.
+
+        :param speeds: Module speeds, shape (N, M) or (M,)
+        :param angles: Module angles in radians, same shape as speeds
+        :returns: ``(vx, vy, omega)``, each of shape (N,)
+        """
+        speeds = np.atleast_2d(np.asarray(speeds, dtype=float))
+        angles = np.atleast_2d(np.asarray(angles, dtype=float))
+        module = np.empty((2 * self.num_modules, speeds.shape[0]))
+        module[0::2] = (speeds * np.cos(angles)).T
+        module[1::2] = (speeds * np.sin(angles)).T
+        vx, vy, omega = self.forward_matrix @ module
+        return vx, vy, omega
+
+    @staticmethod
+    def desaturate(speeds, max_speed: float) -> np.ndarray:
+        """Scales every row of module speeds down so that no module exceeds
+        max_speed, keeping the ratio between modules (and so the direction of
+        travel) intact.
+
+        :param speeds: Module speeds, shape (N, M)
+        :param max_speed: Maximum attainable module speed (m/s)
+        """
+        speeds = np.atleast_2d(np.asarray(speeds, dtype=float))
+        peak = np.max(np.abs(speeds), axis=1, keepdims=True)
+        scale = np.where(peak > max_speed, max_speed / np.maximum(peak, 1e-12), 1.0)
+        return speeds * scale
+
+    @staticmethod
+    def optimize(
+        speeds, angles, current_angles, stop_threshold: float = 1e-6
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Minimizes module rotation: if a module would turn more than 90
+        degrees it instead turns the other way and drives backwards. Modules
+        slower than stop_threshold keep their current angle.
+
+        :param speeds: Desired module speeds, shape (N, M)
+        :param angles: Desired module angles in radians, shape (N, M)
+        :param current_angles: Current module angles, broadcastable to (N, M)
+        :returns: ``(speeds, angles)`` with angles wrapped to [-pi, pi)
+        """
+        speeds = np.asarray(speeds, dtype=float)
+        angles = np.asarray(angles, dtype=float)
+        current = np.broadcast_to(np.asarray(current_angles, dtype=float), angles.shape)
+        delta = _wrap(angles - current)
+        flip = np.abs(delta) > math.pi / 2
+        out_speeds = np.where(flip, -speeds, speeds)
+        out_angles = _wrap(np.where(flip, angles + math.pi, angles))
+        stopped = np.abs(speeds) < stop_threshold
+        out_speeds = np.where(stopped, 0.0, out_speeds)
+        out_angles = np.where(stopped, _wrap(current), out_angles)
+        return out_speeds, out_angles
+
+
+def _wrap(angles: np.ndarray) -> np.ndarray:
+    """Wraps angles to [-pi, pi)."""
+    return (angles + math.pi) % (2 * math.pi) - math.pi
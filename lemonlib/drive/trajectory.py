@@ -0,0 +1,193 @@
+import bisect
+import csv
+import json
+import math
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+from wpilib import getDeployDirectory
+from wpimath.geometry import Pose2d, Rotation2d
+
+from ..smart import SmartProfile
+
+__all__ = ["SwerveTrajectory", "TrajectorySample", "HolonomicController"]
+
+# columns of the sample array, in order
+FIELDS = ("t", "x", "y", "heading", "vx", "vy", "omega")
+
+
+class TrajectorySample(NamedTuple):
+    """Field-relative target state (meters, radians, m/s, rad/s)."""
+
+    timestamp: float
+    x: float
+    y: float
+    heading: float
+    vx: float
+    vy: float
+    omega: float
+
+    def pose(self) -> Pose2d:
+        return Pose2d(self.x, self.y, Rotation2d(self.heading))
+
+
+class SwerveTrajectory:
+    """Holonomic trajectory stored as one contiguous (N, 7) array of
+    t, x, y, heading, vx, vy, omega.
+
+    When the samples are evenly spaced (as Choreo exports them), `sample()`
+    finds the surrounding samples by index arithmetic in O(1); otherwise it
+    falls back to a binary search.
+    """
+
+    def __init__(self, samples: np.ndarray, name: str = ""):
+        """
+        :param samples: Array of shape (N, 7) with columns t, x, y, heading, vx, vy, omega
+        :param name: Used in error messages and telemetry
+        """
+        samples = np.ascontiguousarray(samples, dtype=float)
+        if samples.ndim != 2 or samples.shape[1] != len(FIELDS) or len(samples) == 0:
+            raise ValueError(
+                f"Trajectory '{name}' needs an (N, {len(FIELDS)}) array, got {samples.shape}"
+            )
+        if np.any(np.diff(samples[:, 0]) <= 0):
+            raise ValueError(f"Trajectory '{name}' timestamps must be increasing")
+        self.name = name
+        self.samples = samples
+        self.times = samples[:, 0]
+        # plain list so bisect does not go through numpy scalar indexing
+        self._time_list = self.times.tolist()
+        self.start_time = self._time_list[0]
+        self.total_time = self._time_list[-1]
+        self.dt = self._uniform_dt()
+
+    def _uniform_dt(self) -> Optional[float]:
+        """Returns the sample period if samples are evenly spaced."""
+        if len(self.times) < 2:
+            return None
+        steps = np.diff(self.times)
+        dt = float(steps.mean())
+        if np.all(np.abs(steps - dt) <= 1e-6 + 1e-3 * dt):
+            return dt
+        return None
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @classmethod
+    def load(cls, path: str) -> "SwerveTrajectory":
+        """Loads a Choreo ``.traj`` file, or a CSV file with a header row
+        containing the columns t, x, y, heading, vx, vy, omega."""
+        path = Path(path)
+        if path.suffix == ".csv":
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+            samples = [[float(row[field]) for field in FIELDS] for row in rows]
+        else:
+            with open(path) as f:
+                data = json.load(f)
+            # Choreo 2025+ nests samples under "trajectory", older files do not
+            raw = data.get("trajectory", data)
+            if isinstance(raw, dict):
+                raw = raw["samples"]
+            samples = [
+                [
+                    sample.get("t", sample.get("timestamp")),
+                    sample["x"],
+                    sample["y"],
+                    sample["heading"],
+                    sample.get("vx", sample.get("velocityX", 0.0)),
+                    sample.get("vy", sample.get("velocityY", 0.0)),
+                    sample.get("omega", sample.get("angularVelocity", 0.0)),
+                ]
+                for sample in raw
+            ]
+        return cls(np.array(samples, dtype=float), path.stem)
+
+    @classmethod
+    def from_deploy(cls, name: str, subdirectory: str = "choreo") -> "SwerveTrajectory":
+        """Loads a trajectory from the deploy directory. If name has no file
+        extension, ``.traj`` is assumed."""
+        if not Path(name).suffix:
+            name = f"{name}.traj"
+        return cls.load(str(Path(getDeployDirectory()) / subdirectory / name))
+
+    def _index(self, timestamp: float) -> int:
+        """Index of the last sample at or before timestamp (clamped)."""
+        last = len(self._time_list) - 1
+        if self.dt is not None:
+            index = int((timestamp - self.start_time) / self.dt)
+            index = min(max(index, 0), last)
+            # guard against float error right at a sample boundary
+            if index < last and self._time_list[index + 1] <= timestamp:
+                index += 1
+            elif index > 0 and self._time_list[index] > timestamp:
+                index -= 1
+            return index
+        return min(max(bisect.bisect_right(self._time_list, timestamp) - 1, 0), last)
+
+    def sample(self, timestamp: float) -> TrajectorySample:
+        """Returns the target state at timestamp (seconds since the start of
+        the trajectory), linearly interpolated between samples and clamped
+        to the ends."""
+        index = self._index(timestamp)
+        a = self.samples[index].tolist()
+        if index + 1 >= len(self.samples) or timestamp <= a[0]:
+            return TrajectorySample(*a)
+        t0, x0, y0, h0, vx0, vy0, w0 = a
+        t1, x1, y1, h1, vx1, vy1, w1 = self.samples[index + 1].tolist()
+        t = (timestamp - t0) / (t1 - t0)
+        dh = (h1 - h0 + math.pi) % (2 * math.pi) - math.pi
+        return TrajectorySample(
+            timestamp,
+            x0 + (x1 - x0) * t,
+            y0 + (y1 - y0) * t,
+            h0 + dh * t,
+            vx0 + (vx1 - vx0) * t,
+            vy0 + (vy1 - vy0) * t,
+            w0 + (w1 - w0) * t,
+        )
+
+    def initial_pose(self) -> Pose2d:
+        return TrajectorySample(*self.samples[0].tolist()).pose()
+
+    def final_pose(self) -> Pose2d:
+        return TrajectorySample(*self.samples[-1].tolist()).pose()
+
+    def is_finished(self, timestamp: float) -> bool:
+        return timestamp >= self.total_time
+
+
+class HolonomicController:
+    """Follows a `SwerveTrajectory` by adding PID corrections on x, y and
+    heading to the trajectory's feedforward velocities.
+
+    Gains come from two `SmartProfile`s (each needs kP, kI, kD). Output is
+    field-relative, suitable for `LemonSwerve.drive_field_speeds()`.
+    """
+
+    def __init__(self, translation_profile: SmartProfile, rotation_profile: SmartProfile):
+        self.x_controller = translation_profile.create_wpi_pid_controller()
+        self.y_controller = translation_profile.create_wpi_pid_controller()
+        self.heading_controller = rotation_profile.create_wpi_pid_controller()
+        self.heading_controller.enableContinuousInput(-math.pi, math.pi)
+
+    def reset(self):
+        """Clears integrators, eg. before starting a new trajectory."""
+        self.x_controller.reset()
+        self.y_controller.reset()
+        self.heading_controller.reset()
+
+    def calculate(
+        self, pose: Pose2d, sample: TrajectorySample
+    ) -> tuple[float, float, float]:
+        """Returns field-relative (vx, vy, omega) to follow sample from pose."""
+        return (
+            sample.vx + self.x_controller.calculate(pose.X(), sample.x),
+            sample.vy + self.y_controller.calculate(pose.Y(), sample.y),
+            sample.omega
+            + self.heading_controller.calculate(
+                pose.rotation().radians(), sample.heading
+            ),
+        )
@@ -6,7 +6,8 @@ from wpilib import SmartDashboard
 from robotpy_ext.autonomous import AutonomousModeSelector
 from .commandcomponent import LemonComponent
 from lemonlib.util import AlertManager, AlertType
-from lemonlib.smart import SmartNT
+from lemonlib.smart import SmartNT, dispatch_changes
+from lemonlib.control import LemonInput
 import heapq
 from wpilib import Notifier
 from typing import Callable, List, Tuple
@@ -122,6 +123,11 @@ class LemonRobot(magicbot.MagicRobot):
 
     def _do_periodics(self):
         super()._do_periodics()
+        # tuning changes are applied here, between loops, rather than
+        # whenever the NT thread happens to deliver them
+        dispatch_changes()
+        # controllers are read at most once per loop from here on
+        LemonInput.next_loop()
 
         self.loop_time = max(self.control_loop_wait_time, self.watchdog.getTime())
 
@@ -0,0 +1,173 @@
+"""Records what a driver does with a `LemonInput` and plays it back.
+
+A recording is a small header followed by one fixed-width record per robot
+loop: timestamp (seconds since recording started), every axis, the button
+bitmask and the POV. Recording on the practice field:
+```
+def teleopInit(self):
+    self.recorder = InputRecorder(self.joystick, "/home/lvuser/auto_left.inputs")
+
+def teleopPeriodic(self):
+    self.recorder.record()
+
+def disabledInit(self):
+    self.recorder.close()
+```
+and playing the recording back as an autonomous routine, through the same
+teleop code:
+```
+player = InputPlayer("/home/lvuser/auto_left.inputs")
+player.start()
+self.joystick.set_source(player.sample_now)
+```
+In simulation, `InputPlayer.play_sim()` drives a `LemonInputSim` instead,
+so the recording goes through the driver station like real input.
+"""
+
+import struct
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from wpilib import Timer
+
+from .control import LemonInput
+
+__all__ = ["InputRecorder", "InputPlayer"]
+
+MAGIC = b"LINP"
+VERSION = 1
+# magic, version, axis count, button count
+HEADER = struct.Struct("<4sHBB")
+
+
+def _record_dtype(axes: int) -> np.dtype:
+    # packed to match struct.Struct(f"<d{axes}fIh")
+    return np.dtype(
+        [("time", "<f8"), ("axes", "<f4", (axes,)), ("buttons", "<u4"), ("pov", "<i2")]
+    )
+
+
+class InputRecorder:
+    """Appends one record per `record()` call for a `LemonInput`."""
+
+    def __init__(
+        self,
+        controller: LemonInput,
+        path,
+        axes: int = 6,
+        buttons: int = 16,
+        flush_period: float = 1.0,
+    ):
+        """
+        :param controller: Controller to record
+        :param path: Recording file, overwritten if it exists
+        :param axes: Number of axes recorded (the first ones of the controller)
+        :param buttons: Number of buttons the player will report
+        :param flush_period: Seconds between flushes to disk, so a brown-out
+            or a missing `close()` loses at most this much of the recording
+        """
+        self.controller = controller
+        self.axes = axes
+        self._record = struct.Struct(f"<d{axes}fIh")
+        self._file = open(Path(path), "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, axes, buttons))
+        self._start = Timer.getFPGATimestamp()
+        self.flush_period = flush_period
+        self._next_flush = flush_period
+        self._padding = [0.0] * axes
+        self.records = 0
+
+    def record(self) -> None:
+        """Records the controller's current snapshot. Call once per loop."""
+        buttons, axes, pov = self.controller.snapshot()
+        if len(axes) < self.axes:
+            axes = axes + self._padding[len(axes) :]
+        t = Timer.getFPGATimestamp() - self._start
+        self._file.write(self._record.pack(t, *axes[: self.axes], buttons, pov))
+        self.records += 1
+        if t >= self._next_flush:
+            self._file.flush()
+            self._next_flush = t + self.flush_period
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class InputPlayer:
+    """Plays back a recording made by `InputRecorder`.
+
+    Axes are linearly interpolated between the records around the playback
+    time; buttons and POV hold the value of the last record at or before
+    it. Past the end, everything reads as released and centered.
+    """
+
+    def __init__(self, path):
+        data = Path(path).read_bytes()
+        magic, version, axes, buttons = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} input recording")
+        dtype = _record_dtype(axes)
+        # a recording cut off mid-record (eg. by a brown-out) keeps its
+        # complete records
+        count = (len(data) - HEADER.size) // dtype.itemsize
+        records = np.frombuffer(data, dtype, count, offset=HEADER.size)
+        self.times = records["time"].astype(float)
+        self.axes = records["axes"].astype(float)
+        self.buttons = records["buttons"]
+        self.povs = records["pov"]
+        self.axis_count = axes
+        self.button_count = buttons
+        self._start: Optional[float] = None
+        self._idle = (0, [0.0] * axes, -1)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def start(self, now: Optional[float] = None) -> None:
+        """Starts playback; `sample_now()` is relative to this time."""
+        self._start = Timer.getFPGATimestamp() if now is None else now
+
+    def finished(self, now: Optional[float] = None) -> bool:
+        if self._start is None:
+            return False
+        now = Timer.getFPGATimestamp() if now is None else now
+        return now - self._start > self.duration
+
+    def sample(self, t: float) -> tuple[int, list[float], int]:
+        """Returns (button bitmask, axes, POV) t seconds into the recording."""
+        times = self.times
+        if not len(times) or t < 0 or t > times[-1]:
+            return self._idle
+        i = int(np.searchsorted(times, t, side="right")) - 1
+        axes = self.axes[i]
+        if i + 1 < len(times) and times[i + 1] > times[i]:
+            fraction = (t - times[i]) / (times[i + 1] - times[i])
+            axes = axes + (self.axes[i + 1] - axes) * fraction
+        return int(self.buttons[i]), axes.tolist(), int(self.povs[i])
+
+    def sample_now(self) -> tuple[int, list[float], int]:
+        """`sample()` at the time since `start()`; pass to
+        `LemonInput.set_source()` to drive a controller directly."""
+        if self._start is None:
+            return self._idle
+        return self.sample(Timer.getFPGATimestamp() - self._start)
+
+    def play_sim(self, sim, t: Optional[float] = None) -> None:
+        """Sets a `LemonInputSim` (or any `GenericHIDSim`) to the recording
+        at t, by default the time since `start()`."""
+        if t is None:
+            buttons, axes, pov = self.sample_now()
+        else:
+            buttons, axes, pov = self.sample(t)
+        sim.setAxisCount(self.axis_count)
+        sim.setButtonCount(self.button_count)
+        sim.setPOVCount(1)
+        for axis, value in enumerate(axes):
+            sim.setRawAxis(axis, value)
+        for button in range(1, self.button_count + 1):
+            sim.setRawButton(button, bool(buttons >> (button - 1) & 1))
+        sim.setPOV(pov)
+        sim.notifyNewData()
@@ -1,6 +1,23 @@
 from .lemoninputsim import LemonInputSim
 from .falconsim import FalconSim
+from .swervesim import SwerveDriveSim
 
 from .lemoncamsim import LemonCameraSim
 
-__all__ = ["KilloughDriveSim", "LemonInputSim", "FalconSim", "LemonCameraSim"]
+from .runner import SimResult, SimScenario, run_scenario, run_scenarios
+from .tuner import GainTuner, MotorPlant, SignalTest, TuneResult
+
+__all__ = [
+    "LemonInputSim",
+    "FalconSim",
+    "LemonCameraSim",
+    "SwerveDriveSim",
+    "SimScenario",
+    "SimResult",
+    "run_scenario",
+    "run_scenarios",
+    "GainTuner",
+    "MotorPlant",
+    "SignalTest",
+    "TuneResult",
+]
@@ -0,0 +1,343 @@
+"""Headless, stepped-clock simulation of a robot program.
+
+Runs ``robot.py`` (with its ``physics.py``) for a scripted sequence of
+disabled/autonomous/teleop phases without a driver station or GUI. The HAL
+clock is paused and advanced one control loop at a time, so simulated time
+runs as fast as the robot code allows. Independent scenarios are fanned out
+to a process pool, one fresh process per scenario, since the HAL, phoenix6
+and NetworkTables all keep global state.
+
+phoenix6 simulated devices still run on the wall clock, so their status
+signals can be reported stale when the loop runs faster than real time and
+runs with CTRE devices are not bit-exact between repeats.
+
+From the command line::
+
+    python -m lemonlib.simulation.runner --auto "Drive Forward" --seeds 4 --alliance red blue
+"""
+
+import argparse
+import concurrent.futures
+import importlib.metadata
+import importlib.util
+import inspect
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+__all__ = ["SimScenario", "SimResult", "run_scenario", "run_scenarios"]
+
+PHASES = ("disabled", "autonomous", "teleop", "test")
+
+# pyfrc versions (by year) whose private PhysicsInterface._create_and_attach
+# the runner has been checked against
+PYFRC_VERSIONS = (2026,)
+
+
+@dataclass
+class SimScenario:
+    """One simulated run. Must be picklable, so `collect` has to be a
+    module-level function."""
+
+    name: str
+    # (phase, seconds) pairs, run in order; phase is one of PHASES
+    phases: Sequence[tuple[str, float]] = (("disabled", 0.5), ("autonomous", 15.0))
+    # name of the autonomous mode to select, None keeps the default
+    auto_mode: Optional[str] = None
+    alliance: str = "blue"
+    station: int = 1
+    seed: int = 0
+    # called with the robot after the last phase; returns extra metrics
+    collect: Optional[Callable[[Any], dict]] = None
+
+
+@dataclass
+class SimResult:
+    """Metrics collected from one `SimScenario`."""
+
+    scenario: SimScenario
+    sim_time: float = 0.0
+    wall_time: float = 0.0
+    loops: int = 0
+    # true pose from the physics model if it has one, else the robot's estimate
+    final_pose: Optional[tuple[float, float, float]] = None
+    estimated_pose: Optional[tuple[float, float, float]] = None
+    metrics: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def speedup(self) -> float:
+        """Simulated seconds per wall-clock second."""
+        return self.sim_time / self.wall_time if self.wall_time > 0 else math.inf
+
+
+def _load_robot_class(robot_file: Path):
+    import wpilib
+
+    spec = importlib.util.spec_from_file_location("robot", robot_file)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["robot"] = module
+    spec.loader.exec_module(module)
+    if hasattr(module, "MyRobot"):
+        return module.MyRobot
+    for value in vars(module).values():
+        if (
+            inspect.isclass(value)
+            and issubclass(value, wpilib.RobotBase)
+            and value.__module__ == module.__name__
+        ):
+            return value
+    raise ValueError(f"No robot class found in {robot_file}")
+
+
+def _attach_physics(robot_class, robot_dir: Path):
+    """Creates physics.py's PhysicsEngine and hooks it into robot_class,
+    the way ``robotpy sim`` does. This is private pyfrc API, so fail
+    clearly on a pyfrc it hasn't been checked against."""
+    from pyfrc.physics.core import PhysicsInterface
+
+    version = importlib.metadata.version("pyfrc")
+    create = getattr(PhysicsInterface, "_create_and_attach", None)
+    if create is None or int(version.split(".")[0]) not in PYFRC_VERSIONS:
+        raise RuntimeError(
+            f"The simulation runner relies on pyfrc's private"
+            f" PhysicsInterface._create_and_attach, checked against pyfrc"
+            f" {', '.join(map(str, PYFRC_VERSIONS))}; pyfrc {version} is installed."
+            f" Check that it still works and add the version to PYFRC_VERSIONS."
+        )
+    return create(robot_class, robot_dir)
+
+
+def _pose_tuple(pose) -> tuple[float, float, float]:
+    return (pose.X(), pose.Y(), pose.rotation().radians())
+
+
+def run_scenario(scenario: SimScenario, robot_file: str = "robot.py") -> SimResult:
+    """Runs one scenario in the current process and returns its metrics.
+
+    This takes over the process-wide HAL and NetworkTables state, so call it
+    through `run_scenarios()` unless the process is dedicated to it.
+    """
+    robot_file = Path(robot_file).resolve()
+    robot_dir = robot_file.parent
+    # robot code loads deploy files and components relative to its directory
+    os.chdir(robot_dir)
+    if str(robot_dir) not in sys.path:
+        sys.path.insert(0, str(robot_dir))
+
+    random.seed(scenario.seed)
+    try:
+        import numpy as np
+
+        np.random.seed(scenario.seed)
+    except ImportError:
+        pass
+
+    import hal
+    import ntcore
+    import wpilib
+    from wpilib.simulation import (
+        DriverStationSim,
+        pauseTiming,
+        restartTiming,
+        stepTiming,
+    )
+
+    result = SimResult(scenario)
+    for phase, _ in scenario.phases:
+        if phase not in PHASES:
+            result.error = f"Unknown phase '{phase}', expected one of {PHASES}"
+            return result
+
+    hal.initialize(500, 0)
+    ntcore.NetworkTableInstance.getDefault().startLocal()
+    pauseTiming()
+    restartTiming()
+    wpilib.DriverStation.silenceJoystickConnectionWarning(True)
+    station = getattr(
+        hal.AllianceStationID, f"k{scenario.alliance.capitalize()}{scenario.station}"
+    )
+    DriverStationSim.setAllianceStationId(station)
+    DriverStationSim.setDsAttached(True)
+    DriverStationSim.setAutonomous(False)
+    DriverStationSim.setEnabled(False)
+    DriverStationSim.notifyNewData()
+
+    try:
+        physics, robot_class = _attach_physics(_load_robot_class(robot_file), robot_dir)
+    except Exception:
+        result.error = traceback.format_exc()
+        return result
+
+    initialized = threading.Event()
+    errors = []
+
+    class RunnerRobot(robot_class):
+        def robotInit(self):
+            try:
+                super().robotInit()
+            finally:
+                initialized.set()
+
+    robot = RunnerRobot()
+
+    def robot_thread():
+        try:
+            robot.startCompetition()
+        except BaseException:
+            errors.append(traceback.format_exc())
+        finally:
+            initialized.set()
+
+    thread = threading.Thread(target=robot_thread, daemon=True)
+    start = time.perf_counter()
+    thread.start()
+    initialized.wait()
+
+    if scenario.auto_mode is not None:
+        ntcore.NetworkTableInstance.getDefault().getTable(
+            "SmartDashboard/Autonomous Mode"
+        ).putString("selected", scenario.auto_mode)
+
+    period = getattr(robot, "control_loop_wait_time", 0.02)
+    try:
+        for phase, seconds in scenario.phases:
+            DriverStationSim.setAutonomous(phase == "autonomous")
+            DriverStationSim.setTest(phase == "test")
+            DriverStationSim.setEnabled(phase != "disabled")
+            for _ in range(round(seconds / period)):
+                if errors or not thread.is_alive():
+                    break
+                DriverStationSim.notifyNewData()
+                stepTiming(period)
+                result.loops += 1
+                result.sim_time += period
+        result.wall_time = time.perf_counter() - start
+
+        engine = getattr(physics, "engine", None)
+        swerve_sim = getattr(engine, "swerve_sim", None)
+        if swerve_sim is not None:
+            result.final_pose = _pose_tuple(swerve_sim.get_pose())
+        drivetrain = getattr(robot, "drivetrain", None)
+        if drivetrain is not None and hasattr(drivetrain, "get_pose"):
+            result.estimated_pose = _pose_tuple(drivetrain.get_pose())
+            if result.final_pose is None:
+                result.final_pose = result.estimated_pose
+        if scenario.collect is not None:
+            result.metrics = dict(scenario.collect(robot))
+    except Exception:
+        errors.append(traceback.format_exc())
+    finally:
+        DriverStationSim.setEnabled(False)
+        DriverStationSim.notifyNewData()
+        robot.endCompetition()
+        # let any waiting notifiers fire so the robot thread can exit
+        stepTiming(1.0)
+        thread.join(timeout=1.0)
+
+    if errors:
+        result.error = errors[0]
+    return result
+
+
+def run_scenarios(
+    scenarios: Sequence[SimScenario],
+    robot_file: str = "robot.py",
+    processes: Optional[int] = None,
+) -> list[SimResult]:
+    """Runs every scenario in its own fresh process, up to `processes` at a
+    time (default: one per CPU). Results are returned in scenario order."""
+    robot_file = str(Path(robot_file).resolve())
+    # spawn, not fork: the parent may already hold HAL/phoenix6 threads
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as pool:
+        futures = [
+            pool.submit(run_scenario, scenario, robot_file) for scenario in scenarios
+        ]
+        results = []
+        for scenario, future in zip(scenarios, futures):
+            try:
+                results.append(future.result())
+            except Exception:
+                # the worker died, eg. a crash in native code
+                results.append(SimResult(scenario, error=traceback.format_exc()))
+        return results
+
+
+def _format_pose(pose) -> str:
+    if pose is None:
+        return "-"
+    x, y, heading = pose
+    return f"({x:6.2f}, {y:6.2f}, {math.degrees(heading):7.1f}°)"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--robot", default="robot.py", help="path to robot.py")
+    parser.add_argument(
+        "--auto", action="append", default=None, help="autonomous mode (repeatable)"
+    )
+    parser.add_argument("--alliance", nargs="+", default=["blue"], choices=["red", "blue"])
+    parser.add_argument("--seeds", type=int, default=1, help="number of seeds per case")
+    parser.add_argument("--disabled", type=float, default=0.5, help="seconds disabled first")
+    parser.add_argument("--auto-time", type=float, default=15.0)
+    parser.add_argument("--teleop-time", type=float, default=0.0)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    phases = [("disabled", args.disabled), ("autonomous", args.auto_time)]
+    if args.teleop_time > 0:
+        phases.append(("teleop", args.teleop_time))
+    scenarios = [
+        SimScenario(
+            f"{auto or 'default'}/{alliance}/{seed}",
+            phases=phases,
+            auto_mode=auto,
+            alliance=alliance,
+            seed=seed,
+        )
+        for auto, alliance, seed in product(
+            args.auto or [None], args.alliance, range(args.seeds)
+        )
+    ]
+
+    start = time.perf_counter()
+    results = run_scenarios(scenarios, args.robot, args.processes)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for result in results:
+        status = "ok" if result.ok else "FAILED"
+        print(
+            f"{result.scenario.name:30} {status:6} {result.sim_time:6.1f}s sim "
+            f"{result.speedup:5.1f}x  pose {_format_pose(result.final_pose)}"
+        )
+        if not result.ok:
+            failed += 1
+            print(result.error)
+    sim_total = sum(result.sim_time for result in results)
+    print(
+        f"{len(results)} scenarios, {sim_total:.1f}s simulated in {elapsed:.1f}s wall"
+        f" ({failed} failed)"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
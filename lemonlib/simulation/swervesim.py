@@ -0,0 +1,256 @@
+import math
+from typing import Sequence
+
+import numpy as np
+from phoenix6.sim import ChassisReference
+from phoenix6.swerve import SwerveDrivetrain, SwerveModuleConstants
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import ChassisSpeeds
+from wpimath.system.plant import DCMotor
+
+GRAVITY = 9.81
+
+
+class SwerveDriveSim:
+    """Physics simulation of a phoenix6 `SwerveDrivetrain`, as used by
+    `LemonSwerve`.
+
+    Each call to `update()` reads the voltage applied to all eight TalonFXs,
+    integrates the chassis in fixed steps and writes the resulting rotor,
+    CANcoder and Pigeon2 readings back to their sim states. Unlike the
+    phoenix6 built-in sim, the chassis has real mass and inertia and the
+    wheels can slip: each wheel's contact force is limited to a friction
+    circle of radius ``wheel_cof * normal_force``.
+
+    Everything is plain NumPy, so with no GUI attached it runs many times
+    faster than real time. `step()` can also be driven directly with
+    voltages (``drivetrain=None``) for headless analysis.
+    """
+
+    def __init__(
+        self,
+        drivetrain: SwerveDrivetrain,
+        module_constants: Sequence[SwerveModuleConstants],
+        mass: float = 60.0,
+        moment_of_inertia: float = 6.0,
+        wheel_cof: float = 1.2,
+        drive_motor: DCMotor = DCMotor.krakenX60(1),
+        steer_motor: DCMotor = DCMotor.krakenX60(1),
+        step: float = 0.002,
+    ):
+        """
+        :param drivetrain: The phoenix6 drivetrain to drive, or None to only
+            use `step()`
+        :param module_constants: Constants for each module, in drivetrain order
+        :param mass: Robot mass in kg
+        :param moment_of_inertia: Robot yaw inertia in kg*m^2
+        :param wheel_cof: Coefficient of friction between wheel and carpet
+        :param drive_motor: Motor model for a single drive motor
+        :param steer_motor: Motor model for a single steer motor
+        :param step: Fixed integration step in seconds
+        """
+        self.drivetrain = drivetrain
+        self.mass = mass
+        self.moment_of_inertia = moment_of_inertia
+        self.wheel_cof = wheel_cof
+        self.step_size = step
+        self.num_modules = len(module_constants)
+
+        def column(attr: str) -> np.ndarray:
+            return np.array([getattr(m, attr) for m in module_constants], dtype=float)
+
+        self.location_x = column("location_x")
+        self.location_y = column("location_y")
+        self.wheel_radius = column("wheel_radius")
+        self.drive_gearing = column("drive_motor_gear_ratio")
+        self.steer_gearing = column("steer_motor_gear_ratio")
+        self.coupling_ratio = column("coupling_gear_ratio")
+        self.drive_inertia = column("drive_inertia")
+        self.steer_inertia = column("steer_inertia")
+        self.drive_friction_voltage = column("drive_friction_voltage")
+        self.steer_friction_voltage = column("steer_friction_voltage")
+
+        # motor torque at the mechanism is a - b * velocity with a = k_volts * V
+        self._drive_k_volts = self.drive_gearing * drive_motor.Kt / drive_motor.R
+        self._drive_damping = self.drive_gearing**2 * drive_motor.Kt / (
+            drive_motor.R * drive_motor.Kv
+        )
+        self._steer_k_volts = self.steer_gearing * steer_motor.Kt / steer_motor.R
+        self._steer_damping = self.steer_gearing**2 * steer_motor.Kt / (
+            steer_motor.R * steer_motor.Kv
+        )
+        # share of the robot each wheel has to push and is pressed down by
+        self._module_mass = mass / self.num_modules
+        self._max_wheel_force = wheel_cof * self._module_mass * GRAVITY
+
+        if drivetrain is not None:
+            self._configure_orientations(module_constants)
+
+        self.reset(Pose2d())
+
+    def _configure_orientations(self, module_constants: Sequence[SwerveModuleConstants]):
+        """Matches sim state orientations to the module inversions so that
+        the voltages read and positions written are mechanism-positive."""
+        for module, constants in zip(self.drivetrain.modules, module_constants):
+            module.drive_motor.sim_state.orientation = _orientation(
+                constants.drive_motor_inverted
+            )
+            module.steer_motor.sim_state.orientation = _orientation(
+                constants.steer_motor_inverted
+            )
+            encoder = module.encoder.sim_state
+            encoder.orientation = _orientation(constants.encoder_inverted)
+            encoder.sensor_offset = constants.encoder_offset
+
+    def reset(self, pose: Pose2d):
+        """Puts the robot at rest at pose with all modules pointing forward."""
+        self.x = pose.X()
+        self.y = pose.Y()
+        self.heading = pose.rotation().radians()
+        # chassis velocity in the field frame
+        self.vx = 0.0
+        self.vy = 0.0
+        self.omega = 0.0
+        self.wheel_velocity = np.zeros(self.num_modules)
+        self.wheel_position = np.zeros(self.num_modules)
+        self.steer_velocity = np.zeros(self.num_modules)
+        self.steer_angle = np.zeros(self.num_modules)
+        self.slipping = np.zeros(self.num_modules, dtype=bool)
+        self.drive_voltage = np.zeros(self.num_modules)
+        self.steer_voltage = np.zeros(self.num_modules)
+
+    def get_pose(self) -> Pose2d:
+        """Returns the true (simulated) pose of the robot."""
+        return Pose2d(self.x, self.y, Rotation2d(self.heading))
+
+    def get_speeds(self) -> ChassisSpeeds:
+        """Returns the true robot-relative chassis speeds."""
+        cos, sin = math.cos(self.heading), math.sin(self.heading)
+        return ChassisSpeeds(
+            self.vx * cos + self.vy * sin, -self.vx * sin + self.vy * cos, self.omega
+        )
+
+    def step(self, drive_voltage: np.ndarray, steer_voltage: np.ndarray, dt: float):
+        """Advances the physics by dt seconds with constant motor voltages,
+        in fixed steps of at most `step_size`."""
+        drive_voltage = _apply_friction(drive_voltage, self.drive_friction_voltage)
+        steer_voltage = _apply_friction(steer_voltage, self.steer_friction_voltage)
+        steps = max(1, math.ceil(dt / self.step_size - 1e-9))
+        h = dt / steps
+
+        # exact solutions of J * w' = a - b * w over one step
+        drive_decay = np.exp(-self._drive_damping * h / self.drive_inertia)
+        drive_target = drive_voltage * self._drive_k_volts / self._drive_damping
+        steer_decay = np.exp(-self._steer_damping * h / self.steer_inertia)
+        steer_target = steer_voltage * self._steer_k_volts / self._steer_damping
+        # velocity change of the contact patch per newton of wheel force
+        compliance = h * (
+            self.wheel_radius**2 / self.drive_inertia + 1.0 / self._module_mass
+        )
+
+        for _ in range(steps):
+            self.steer_velocity = steer_target + (self.steer_velocity - steer_target) * steer_decay
+            self.steer_angle += self.steer_velocity * h
+            wheel_velocity = drive_target + (self.wheel_velocity - drive_target) * drive_decay
+
+            # module velocity in the robot frame
+            cos, sin = math.cos(self.heading), math.sin(self.heading)
+            robot_vx = self.vx * cos + self.vy * sin
+            robot_vy = -self.vx * sin + self.vy * cos
+            module_vx = robot_vx - self.omega * self.location_y
+            module_vy = robot_vy + self.omega * self.location_x
+            wheel_cos = np.cos(self.steer_angle)
+            wheel_sin = np.sin(self.steer_angle)
+            rolling = module_vx * wheel_cos + module_vy * wheel_sin
+            lateral = -module_vx * wheel_sin + module_vy * wheel_cos
+
+            # force that would remove all slip this step, limited by friction
+            long_force = (wheel_velocity * self.wheel_radius - rolling) / compliance
+            lat_force = -lateral * self._module_mass / h
+            total = np.hypot(long_force, lat_force)
+            self.slipping = total > self._max_wheel_force
+            scale = np.where(
+                self.slipping, self._max_wheel_force / np.maximum(total, 1e-12), 1.0
+            )
+            long_force *= scale
+            lat_force *= scale
+
+            self.wheel_velocity = (
+                wheel_velocity - long_force * self.wheel_radius * h / self.drive_inertia
+            )
+            self.wheel_position += self.wheel_velocity * h
+
+            force_x = long_force * wheel_cos - lat_force * wheel_sin
+            force_y = long_force * wheel_sin + lat_force * wheel_cos
+            robot_fx = float(force_x.sum())
+            robot_fy = float(force_y.sum())
+            torque = float(
+                (self.location_x * force_y - self.location_y * force_x).sum()
+            )
+            self.vx += (robot_fx * cos - robot_fy * sin) / self.mass * h
+            self.vy += (robot_fx * sin + robot_fy * cos) / self.mass * h
+            self.omega += torque / self.moment_of_inertia * h
+            self.x += self.vx * h
+            self.y += self.vy * h
+            self.heading += self.omega * h
+
+    def update(self, dt: float, supply_voltage: float = 12.0):
+        """Reads the motor voltages from the drivetrain, advances the physics
+        by dt and writes the new sensor readings back."""
+        modules = self.drivetrain.modules
+        for i, module in enumerate(modules):
+            drive = module.drive_motor.sim_state
+            steer = module.steer_motor.sim_state
+            drive.set_supply_voltage(supply_voltage)
+            steer.set_supply_voltage(supply_voltage)
+            module.encoder.sim_state.set_supply_voltage(supply_voltage)
+            self.drive_voltage[i] = drive.motor_voltage
+            self.steer_voltage[i] = steer.motor_voltage
+
+        self.step(self.drive_voltage, self.steer_voltage, dt)
+
+        two_pi = 2 * math.pi
+        wheel_rotations = (self.wheel_position / two_pi).tolist()
+        wheel_rps = (self.wheel_velocity / two_pi).tolist()
+        steer_rotations = (self.steer_angle / two_pi).tolist()
+        steer_rps = (self.steer_velocity / two_pi).tolist()
+        for i, module in enumerate(modules):
+            drive = module.drive_motor.sim_state
+            steer = module.steer_motor.sim_state
+            encoder = module.encoder.sim_state
+            # the drive rotor also turns when the module steers (coupling)
+            drive.set_raw_rotor_position(
+                wheel_rotations[i] * self.drive_gearing[i]
+                + steer_rotations[i] * self.coupling_ratio[i]
+            )
+            drive.set_rotor_velocity(
+                wheel_rps[i] * self.drive_gearing[i]
+                + steer_rps[i] * self.coupling_ratio[i]
+            )
+            steer.set_raw_rotor_position(steer_rotations[i] * self.steer_gearing[i])
+            steer.set_rotor_velocity(steer_rps[i] * self.steer_gearing[i])
+            # azimuth encoders see the mechanism, so no steer gearing
+            encoder.set_raw_position(steer_rotations[i])
+            encoder.set_velocity(steer_rps[i])
+
+        pigeon = self.drivetrain.pigeon2.sim_state
+        pigeon.set_supply_voltage(supply_voltage)
+        pigeon.set_raw_yaw(math.degrees(self.heading))
+        pigeon.set_angular_velocity_z(math.degrees(self.omega))
+
+
+def _orientation(inverted: bool) -> ChassisReference:
+    if inverted:
+        return ChassisReference.CLOCKWISE_POSITIVE
+    return ChassisReference.COUNTER_CLOCKWISE_POSITIVE
+
+
+def _apply_friction(voltage: np.ndarray, friction_voltage: np.ndarray) -> np.ndarray:
+    """Removes the voltage needed to overcome static friction, as the
+    phoenix6 simulation does."""
+    voltage = np.asarray(voltage, dtype=float)
+    return np.where(
+        np.abs(voltage) <= friction_voltage,
+        0.0,
+        voltage - np.sign(voltage) * friction_voltage,
+    )
@@ -0,0 +1,373 @@
+"""Offline gain tuning of a `SmartProfile` against a simulated motor.
+
+Candidate gains drive a `DCMotorSim` through a suite of step and ramp
+tests using the same controller the robot builds from the profile (eg.
+`create_flywheel_controller`), and are scored on tracking error, overshoot
+and output chatter. The search is a coarse grid over the gains being tuned
+followed by a pattern search around the best grid points, with every batch
+of candidates evaluated on a process pool.
+
+```
+plant = MotorPlant("krakenX60", moi=0.05, gearing=50, mode="position")
+tuner = GainTuner(turret_profile, plant, {"kP": (0, 60), "kD": (0, 2)}, "pid")
+results = tuner.run()
+print(format_table(results))
+tuner.apply(results[0])
+```
+
+The controller runs in Python every `MotorPlant.period` (20 ms), like a
+`SmartController` on the robot loop. Gains that run on a motor controller
+instead, eg. a TalonFX Slot0 from `create_ctre_turret_controller` (such
+as the swerve steer and drive profiles), close the loop on the device at
+1 kHz; kI and kD tuned here won't transfer to them, and kP only roughly.
+
+From the command line::
+
+    python -m lemonlib.simulation.tuner --mode velocity --gearing 6.75 --moi 0.01 \\
+        --gain kS=0.17 kV=0.7 --search kP=0:2 kI=0:0.5
+"""
+
+import argparse
+import concurrent.futures
+import math
+import multiprocessing
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Optional, Sequence
+
+import numpy as np
+
+__all__ = ["MotorPlant", "SignalTest", "TuneResult", "GainTuner", "format_table"]
+
+MODES = ("position", "velocity")
+
+
+@dataclass(frozen=True)
+class MotorPlant:
+    """A `DCMotorSim` of a motor driving an inertia through a gearbox, in
+    mechanism rotations (position) or rotations per second (velocity), like
+    phoenix6 closed loops. Picklable, so it can be sent to worker processes."""
+
+    # name of a DCMotor constructor, eg. "falcon500" or "krakenX60"
+    motor: str = "krakenX60"
+    moi: float = 0.01
+    gearing: float = 1.0
+    mode: str = "velocity"
+    motors: int = 1
+    # output is clamped to +-max_voltage, like a motor controller
+    max_voltage: float = 12.0
+    period: float = 0.02
+
+    def free_speed(self) -> float:
+        """Mechanism free speed in rotations per second."""
+        from wpimath.system.plant import DCMotor
+
+        gearbox = getattr(DCMotor, self.motor)(self.motors)
+        return gearbox.freeSpeed / (2 * math.pi) / self.gearing
+
+    def create(self):
+        from wpilib.simulation import DCMotorSim
+        from wpimath.system.plant import DCMotor, LinearSystemId
+
+        gearbox = getattr(DCMotor, self.motor)(self.motors)
+        return DCMotorSim(LinearSystemId.DCMotorSystem(gearbox, self.moi, self.gearing), gearbox)
+
+
+@dataclass(frozen=True)
+class SignalTest:
+    """A reference signal: a step to amplitude, or a ramp reaching
+    amplitude after a third of the duration and holding it."""
+
+    name: str
+    kind: str
+    amplitude: float
+    # long enough for integral gains to pull the error into the settling band
+    duration: float = 3.0
+
+    @property
+    def hold_start(self) -> float:
+        """Time the reference reaches its final value."""
+        return 0.0 if self.kind == "step" else self.duration / 3
+
+
+def default_tests(plant: MotorPlant) -> list[SignalTest]:
+    """Small and large steps plus a ramp, scaled to what the plant can do."""
+    if plant.mode == "position":
+        return [
+            SignalTest("step 0.1", "step", 0.1),
+            SignalTest("step 0.5", "step", 0.5),
+            SignalTest("ramp 0.5", "ramp", 0.5),
+        ]
+    speed = plant.free_speed()
+    return [
+        SignalTest("step 25%", "step", 0.25 * speed),
+        SignalTest("step 75%", "step", 0.75 * speed),
+        SignalTest("ramp 75%", "ramp", 0.75 * speed),
+    ]
+
+
+@dataclass
+class TuneResult:
+    """Score of one candidate set of gains; lower cost is better."""
+
+    gains: dict[str, float]
+    cost: float
+    # per test name: iae, overshoot, settling_time, chatter
+    metrics: dict[str, dict[str, float]] = field(default_factory=dict)
+
+
+def _reference(test: SignalTest, t: float) -> float:
+    if test.kind == "step":
+        return test.amplitude
+    return test.amplitude * min(1.0, t / test.hold_start)
+
+
+def _settling_time(errors: np.ndarray, scale: float, period: float, test: SignalTest) -> float:
+    """Seconds from the reference reaching its final value until the error
+    stays within 2% of the amplitude. A response that hasn't settled by the
+    end scores the time left times the final error in settling bands, so
+    closer misses still rank better than farther ones."""
+    band = 0.02 * scale
+    start = int(round(test.hold_start / period))
+    outside = np.nonzero(np.abs(errors[start:]) > band)[0]
+    if not len(outside):
+        return 0.0
+    if outside[-1] + start < len(errors) - 1:
+        return float((outside[-1] + 1) * period)
+    return float((len(errors) - start) * period * abs(errors[-1]) / band)
+
+
+def _run_test(controller, plant: MotorPlant, test: SignalTest) -> dict[str, float]:
+    sim = plant.create()
+    steps = int(round(test.duration / plant.period))
+    errors = np.zeros(steps)
+    outputs = np.zeros(steps)
+    measurement = 0.0
+    for i in range(steps):
+        reference = _reference(test, i * plant.period)
+        output = controller.calculate(measurement, reference)
+        output = max(-plant.max_voltage, min(plant.max_voltage, output))
+        sim.setInputVoltage(output)
+        sim.update(plant.period)
+        if plant.mode == "position":
+            measurement = sim.getAngularPositionRotations()
+        else:
+            measurement = sim.getAngularVelocity() / (2 * math.pi)
+        errors[i] = _reference(test, (i + 1) * plant.period) - measurement
+        outputs[i] = output
+
+    scale = abs(test.amplitude) or 1.0
+    if not np.all(np.isfinite(errors)):
+        return {"iae": math.inf, "overshoot": math.inf, "settling_time": math.inf, "chatter": math.inf}
+    return {
+        "iae": float(np.sum(np.abs(errors)) * plant.period / scale),
+        # how far past the reference it went, as a fraction of the amplitude
+        "overshoot": float(max(0.0, -np.min(errors * math.copysign(1, test.amplitude))) / scale),
+        "settling_time": _settling_time(errors, scale, plant.period, test),
+        # mean output change per loop, as a fraction of the voltage range
+        "chatter": float(np.mean(np.abs(np.diff(outputs))) / plant.max_voltage),
+    }
+
+
+def evaluate(
+    gains: dict[str, float],
+    plant: MotorPlant,
+    tests: Sequence[SignalTest],
+    controller: str,
+    weights: dict[str, float],
+) -> TuneResult:
+    """Runs every test with a fresh controller built from gains and
+    returns the weighted cost. Runs in the worker processes."""
+    from lemonlib.smart import SmartProfile
+
+    profile = SmartProfile("tuner", dict(gains), False)
+    metrics = {}
+    cost = 0.0
+    for test in tests:
+        result = _run_test(
+            getattr(profile, f"create_{controller}_controller")("tuner", False), plant, test
+        )
+        metrics[test.name] = result
+        cost += sum(weights.get(name, 0.0) * value for name, value in result.items())
+    return TuneResult(dict(gains), cost, metrics)
+
+
+class GainTuner:
+    """Searches for the gains of a `SmartProfile` that best control a
+    simulated plant. Gains not being searched keep the profile's values.
+    """
+
+    # iae dominates; overshoot and chatter break ties between fast responses
+    WEIGHTS = {"iae": 1.0, "overshoot": 0.5, "settling_time": 0.1, "chatter": 1.0}
+
+    def __init__(
+        self,
+        profile,
+        plant: MotorPlant,
+        search: dict[str, tuple[float, float]],
+        controller: str = "flywheel",
+        tests: Optional[Sequence[SignalTest]] = None,
+        weights: Optional[dict[str, float]] = None,
+        processes: Optional[int] = None,
+    ):
+        """
+        :param profile: `SmartProfile` holding the starting gains
+        :param plant: Simulated mechanism
+        :param search: Gain name to the (low, high) range searched
+        :param controller: `SmartProfile` factory used, eg. "flywheel" for
+            `create_flywheel_controller` or "pid" for `create_pid_controller`
+        :param tests: Reference signals, defaults to `default_tests(plant)`
+        :param weights: Metric name to its weight in the cost
+        :param processes: Worker processes, defaults to the CPU count
+        """
+        if plant.mode not in MODES:
+            raise ValueError(f"Unknown plant mode '{plant.mode}', expected one of {MODES}")
+        self.profile = profile
+        self.plant = plant
+        self.search = dict(search)
+        self.controller = controller
+        self.tests = list(tests) if tests is not None else default_tests(plant)
+        self.weights = dict(self.WEIGHTS if weights is None else weights)
+        self.processes = processes
+        self.evaluations = 0
+        self._seen: dict[tuple, TuneResult] = {}
+
+    def _gains(self, values: Sequence[float]) -> dict[str, float]:
+        gains = dict(self.profile.gains)
+        gains.update(zip(self.search, values))
+        return gains
+
+    def _evaluate_all(self, pool, candidates: list[tuple]) -> list[TuneResult]:
+        """Scores each candidate (a tuple of searched gain values) once,
+        running the ones not seen before in parallel."""
+        new = list(dict.fromkeys(c for c in candidates if c not in self._seen))
+        futures = [
+            pool.submit(
+                evaluate, self._gains(c), self.plant, self.tests, self.controller, self.weights
+            )
+            for c in new
+        ]
+        for candidate, future in zip(new, futures):
+            self._seen[candidate] = future.result()
+        self.evaluations += len(new)
+        return [self._seen[c] for c in candidates]
+
+    def grid(self, pool, points: int) -> list[tuple]:
+        """Evaluates an evenly spaced grid with points values per gain and
+        returns the candidates best first."""
+        axes = [np.linspace(low, high, points).tolist() for low, high in self.search.values()]
+        candidates = list(product(*axes))
+        results = self._evaluate_all(pool, candidates)
+        return [c for _, c in sorted(zip((r.cost for r in results), candidates))]
+
+    def refine(self, pool, start: tuple, iterations: int = 30, tolerance: float = 1e-3) -> tuple:
+        """Coordinate pattern search from start: tries a step up and a step
+        down on each gain separately (one gain moved per candidate), moves to
+        the best candidate if it improves, and halves the steps when none
+        does. Returns the best candidate found."""
+        best = start
+        best_cost = self._evaluate_all(pool, [start])[0].cost
+        steps = [(high - low) / 8 for low, high in self.search.values()]
+        for _ in range(iterations):
+            candidates = []
+            for i, (low, high) in enumerate(self.search.values()):
+                for direction in (-1, 1):
+                    moved = list(best)
+                    moved[i] = min(high, max(low, best[i] + direction * steps[i]))
+                    candidates.append(tuple(moved))
+            results = self._evaluate_all(pool, candidates)
+            cost, candidate = min(zip((r.cost for r in results), candidates))
+            if cost < best_cost:
+                best, best_cost = candidate, cost
+            else:
+                steps = [step / 2 for step in steps]
+                if all(
+                    step <= tolerance * max(high - low, 1e-9)
+                    for step, (low, high) in zip(steps, self.search.values())
+                ):
+                    break
+        return best
+
+    def run(self, points: int = 5, starts: int = 3, iterations: int = 30) -> list[TuneResult]:
+        """Grid search, then refines the best starts grid points. Returns
+        every evaluated candidate, best first."""
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(self.processes, mp_context=context) as pool:
+            ranked = self.grid(pool, points)
+            for start in ranked[:starts]:
+                self.refine(pool, start, iterations)
+        return sorted(self._seen.values(), key=lambda result: result.cost)
+
+    def apply(self, result: TuneResult) -> None:
+        """Sets the profile's searched gains to those of result, which also
+        saves them if the profile is tuned through a `GainStore`."""
+        for gain in self.search:
+            self.profile.set_gain(gain, result.gains[gain])
+
+
+def format_table(results: Sequence[TuneResult], top: int = 10) -> str:
+    """Formats the top results as a ranked table of gains and metrics,
+    with metrics averaged over the tests."""
+    if not results:
+        return "no results"
+    gain_names = list(results[0].gains)
+    metric_names = list(next(iter(results[0].metrics.values()), {}))
+    header = ["#", "cost"] + gain_names + metric_names
+    rows = []
+    for rank, result in enumerate(results[:top], 1):
+        metrics = [
+            np.mean([test[name] for test in result.metrics.values()]) for name in metric_names
+        ]
+        rows.append(
+            [str(rank), f"{result.cost:.4g}"]
+            + [f"{result.gains[name]:.4g}" for name in gain_names]
+            + [f"{value:.4g}" for value in metrics]
+        )
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in [header] + rows]
+    return "\n".join(lines)
+
+
+def _pairs(values: Sequence[str]) -> dict[str, str]:
+    return dict(value.split("=", 1) for value in values)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from lemonlib.smart import SmartProfile
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--motor", default="krakenX60", help="DCMotor constructor name")
+    parser.add_argument("--motors", type=int, default=1)
+    parser.add_argument("--moi", type=float, default=0.01, help="kg m^2 at the mechanism")
+    parser.add_argument("--gearing", type=float, default=1.0)
+    parser.add_argument("--mode", choices=MODES, default="velocity")
+    parser.add_argument("--controller", default=None, help="SmartProfile factory, eg. pid")
+    parser.add_argument("--gain", nargs="*", default=[], help="fixed gains, eg. kS=0.1")
+    parser.add_argument("--search", nargs="+", required=True, help="searched gains, eg. kP=0:10")
+    parser.add_argument("--points", type=int, default=5, help="grid points per gain")
+    parser.add_argument("--starts", type=int, default=3, help="grid points to refine")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    search = {
+        name: tuple(float(bound) for bound in bounds.split(":"))
+        for name, bounds in _pairs(args.search).items()
+    }
+    gains = {"kP": 0.0, "kI": 0.0, "kD": 0.0, "kS": 0.0, "kV": 0.0}
+    gains.update({name: float(value) for name, value in _pairs(args.gain).items()})
+    gains.update({name: low for name, (low, _) in search.items()})
+    plant = MotorPlant(args.motor, args.moi, args.gearing, args.mode, args.motors)
+    controller = args.controller or ("flywheel" if args.mode == "velocity" else "pid")
+
+    tuner = GainTuner(
+        SmartProfile("tuner", gains, False), plant, search, controller, processes=args.processes
+    )
+    results = tuner.run(args.points, args.starts)
+    print(format_table(results, args.top))
+    print(f"{tuner.evaluations} candidates evaluated")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
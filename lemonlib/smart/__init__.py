@@ -1,6 +1,20 @@
 from .controller import SmartController
+from .bank import ControllerBank
+from .store import GainStore
 from .preference import SmartPreference
 from .profile import SmartProfile
 from .nettables import SmartNT
+from .telemetry import TelemetryScheduler
+from .changes import ChangeNotifier, dispatch_changes
 
-__all__ = ["SmartController", "SmartPreference", "SmartProfile", "SmartNT"]
+__all__ = [
+    "SmartController",
+    "SmartPreference",
+    "SmartProfile",
+    "SmartNT",
+    "ChangeNotifier",
+    "dispatch_changes",
+    "TelemetryScheduler",
+    "ControllerBank",
+    "GainStore",
+]
@@ -0,0 +1,70 @@
+import threading
+import traceback
+from typing import Callable, Iterable, Optional
+
+from wpilib import reportError
+
+__all__ = ["ChangeNotifier", "dispatch_changes"]
+
+# notifier -> {key: latest value} for changes not yet dispatched
+_pending: dict["ChangeNotifier", dict] = {}
+_lock = threading.Lock()
+
+
+class ChangeNotifier:
+    """Per-key change callbacks for one source of tunable values, such as a
+    `SmartProfile`.
+
+    Changes can be reported from any thread (eg. an NT listener) with
+    `mark()`, but callbacks only run from `dispatch_changes()`, which
+    `LemonRobot` calls once per loop after the components have executed.
+    Several changes to a key within one loop are delivered once, with the
+    latest value, and each callback runs at most once per loop.
+    """
+
+    def __init__(self):
+        self._subscribers: list[tuple[Optional[frozenset], Callable[[dict], None]]] = []
+
+    def subscribe(
+        self, callback: Callable[[dict], None], keys: Optional[Iterable[str]] = None
+    ) -> Callable[[dict], None]:
+        """Calls callback with a {key: value} dict of the changed keys it
+        is interested in (all keys if keys is None). Returns callback so it
+        can be passed to `unsubscribe()`."""
+        self._subscribers.append((None if keys is None else frozenset(keys), callback))
+        return callback
+
+    def unsubscribe(self, callback: Callable[[dict], None]) -> None:
+        self._subscribers = [s for s in self._subscribers if s[1] is not callback]
+
+    def mark(self, key: str, value) -> None:
+        """Records that key changed to value. Thread-safe."""
+        with _lock:
+            _pending.setdefault(self, {})[key] = value
+
+    def _notify(self, changed: dict) -> None:
+        for keys, callback in self._subscribers:
+            if keys is None:
+                relevant = changed
+            else:
+                relevant = {key: changed[key] for key in keys if key in changed}
+            if relevant:
+                try:
+                    callback(relevant)
+                except Exception:
+                    reportError(
+                        f"Error in change callback {callback!r}:\n{traceback.format_exc()}",
+                        False,
+                    )
+
+
+def dispatch_changes() -> None:
+    """Runs the callbacks for everything changed since the last call."""
+    global _pending
+    if not _pending:
+        return
+    with _lock:
+        pending = _pending
+        _pending = {}
+    for notifier, changed in pending.items():
+        notifier._notify(changed)
@@ -1,8 +1,16 @@
-from wpilib import SmartDashboard
-from wpiutil import Sendable, SendableBuilder
-from wpilib import SmartDashboard
+import threading
+import time
+
+import numpy as np
+from ntcore import NetworkTableInstance
+from wpilib import SmartDashboard, Timer
 from wpiutil import Sendable, SendableBuilder
 
+from .telemetry import TelemetryScheduler
+
+# columns of SmartController.history(), in order
+HISTORY_FIELDS = ("timestamp", "reference", "measurement", "error", "output", "compute_time")
+
 
 class SmartController(Sendable):
     """Used as a general wrapper for a variety of controllers that may
@@ -18,9 +26,27 @@ class SmartController(Sendable):
         self.error = 0
         self.output = 0
         self.tolerance = 0.0
+        self.key = key
+        self.compute_time = 0.0
+        # see enable_history(); _history is None while it is off
+        self._history = None
+        self._written = 0
+        self._published = 0
+        self._history_lock = threading.Lock()
+        self._history_task = None
+        self._fields_publisher = None
+        self._history_publisher = None
+        self._profile = None
         if feedback_enabled:
             SmartDashboard.putData(f"SmartController/{key}_controller", self)
 
+    def bind_gains(self, profile, update) -> None:
+        """Calls update(profile.gains) before the next `calculate()` whenever
+        profile's gains have been edited. Used by `SmartProfile` factories."""
+        self._profile = profile
+        self._update_gains = update
+        self._gains_version = profile.version
+
     def setTolerance(self, error_tolerance: float):
         """Sets the error tolerance for the controller."""
         self.tolerance = error_tolerance
@@ -54,12 +80,99 @@ class SmartController(Sendable):
         builder.addDoubleProperty("Error", lambda: self.error, lambda _: None)
         builder.addDoubleProperty("Output", lambda: self.output, lambda _: None)
 
+    def enable_history(self, capacity: int = 500, publish_period: float = 0.1):
+        """Records reference, measurement, error, output and the compute
+        time of every `calculate()` call in a ring buffer of capacity rows.
+        `compute_time` is only measured while history is enabled.
+
+        Every publish_period seconds the rows recorded since the last
+        publish are sent as one flattened double array (row-major, columns
+        in `HISTORY_FIELDS` order) to
+        ``/SmartController/<key>_controller/history``, so the full loop-rate
+        waveform reaches the dashboard in a few large updates.
+
+        Enabling history again starts a new, empty one.
+        """
+        self.disable_history()
+        if self._history_publisher is None:
+            table = NetworkTableInstance.getDefault().getTable(
+                f"SmartController/{self.key}_controller"
+            )
+            self._fields_publisher = table.getStringArrayTopic("history_fields").publish()
+            self._fields_publisher.set(list(HISTORY_FIELDS))
+            self._history_publisher = table.getDoubleArrayTopic("history").publish()
+        with self._history_lock:
+            self._history = np.zeros((capacity, len(HISTORY_FIELDS)))
+            self._written = 0
+            self._published = 0
+        self._history_task = TelemetryScheduler.get().add(
+            self._publish_history, publish_period
+        )
+
+    def disable_history(self):
+        if self._history_task is not None:
+            TelemetryScheduler.get().remove(self._history_task)
+            self._history_task = None
+        self._history = None
+
+    def history(self) -> np.ndarray:
+        """Returns the recorded rows, oldest first, as an (N, 6) array
+        (empty while history is disabled)."""
+        with self._history_lock:
+            if self._history is None:
+                return np.empty((0, len(HISTORY_FIELDS)))
+            return self._rows(max(0, self._written - len(self._history)))
+
+    def _rows(self, start: int) -> np.ndarray:
+        indices = np.arange(start, self._written) % len(self._history)
+        return self._history[indices]
+
+    def _publish_history(self) -> bool:
+        with self._history_lock:
+            if self._history is None:
+                return False
+            start = max(self._published, self._written - len(self._history))
+            if start == self._written:
+                return False
+            rows = self._rows(start)
+            self._published = self._written
+        self._history_publisher.set(rows.ravel().tolist())
+        return True
+
+    def timing_stats(self) -> tuple[float, float]:
+        """Returns (mean, max) compute time in seconds over the history."""
+        compute = self.history()[:, 5]
+        if len(compute) == 0:
+            return (0.0, 0.0)
+        return (float(compute.mean()), float(compute.max()))
+
     def calculate(self, measurement: float, reference: float):
+        profile = self._profile
+        if profile is not None and profile.version != self._gains_version:
+            self._gains_version = profile.version
+            self._update_gains(profile.gains)
         self.reference = reference
         self.measurement = measurement
         self.error = reference - measurement
+        history = self._history
         if abs(self.error) < self.tolerance:
             self.output = 0.0
+            self.compute_time = 0.0
+        elif history is None:
+            self.output = self._calculate_method(measurement, reference)
         else:
+            # only timed while recording, so plain controllers skip the clock
+            start = time.perf_counter()
             self.output = self._calculate_method(measurement, reference)
+            self.compute_time = time.perf_counter() - start
+        if history is not None:
+            with self._history_lock:
+                row = history[self._written % len(history)]
+                row[0] = Timer.getFPGATimestamp()
+                row[1] = reference
+                row[2] = measurement
+                row[3] = self.error
+                row[4] = self.output
+                row[5] = self.compute_time
+                self._written += 1
         return self.output
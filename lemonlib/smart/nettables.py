@@ -1,139 +1,365 @@
-import threading
+import atexit
 import time
 from typing import Any, Callable, Dict, Optional
-from ntcore import NetworkTableInstance, NetworkTableEntry
+from ntcore import Event, EventFlags, NetworkTableInstance, Publisher, Subscriber
+
+from .telemetry import TelemetryScheduler
+
+# value type -> (NetworkTable topic getter name, NT type name)
+_TOPIC_TYPES = {
+    float: ("getDoubleTopic", "double"),
+    bool: ("getBooleanTopic", "boolean"),
+    str: ("getStringTopic", "string"),
+}
+_CASTS = {"double": float, "boolean": bool, "string": str}
+
+# listeners with Python callbacks must be gone before the interpreter shuts
+# down, otherwise the NT listener thread aborts the process
+_listeners: Dict[int, NetworkTableInstance] = {}
+
+
+def add_listener(
+    inst: NetworkTableInstance, topic, mask: EventFlags, callback: Callable[[Event], None]
+) -> int:
+    """Add an NT listener that is removed again before the interpreter exits."""
+    listener = inst.addListener(topic, mask, callback)
+    _listeners[listener] = inst
+    return listener
+
+
+def remove_listener(inst: NetworkTableInstance, listener: int) -> None:
+    _listeners.pop(listener, None)
+    inst.removeListener(listener)
+
+
+def _remove_listeners() -> None:
+    for listener, inst in _listeners.items():
+        inst.removeListener(listener)
+    _listeners.clear()
+
+
+atexit.register(_remove_listeners)
+
+
+def _value_type(value: Any) -> type:
+    # bool first: bool is a subclass of int
+    if isinstance(value, bool):
+        return bool
+    if isinstance(value, (float, int)):
+        return float
+    if isinstance(value, str):
+        return str
+    raise TypeError(f"Unsupported value type: {type(value)}")
+
+
+class _Property:
+    __slots__ = (
+        "key",
+        "getter",
+        "setter",
+        "cast",
+        "publisher",
+        "period",
+        "last",
+        "listener",
+        "task",
+        "verbose",
+    )
+
+    def __init__(self, key, getter, setter, cast, publisher, period, verbose):
+        self.key = key
+        self.getter = getter
+        self.setter = setter
+        self.cast = cast
+        self.publisher = publisher
+        # None uses the table's poll_period
+        self.period = period
+        self.verbose = verbose
+        # last value published, so unchanged values are not sent again
+        self.last = None
+        self.listener = None
+        self.task = None
+
+    def publish(self) -> bool:
+        """Publishes the getter value if it changed. Returns True if sent."""
+        try:
+            value = self.cast(self.getter())
+        except Exception as e:
+            if self.verbose:
+                print(f"[SmartNT] Getter error for '{self.key}': {e}")
+            return False
+        if value == self.last:
+            return False
+        self.last = value
+        self.publisher.set(value)
+        return True
+
+
+class StructChannel:
+    """Publishes one struct value through a single long-lived publisher,
+    at most once per `period` seconds (0 publishes every call)."""
+
+    def __init__(self, publisher, period: float = 0.0):
+        self.publisher = publisher
+        self.period = period
+        self._next = 0.0
+
+    def _due(self) -> bool:
+        if self.period <= 0:
+            return True
+        now = time.monotonic()
+        # a microsecond early still counts, so float error in the loop
+        # times doesn't push a publish to the next loop
+        if now + 1e-6 < self._next:
+            return False
+        if now - self._next < self.period:
+            # schedule from the previous deadline so the rate doesn't drift
+            self._next += self.period
+        else:
+            # first publish, or after a pause
+            self._next = now + self.period
+        return True
+
+    def publish(self, value) -> bool:
+        """Publishes value if due. Returns True if it was sent."""
+        if not self._due():
+            return False
+        self.publisher.set(value)
+        return True
+
+
+class StructArrayChannel(StructChannel):
+    """Publishes a struct array through a single long-lived publisher.
+
+    The channel owns a pre-sized `values` list that can be filled in place
+    each loop, so streaming module states allocates no new list:
+    ```
+    states = nt.struct_array_channel("module_states", SwerveModuleState, 4)
+    states.values[:] = drivetrain_state.module_states
+    states.publish()
+    ```
+    """
+
+    def __init__(self, publisher, size: int = 0, period: float = 0.0):
+        super().__init__(publisher, period)
+        self.values: list = [None] * size
+
+    def publish(self, values: Optional[list] = None) -> bool:
+        """Publishes values (copied into the backing list) or, if None, the
+        backing list as it is. Returns True if it was sent."""
+        if not self._due():
+            return False
+        if values is not None:
+            self.values[:] = values
+        self.publisher.set(self.values)
+        return True
 
 
 class SmartNT:
+    """Publishes and tunes values under one NetworkTables table.
+
+    Properties are backed by typed publishers. Once started, the shared
+    `TelemetryScheduler` calls each getter once per period (the property's
+    own, or `poll_period`) and publishes only when the value changed;
+    values written from the dashboard reach the setter through an NT value
+    listener instead of being polled.
+    """
+
     def __init__(
         self, root_table: str = "/", verbose: bool = False, poll_period: float = 0.02
     ):
         self.nt = NetworkTableInstance.getDefault()
         self.table = self.nt.getTable(root_table.strip("/"))
-        self._entries: Dict[str, NetworkTableEntry] = {}
-        self._properties: Dict[str, Dict[str, Callable]] = {}
+        self._publishers: Dict[tuple[str, type], Publisher] = {}
+        self._subscribers: Dict[tuple[str, type], Subscriber] = {}
+        self._properties: Dict[str, _Property] = {}
+        # key -> (channel, struct type)
+        self._channels: Dict[str, tuple["StructChannel", type]] = {}
         self.verbose = verbose
         self.poll_period = poll_period
         self._running = False
 
-    def _get_entry(self, key: str) -> NetworkTableEntry:
-        key = str(key)
-        if key not in self._entries:
-            path_parts = key.strip("/").split("/")
-            table = self.table
-            for part in path_parts[:-1]:
-                table = table.getSubTable(part)
-            entry = table.getEntry(path_parts[-1])
-            self._entries[key] = entry
+    def _topic(self, key: str, value_type: type):
+        key = str(key).strip("/")
+        return getattr(self.table, _TOPIC_TYPES[value_type][0])(key)
+
+    def _get_publisher(self, key: str, value_type: type) -> Publisher:
+        publisher = self._publishers.get((key, value_type))
+        if publisher is None:
+            publisher = self._topic(key, value_type).publish()
+            self._publishers[(key, value_type)] = publisher
             if self.verbose:
-                print(f"[SmartNT] Created entry: /{'/'.join(path_parts)}")
-        return self._entries[key]
+                print(f"[SmartNT] Created {value_type.__name__} publisher: {key}")
+        return publisher
+
+    def _get_subscriber(self, key: str, value_type: type, default: Any) -> Subscriber:
+        subscriber = self._subscribers.get((key, value_type))
+        if subscriber is None:
+            subscriber = self._topic(key, value_type).subscribe(default)
+            self._subscribers[(key, value_type)] = subscriber
+        return subscriber
+
+    def _channel(self, key: str, kind: type, type) -> Optional["StructChannel"]:
+        """Returns the cached channel for key, or None. A topic has one type,
+        so asking for another kind of channel or struct type raises."""
+        entry = self._channels.get(key)
+        if entry is None:
+            return None
+        channel, struct_type = entry
+        if channel.__class__ is not kind or struct_type is not type:
+            raise TypeError(
+                f"SmartNT key '{key}' is a {channel.__class__.__name__} of"
+                f" {struct_type.__name__}, not a {kind.__name__} of {type.__name__}"
+            )
+        return channel
+
+    def struct_channel(self, key: str, type, period: float = 0.0) -> "StructChannel":
+        """Returns the channel publishing a single struct (eg. `Pose2d`) to
+        key, creating its publisher on first use."""
+        channel = self._channel(key, StructChannel, type)
+        if channel is None:
+            channel = StructChannel(
+                self.table.getStructTopic(key.strip("/"), type).publish(), period
+            )
+            self._channels[key] = (channel, type)
+        return channel
+
+    def struct_array_channel(
+        self, key: str, type, size: int = 0, period: float = 0.0
+    ) -> "StructArrayChannel":
+        """Returns the channel publishing an array of structs (eg. four
+        `SwerveModuleState`s) to key, creating its publisher on first use."""
+        channel = self._channel(key, StructArrayChannel, type)
+        if channel is None:
+            channel = StructArrayChannel(
+                self.table.getStructArrayTopic(key.strip("/"), type).publish(),
+                size,
+                period,
+            )
+            self._channels[key] = (channel, type)
+        return channel
+
+    def set_struct(self, key: str, value, type):
+        self.struct_channel(key, type).publish(value)
 
     def set_struct_array(self, key: str, value: list, type):
-        publisher = self.nt.getStructArrayTopic(f"{key}", type)
-        publisher.publish(value)
+        self.struct_array_channel(key, type, len(value)).publish(value)
 
     def put(self, key: str, value: Any):
-        entry = self._get_entry(key)
-        if isinstance(value, (float, int)):
-            entry.setDouble(float(value))
-        elif isinstance(value, bool):
-            entry.setBoolean(value)
-        elif isinstance(value, str):
-            entry.setString(value)
-        else:
+        try:
+            value_type = _value_type(value)
+        except TypeError:
             raise TypeError(f"Unsupported value type for key '{key}': {type(value)}")
+        self._get_publisher(key, value_type).set(value_type(value))
         if self.verbose:
             print(f"[SmartNT] Set {key} = {value} (type: {type(value).__name__})")
 
     def get(self, key: str, default: Any = None) -> Any:
-        entry = self._get_entry(key)
-        if isinstance(default, (float, int)):
-            return entry.getDouble(default)
-        elif isinstance(default, bool):
-            return entry.getBoolean(default)
-        elif isinstance(default, str):
-            return entry.getString(default)
-        else:
+        try:
+            value_type = _value_type(default)
+        except TypeError:
             raise TypeError(
                 f"Unsupported default type for key '{key}': {type(default)}"
             )
+        default = value_type(default)
+        return self._get_subscriber(key, value_type, default).get(default)
+
+    def _add_property(
+        self,
+        key: str,
+        getter: Callable,
+        setter: Callable,
+        value_type: type,
+        period: Optional[float],
+    ):
+        cast = _CASTS[_TOPIC_TYPES[value_type][1]]
+        old = self._properties.pop(key, None)
+        if old is not None:
+            self._unschedule(old)
+            if old.listener is not None:
+                remove_listener(self.nt, old.listener)
+        prop = _Property(
+            key, getter, setter, cast, self._get_publisher(key, value_type), period, self.verbose
+        )
+        self._properties[key] = prop
+
+        def on_remote_value(event: Event, prop=prop, key=key):
+            value = event.data.value.value()
+            prop.last = value
+            try:
+                prop.setter(prop.cast(value))
+            except Exception as e:
+                if self.verbose:
+                    print(f"[SmartNT] Setter error for '{key}': {e}")
+
+        prop.listener = add_listener(
+            self.nt, self._topic(key, value_type), EventFlags.kValueRemote, on_remote_value
+        )
+        if self._running:
+            self._schedule(prop)
 
     def add_double_property(
-        self, key: str, getter: Callable[[], float], setter: Callable[[float], None]
+        self,
+        key: str,
+        getter: Callable[[], float],
+        setter: Callable[[float], None],
+        period: Optional[float] = None,
     ):
-        self._properties[key] = {"getter": getter, "setter": setter, "type": "double"}
-        self._get_entry(key)
+        """Publishes getter every period seconds (default: poll_period) while
+        started, and calls setter when the value is changed remotely."""
+        self._add_property(key, getter, setter, float, period)
 
     def add_boolean_property(
-        self, key: str, getter: Callable[[], bool], setter: Callable[[bool], None]
+        self,
+        key: str,
+        getter: Callable[[], bool],
+        setter: Callable[[bool], None],
+        period: Optional[float] = None,
     ):
-        self._properties[key] = {"getter": getter, "setter": setter, "type": "boolean"}
-        self._get_entry(key)
+        self._add_property(key, getter, setter, bool, period)
 
     def add_string_property(
-        self, key: str, getter: Callable[[], str], setter: Callable[[str], None]
+        self,
+        key: str,
+        getter: Callable[[], str],
+        setter: Callable[[str], None],
+        period: Optional[float] = None,
     ):
-        self._properties[key] = {"getter": getter, "setter": setter, "type": "string"}
-        self._get_entry(key)
+        self._add_property(key, getter, setter, str, period)
+
+    def _schedule(self, prop: _Property):
+        if prop.task is None:
+            period = self.poll_period if prop.period is None else prop.period
+            prop.task = TelemetryScheduler.get().add(prop.publish, period)
+
+    def _unschedule(self, prop: _Property):
+        if prop.task is not None:
+            TelemetryScheduler.get().remove(prop.task)
+            prop.task = None
 
     def start(self):
+        """Starts publishing properties on the shared `TelemetryScheduler`."""
         if not self._running:
             self._running = True
-            self._thread = threading.Thread(target=self._update_loop, daemon=True)
-            self._thread.start()
+            for prop in self._properties.values():
+                self._schedule(prop)
             if self.verbose:
-                print("[SmartNT] Update thread started")
+                print("[SmartNT] Registered with telemetry scheduler")
 
     def stop(self):
         self._running = False
-        if self._thread:
-            self._thread.join()
-            if self.verbose:
-                print("[SmartNT] Update thread stopped")
-
-    def _update_loop(self):
-
-        while self._running:
-            for key, funcs in self._properties.items():
-
-                entry = self._get_entry(key)
-                getter = funcs["getter"]
-                setter = funcs["setter"]
-                typ = funcs["type"]
-
-                try:
-                    # Push current getter value to NetworkTables
-                    val = getter()
-                    if typ == "double":
-                        entry.setDouble(float(val))
-                    elif typ == "boolean":
-                        entry.setBoolean(bool(val))
-                    elif typ == "string":
-                        entry.setString(str(val))
-                except Exception as e:
-                    if self.verbose:
-                        print(f"[SmartNT] Getter error for '{key}': {e}")
-
-                try:
-                    # Get the value from NT and update local property if different
-                    if typ == "double":
-                        nt_val = entry.getDouble(getter())
-                        if abs(nt_val - getter()) > 1e-6:
-                            setter(nt_val)
-                    elif typ == "boolean":
-                        nt_val = entry.getBoolean(getter())
-                        if nt_val != getter():
-                            setter(nt_val)
-                    elif typ == "string":
-                        nt_val = entry.getString(getter())
-                        if nt_val != getter():
-                            setter(nt_val)
-                except Exception as e:
-                    if self.verbose:
-                        print(f"[SmartNT] Setter error for '{key}': {e}")
-
-            time.sleep(self.poll_period)
+        for prop in self._properties.values():
+            self._unschedule(prop)
+        if self.verbose:
+            print("[SmartNT] Unregistered from telemetry scheduler")
+
+    def publish_changes(self) -> bool:
+        """Publishes every property whose getter value changed since it was
+        last published. Returns True if anything was sent."""
+        published = False
+        for prop in list(self._properties.values()):
+            published |= prop.publish()
+        return published
 
     # Optional legacy-style helpers
     def put_number(self, key: str, value: float):
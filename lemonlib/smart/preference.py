@@ -1,5 +1,11 @@
+from typing import Any, Callable
+
+from ntcore import Event, EventFlags, NetworkTableInstance
 from wpilib import Preferences
 
+from .changes import ChangeNotifier
+from .nettables import add_listener
+
 
 class SmartPreference(object):
     """Wrapper for wpilib Preferences that improves it in a few ways:
@@ -10,7 +16,9 @@ class SmartPreference(object):
     same throughout the entirety of the code
     3. Including `low_bandwidth = True` as a class attribute will stop
     the `SmartPreference` from referencing NT and simply use defaults
-    3. Initializing, getting, and setting Preferences is made much
+    4. Values are cached and kept up to date by a NetworkTables listener,
+    so reading one costs about as much as reading a plain attribute
+    5. Initializing, getting, and setting Preferences is made much
     easier and enables this class to be a drop-in replacement for normal
     values. For example:
     ```
@@ -32,6 +40,20 @@ class SmartPreference(object):
     """
 
     _changed_flag = False
+    _changes = ChangeNotifier()
+
+    _init = {
+        int: Preferences.initDouble,
+        float: Preferences.initDouble,
+        str: Preferences.initString,
+        bool: Preferences.initBoolean,
+    }
+    _set = {
+        int: Preferences.setDouble,
+        float: Preferences.setDouble,
+        str: Preferences.setString,
+        bool: Preferences.setBoolean,
+    }
 
     def __init__(self, value) -> None:
         self._value = value
@@ -40,6 +62,7 @@ class SmartPreference(object):
             raise TypeError(
                 f"SmartPreference must be int, float, str, or bool (not {self._type})"
             )
+        self._listener = None
 
     def __set_name__(self, obj, name):
         try:
@@ -49,26 +72,29 @@ class SmartPreference(object):
         self._key = name
         if self._low_bandwidth:
             return
-        if self._type is int or self._type is float:
-            Preferences.initDouble(self._key, self._value)
-        elif self._type is str:
-            Preferences.initString(self._key, self._value)
-        elif self._type is bool:
-            Preferences.initBoolean(self._key, self._value)
+        self._init[self._type](self._key, self._value)
+        # keep a local copy up to date instead of asking Preferences on
+        # every read; the listener runs on the NT thread
+        inst = NetworkTableInstance.getDefault()
+        self._listener = add_listener(
+            inst,
+            inst.getTopic(f"/Preferences/{self._key}"),
+            EventFlags.kValueAll | EventFlags.kImmediate,
+            self._on_value,
+        )
 
-    def __get__(self, obj, objtype=None):
-        if self._low_bandwidth:
-            return self._value
-        new = None
-        if self._type is int or self._type is float:
-            new = Preferences.getDouble(self._key, self._value)
-        elif self._type is str:
-            new = Preferences.getString(self._key, self._value)
-        elif self._type is bool:
-            new = Preferences.getBoolean(self._key, self._value)
+    def _on_value(self, event: Event) -> None:
+        new = event.data.value.value()
+        # NT stores int preferences as doubles, like Preferences.getDouble()
+        expected = (int, float) if self._type in (int, float) else (self._type,)
+        if type(new) not in expected:
+            return
         if new != self._value:
-            SmartPreference._changed_flag = True
             self._value = new
+            SmartPreference._changed_flag = True
+            SmartPreference._changes.mark(self._key, new)
+
+    def __get__(self, obj, objtype=None):
         return self._value
 
     def __set__(self, obj, value):
@@ -77,15 +103,21 @@ class SmartPreference(object):
                 f"Set value type ({type(value)} does not match original ({self._type}))"
             )
         self._value = value
-        self._type = type(value)
         if self._low_bandwidth:
             return
-        if self._type is int or self._type is float:
-            self._value = Preferences.setDouble(self._key, self._value)
-        elif self._type is str:
-            self._value = Preferences.setString(self._key, self._value)
-        elif self._type is bool:
-            self._value = Preferences.setBoolean(self._key, self._value)
+        self._set[self._type](self._key, value)
+
+    def on_change(key: str, callback: Callable[[Any], None]) -> Callable[[dict], None]:
+        """Calls callback with the new value whenever the preference named
+        key is changed from NetworkTables, at most once per robot loop.
+        Only works if called statically. Returns a handle for
+        `SmartPreference.remove_on_change()`."""
+        return SmartPreference._changes.subscribe(
+            lambda changed: callback(changed[key]), (key,)
+        )
+
+    def remove_on_change(handle: Callable[[dict], None]) -> None:
+        SmartPreference._changes.unsubscribe(handle)
 
     def has_changed() -> bool:
         """Returns if any SmartPreference has changed since checked.
@@ -1,4 +1,5 @@
-from wpilib import Preferences, SmartDashboard
+from typing import Callable, Iterable
+
 from wpimath.trajectory import TrapezoidProfile, TrapezoidProfileRadians
 from wpiutil import Sendable, SendableBuilder
 from wpimath.controller import (
@@ -14,6 +15,9 @@ from wpimath.controller import (
 from wpimath.units import meters, seconds
 from wpimath.system import LinearSystem_2_2_2
 from .controller import SmartController
+from .bank import ControllerBank
+from .changes import ChangeNotifier
+from .store import GainStore
 from phoenix6.configs import Slot0Configs
 from phoenix6 import signals
 
@@ -26,12 +30,20 @@ class SmartProfile(Sendable):
     NetworkTables so that the gains may be dynamically updated without
     needing to redeploy code. This class has several helper methods
     which can be used to create `SmartController` objects already supplied
-    with the necessary gains. Please note that gains will NOT be
-    dynamically updated in `SmartController` objects: therefore it is
-    recommended to create a new `SmartController` object on enable.
+    with the necessary gains. `SmartController` objects created by these
+    methods pick up gain edits on their next `calculate()`, without being
+    rebuilt or reset. Plain wpilib controllers (eg. from
+    `create_wpi_pid_controller`) are not updated: use `on_change()` to
+    rebuild only what depends on the gains that changed.
     """
 
-    def __init__(self, profile_key: str, gains: dict[str, float], tuning_enabled: bool):
+    def __init__(
+        self,
+        profile_key: str,
+        gains: dict[str, float],
+        tuning_enabled: bool,
+        store: GainStore = None,
+    ):
         """Creates a SmartProfile.
         Recommended gain keys (for use with `SmartController`):
         kP: Proportional Gain
@@ -50,21 +62,40 @@ class SmartProfile(Sendable):
         :param str profile_key: Prefix for associated NetworkTables keys
         :param dict[str, float] gains: Dictionary containing gain_key: value pairs
         :param bool tuning_enabled: Specify whether or not to send and retrieve
-            data from NetworkTables. If true, values from NetworkTables
-            are given precedence over values set in code.
+            data from NetworkTables. If true, values saved in the gain
+            store are given precedence over values set in code, and edits
+            are saved back to it.
+        :param GainStore store: Where tuned gains are kept (default:
+            `GainStore.get()`)
         """
         Sendable.__init__(self)
         self.profile_key = profile_key
-        self.nt = SmartNT(f"SmartProfile/{profile_key}", True)
+        # same keys the profile had as a SmartDashboard Sendable
+        self.nt = SmartNT(f"SmartDashboard/SmartProfile/{profile_key}")
         self.tuning_enabled = tuning_enabled
         self.gains = gains
+        self.changes = ChangeNotifier()
+        # bumped on every gain edit; bound controllers compare it each calculate
+        self.version = 0
+        self.store = None
         if tuning_enabled:
-            for gain in gains:
-                Preferences.initDouble(f"{profile_key}_{gain}", gains[gain])
-                self.gains[gain] = Preferences.getDouble(
-                    f"{profile_key}_{gain}", gains[gain]
-                )
-            SmartDashboard.putData(f"SmartProfile/{profile_key}", self)
+            self.store = GainStore.get() if store is None else store
+            self.gains.update(self.store.register(self))
+            self._sync_gains()
+
+    def _sync_gains(self):
+        """Publishes the gains from the `TelemetryScheduler` thread when they
+        change, and applies dashboard edits from the NT listener thread, so
+        neither startup nor the robot loop waits on NetworkTables."""
+        self.nt.put(".type", "SmartController")
+        for gain_key in self.gains:
+            self.nt.add_double_property(
+                gain_key,
+                # optional arguments used to hackily avoid late binding
+                (lambda key=gain_key: self.gains[key]),
+                (lambda value, key=gain_key: self.set_gain(key, value)),
+            )
+        self.nt.start()
 
     def initSendable(self, builder: SendableBuilder):
         builder.setSmartDashboardType("SmartController")
@@ -73,22 +104,51 @@ class SmartProfile(Sendable):
                 gain_key,
                 # optional arguments used to hackily avoid late binding
                 (lambda key=gain_key: self.gains[key]),
-                (lambda value, key=gain_key: self._set_gain(key, value)),
+                (lambda value, key=gain_key: self.set_gain(key, value)),
             )
 
-    def _set_gain(self, key: str, value: float):
+    def set_gain(self, key: str, value: float):
+        """Changes a gain as if it was edited on the dashboard: bound
+        controllers and `on_change()` callbacks pick it up, and a tuned
+        profile saves it to its `GainStore`."""
+        if self.gains.get(key) != value:
+            self.version += 1
+            self.changes.mark(key, value)
         self.gains[key] = value
-        if self.tuning_enabled:
-            Preferences.setDouble(f"{self.profile_key}_{key}", value)
+        if self.store is not None:
+            self.store.update(self.profile_key, key, value)
+
+    def on_change(
+        self, callback: Callable[[dict[str, float]], None], gains: Iterable[str] = None
+    ) -> Callable[[dict[str, float]], None]:
+        """Calls callback with a {gain: value} dict of the changed gains,
+        at most once per robot loop (see `ChangeNotifier`).
+
+        :param gains: Only call back when one of these gains changes
+            (default: any gain)
+        :returns: callback, for use with `remove_on_change()`
+        """
+        return self.changes.subscribe(callback, gains)
+
+    def remove_on_change(self, callback: Callable[[dict[str, float]], None]) -> None:
+        self.changes.unsubscribe(callback)
+
+    def _bind(self, controller: SmartController, update) -> SmartController:
+        """Keeps controller tied to this profile: after a gain edit, update
+        is called with the new gains before the controller's next calculate,
+        so the PID and feedforward objects are changed in place instead of
+        being rebuilt (no allocation, integrators and profiles keep state)."""
+        controller.bind_gains(self, update)
+        return controller
 
     def _requires(requirements: set[str]):
         def inner(func):
-            def wrapper(self, key, feedback_enabled=None):
+            def wrapper(self, *args, **kwargs):
                 missing_reqs = requirements - set(self.gains.keys())
                 assert (
                     len(missing_reqs) == 0
                 ), f"Requires gains: {', '.join(missing_reqs)}"
-                return func(self, key, feedback_enabled)
+                return func(self, *args, **kwargs)
 
             return wrapper
 
@@ -106,10 +166,13 @@ class SmartProfile(Sendable):
             controller.enableContinuousInput(
                 self.gains["kMinInput"], self.gains["kMaxInput"]
             )
-        return SmartController(
-            key,
-            (lambda y, r: controller.calculate(y, r)),
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        return self._bind(
+            SmartController(
+                key,
+                (lambda y, r: controller.calculate(y, r)),
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            lambda gains: _update_pid(controller, gains),
         )
 
     def create_wpi_pid_controller(self) -> PIDController:
@@ -185,10 +248,13 @@ class SmartProfile(Sendable):
             controller.enableContinuousInput(
                 self.gains["kMinInput"], self.gains["kMaxInput"]
             )
-        return SmartController(
-            key,
-            (lambda y, r: controller.calculate(y, r)),
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        return self._bind(
+            SmartController(
+                key,
+                (lambda y, r: controller.calculate(y, r)),
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            lambda gains: _update_profiled_pid(controller, gains),
         )
 
     def create_wpi_profiled_pid_controller_radians(
@@ -235,10 +301,13 @@ class SmartProfile(Sendable):
             self.gains["kV"],
             self.gains["kA"] if "kA" in self.gains else 0,
         )
-        return SmartController(
-            key,
-            (lambda y, r: controller.calculate(r)),
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        return self._bind(
+            SmartController(
+                key,
+                (lambda y, r: controller.calculate(r)),
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            lambda gains: _update_feedforward(controller, gains),
         )
 
     @_requires({"kP", "kI", "kD", "kS", "kV"})
@@ -256,10 +325,17 @@ class SmartProfile(Sendable):
             self.gains["kV"],
             self.gains["kA"] if "kA" in self.gains else 0,
         )
-        return SmartController(
-            key,
-            (lambda y, r: pid.calculate(y, r) + feedforward.calculate(r)),
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        def update(gains):
+            _update_pid(pid, gains)
+            _update_feedforward(feedforward, gains)
+
+        return self._bind(
+            SmartController(
+                key,
+                (lambda y, r: pid.calculate(y, r) + feedforward.calculate(r)),
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            update,
         )
 
     @_requires({"kP", "kI", "kD", "kS", "kV", "kMaxV", "kMaxA"})
@@ -290,12 +366,35 @@ class SmartProfile(Sendable):
             feedforward_output = feedforward.calculate(setpoint.velocity)
             return pid_output + feedforward_output
 
-        return SmartController(
-            key,
-            calculate,
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        def update(gains):
+            _update_profiled_pid(pid, gains)
+            _update_feedforward(feedforward, gains)
+
+        return self._bind(
+            SmartController(
+                key,
+                calculate,
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            update,
         )
 
+    @_requires({"kP", "kI", "kD", "kS", "kV"})
+    def create_flywheel_bank(self, size: int, period: float = 0.02) -> ControllerBank:
+        """Creates size flywheel controllers evaluated together, each
+        equivalent to one from `create_flywheel_controller`.
+        Requires kP, kI, kD, kS, kV, [kMinInput, kMaxInput optional]
+        """
+        return ControllerBank(self, size, False, period)
+
+    @_requires({"kP", "kI", "kD", "kS", "kV", "kMaxV", "kMaxA"})
+    def create_turret_bank(self, size: int, period: float = 0.02) -> ControllerBank:
+        """Creates size profiled controllers evaluated together, each
+        equivalent to one from `create_turret_controller`.
+        Requires kP, kI, kD, kS, kV, kMaxV, kMaxA, [kMinInput, kMaxInput optional]
+        """
+        return ControllerBank(self, size, True, period)
+
     @_requires({"kP", "kI", "kD", "kS", "kG", "kV", "kMaxV", "kMaxA"})
     def create_elevator_controller(
         self, key: str, feedback_enabled: bool = None
@@ -323,10 +422,17 @@ class SmartProfile(Sendable):
             feedforward_output = feedforward.calculate(setpoint.velocity)
             return pid_output + feedforward_output
 
-        return SmartController(
-            key,
-            calculate,
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        def update(gains):
+            _update_profiled_pid(pid, gains)
+            _update_feedforward(feedforward, gains)
+
+        return self._bind(
+            SmartController(
+                key,
+                calculate,
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            update,
         )
 
     @_requires({"kP", "kI", "kD", "kS", "kG", "kV", "kMaxV", "kMaxA"})
@@ -361,8 +467,36 @@ class SmartProfile(Sendable):
             )
             return pid_output + feedforward_output
 
-        return SmartController(
-            key,
-            calculate,
-            self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+        def update(gains):
+            _update_profiled_pid(pid, gains)
+            _update_feedforward(feedforward, gains)
+
+        return self._bind(
+            SmartController(
+                key,
+                calculate,
+                self.tuning_enabled if feedback_enabled is None else feedback_enabled,
+            ),
+            update,
         )
+
+
+def _update_pid(pid, gains: dict[str, float]) -> None:
+    pid.setPID(gains["kP"], gains["kI"], gains["kD"])
+    if "kMinInput" in gains and "kMaxInput" in gains:
+        pid.enableContinuousInput(gains["kMinInput"], gains["kMaxInput"])
+
+
+def _update_profiled_pid(pid, gains: dict[str, float]) -> None:
+    _update_pid(pid, gains)
+    constraints = pid.getConstraints()
+    if (constraints.maxVelocity, constraints.maxAcceleration) != (gains["kMaxV"], gains["kMaxA"]):
+        pid.setConstraints(TrapezoidProfile.Constraints(gains["kMaxV"], gains["kMaxA"]))
+
+
+def _update_feedforward(feedforward, gains: dict[str, float]) -> None:
+    feedforward.setKs(gains["kS"])
+    feedforward.setKv(gains["kV"])
+    feedforward.setKa(gains.get("kA", 0))
+    if "kG" in gains and hasattr(feedforward, "setKg"):
+        feedforward.setKg(gains["kG"])
@@ -0,0 +1,181 @@
+import atexit
+import json
+import os
+import threading
+import traceback
+from pathlib import Path
+from typing import Optional
+
+from wpilib import Preferences, getOperatingDirectory, reportError
+
+__all__ = ["GainStore"]
+
+
+class GainStore:
+    """Keeps the gains of every `SmartProfile` in one JSON file, so tuned
+    gains survive a reboot without a `Preferences` round trip per gain.
+
+    The file is read once, when the store is created, and holds named gain
+    sets (eg. "default", "practice_field"), each mapping a profile key to
+    its gains:
+    ```
+    {"default":{"steer":{"kP":3.0,"kS":0.14},"drive":{...}}}
+    ```
+    Edits are written back from the store's own thread at most once per
+    `flush_period`, to a temporary file that then replaces the old one, so
+    a reboot mid-write never leaves a half-written file.
+
+    The file replaces the ``<profile>_<gain>`` `Preferences` keys profiles
+    used before: a value found there is copied into the file the first
+    time a gain is stored, and the keys are neither read nor written after
+    that. Gains are tuned through the ``SmartProfile/<profile>`` entries
+    on the SmartDashboard instead, which profiles keep in sync from the
+    `TelemetryScheduler` thread.
+
+    Profiles use the shared store from `GainStore.get()` when created with
+    ``tuning_enabled=True``.
+    """
+
+    _instance: Optional["GainStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self, path: Optional[Path] = None, gain_set: str = "default", flush_period: float = 0.5
+    ):
+        """
+        :param path: Gain file, defaults to gains.json in the operating
+            directory: outside deploy on the robot, so deploys don't erase
+            it, and the (git-ignored) project directory in simulation, so
+            gains tuned in one sim session are there in the next
+        :param gain_set: Name of the gain set profiles read and edit
+        :param flush_period: Seconds between writes of pending edits
+        """
+        if path is None:
+            path = Path(getOperatingDirectory()) / "gains.json"
+        self.path = Path(path)
+        self.gain_set = gain_set
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._sets: dict[str, dict[str, dict[str, float]]] = self._read()
+        self._profiles: dict[str, object] = {}
+        self._dirty = False
+        # disk writes can take a while on the roboRIO's flash, so they get
+        # their own thread instead of holding up telemetry
+        self.flush_period = flush_period
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="GainStore", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def get(cls) -> "GainStore":
+        """Returns the process-wide store, reading the gain file on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            reportError(f"Ignoring unreadable gain file {self.path}", False)
+            return {}
+        if not isinstance(data, dict):
+            reportError(f"Ignoring malformed gain file {self.path}", False)
+            return {}
+        return {
+            name: {
+                key: {gain: float(value) for gain, value in gains.items()}
+                for key, gains in profiles.items()
+            }
+            for name, profiles in data.items()
+        }
+
+    @property
+    def gain_sets(self) -> list[str]:
+        with self._lock:
+            return sorted(self._sets)
+
+    def register(self, profile) -> dict[str, float]:
+        """Returns profile's gains with the stored values of the current
+        gain set taking precedence over the ones given in code. Gains not
+        stored yet are added, taking a value tuned through `Preferences`
+        before the store existed over the code value."""
+        key = profile.profile_key
+        with self._lock:
+            self._profiles[key] = profile
+            stored = self._sets.setdefault(self.gain_set, {}).setdefault(key, {})
+            for gain, value in profile.gains.items():
+                if gain not in stored:
+                    # only on the first boot with this gain, so startup
+                    # doesn't normally touch Preferences
+                    if Preferences.containsKey(f"{key}_{gain}"):
+                        value = Preferences.getDouble(f"{key}_{gain}", value)
+                    stored[gain] = value
+                    self._dirty = True
+            return {gain: stored[gain] for gain in profile.gains}
+
+    def update(self, profile_key: str, gain: str, value: float) -> None:
+        """Records an edited gain; it is written on the next flush."""
+        with self._lock:
+            self._sets.setdefault(self.gain_set, {}).setdefault(profile_key, {})[gain] = value
+            self._dirty = True
+
+    def save_set(self, name: str) -> None:
+        """Copies the current gain set to name (eg. before experimenting)."""
+        with self._lock:
+            current = self._sets.get(self.gain_set, {})
+            self._sets[name] = {key: dict(gains) for key, gains in current.items()}
+            self._dirty = True
+
+    def use_set(self, name: str) -> None:
+        """Switches every registered profile to the gains stored in set
+        name. Call from the robot thread: the profiles' change callbacks
+        and bound controllers pick the new gains up as if edited."""
+        with self._lock:
+            if name not in self._sets:
+                raise KeyError(f"No gain set named '{name}' in {self.path}")
+            self.gain_set = name
+            gains = {key: dict(values) for key, values in self._sets[name].items()}
+            profiles = dict(self._profiles)
+        for key, profile in profiles.items():
+            for gain, value in gains.get(key, {}).items():
+                if gain in profile.gains:
+                    profile.set_gain(gain, value)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_period):
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the file if anything changed since the last write."""
+        # held across the write so close() and the store's thread never
+        # write the temporary file at the same time
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                text = json.dumps(self._sets, separators=(",", ":"), sort_keys=True)
+                self._dirty = False
+            try:
+                self._write(text)
+            except OSError:
+                reportError(f"Could not write gain file:\n{traceback.format_exc()}", False)
+                with self._lock:
+                    self._dirty = True
+
+    def _write(self, text: str) -> None:
+        temp = self.path.with_suffix(".tmp")
+        with open(temp, "w") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+
+    def close(self) -> None:
+        """Writes anything pending and stops the background writes."""
+        self._stop.set()
+        self.flush()
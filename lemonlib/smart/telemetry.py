@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+from ntcore import NetworkTableInstance
+
+__all__ = ["TelemetryScheduler"]
+
+# deadlines this close together are run on the same tick; multiples of
+# different periods (eg. 5 * 0.02 and 0.1) differ by float error
+_SLACK = 1e-6
+
+
+class _Task:
+    __slots__ = ("callback", "period", "active")
+
+    def __init__(self, callback: Callable[[], bool], period: float):
+        self.callback = callback
+        self.period = period
+        self.active = True
+
+
+class TelemetryScheduler:
+    """One background thread that runs the periodic publishing for every
+    `SmartNT` in the process.
+
+    Each registered callback has its own period. On every tick the thread
+    runs all callbacks that are due, then flushes NetworkTables once if any
+    of them published, and sleeps until the next deadline. Use the shared
+    instance from `TelemetryScheduler.get()`.
+
+    Only register quick, non-blocking publish callbacks (read a value, set
+    a publisher). Every callback runs on the one thread, so a callback that
+    writes files, waits on a device or sleeps delays all telemetry behind
+    it; give such work its own thread (like `GainStore` does).
+    """
+
+    _instance: Optional["TelemetryScheduler"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        # heap of (deadline, sequence, task)
+        self._queue: list[tuple[float, int, _Task]] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks = 0
+
+    @classmethod
+    def get(cls) -> "TelemetryScheduler":
+        """Returns the process-wide scheduler."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def add(self, callback: Callable[[], bool], period: float) -> _Task:
+        """Runs callback every period seconds. callback must not block, and
+        returns True if it published anything. Returns a handle for
+        `remove()`."""
+        if period <= 0:
+            raise ValueError(f"Telemetry period must be positive, got {period}")
+        task = _Task(callback, period)
+        with self._cond:
+            self._schedule(task, time.monotonic())
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="TelemetryScheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return task
+
+    def remove(self, task: _Task) -> None:
+        # dropped lazily when it reaches the front of the queue
+        task.active = False
+
+    def __len__(self) -> int:
+        with self._cond:
+            return sum(task.active for _, _, task in self._queue)
+
+    def _schedule(self, task: _Task, now: float) -> None:
+        # align the first deadline to a multiple of period so that tasks with
+        # the same period are always due on the same tick
+        deadline = math.ceil(now / task.period) * task.period
+        heapq.heappush(self._queue, (deadline, next(self._sequence), task))
+
+    def _pop_due(self, now: float) -> list[_Task]:
+        """Removes the tasks due at now from the queue, queues their next
+        deadlines and returns them."""
+        due = []
+        while self._queue and self._queue[0][0] <= now + _SLACK:
+            deadline, _, task = heapq.heappop(self._queue)
+            if task.active:
+                due.append(task)
+                # the next multiple of the period, so the rate doesn't drift;
+                # after a stall this skips ahead to stay on the grid
+                period = task.period
+                tick = max(round(deadline / period), math.floor((now + _SLACK) / period))
+                heapq.heappush(self._queue, ((tick + 1) * period, next(self._sequence), task))
+        return due
+
+    def _run(self) -> None:
+        nt = NetworkTableInstance.getDefault()
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                now = time.monotonic()
+                deadline = self._queue[0][0]
+                if deadline > now + _SLACK:
+                    self._cond.wait(deadline - now)
+                    continue
+                due = self._pop_due(now)
+
+            published = False
+            for task in due:
+                try:
+                    published |= bool(task.callback())
+                except Exception as e:
+                    print(f"[TelemetryScheduler] Error in {task.callback!r}: {e}")
+            if published:
+                nt.flush()
+            self.ticks += 1
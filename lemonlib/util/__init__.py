@@ -8,6 +8,15 @@ from .elastic import (
 )
 from .ledcontroller import LEDController
 from .sysid import MagicSysIdRoutine
+from .shaping import (
+    Curve,
+    Deadband,
+    RadialDeadband,
+    Scale,
+    SlewRate,
+    Snap,
+    compile_shaper,
+)
 
 __all__ = [
     "Alert",
@@ -21,6 +30,13 @@ __all__ = [
     "is_red",
     "SnapY",
     "SnapX",
+    "compile_shaper",
+    "Deadband",
+    "RadialDeadband",
+    "Curve",
+    "SlewRate",
+    "Snap",
+    "Scale",
     "LEDController",
     "MagicSysIdRoutine",
     "get_file",
@@ -36,6 +52,7 @@ from wpilib import DriverStation
 from magicbot import feedback
 from pathlib import Path
 import inspect
+import math
 
 
 def clamp(value: float, min_value: float, max_value: float) -> float:
@@ -61,6 +78,8 @@ def curve(
     deadband: float,
     max_mag: float,
     absolute_offset: bool = True,
+    table_size: int = 0,
+    max_error: float = 1e-3,
 ) -> Callable[[float], float]:
     """Return a function that applies a curve to an input.
 
@@ -73,6 +92,13 @@ def curve(
         If this is 0, no restriction is applied.
     absolute_offset -- If true, applies offset always (even when deadbanded),
         If false, adds sign(input_val) * offset or 0 in the deadband
+    table_size -- If nonzero, the whole curve (deadband, offset and clamp
+        included) is sampled at this many points on each side of the
+        deadband, and inputs in [-1, 1] are linearly interpolated from the
+        table instead of calling mapping. Makes expensive mappings cost the
+        same as a linear curve.
+    max_error -- With a table, raise ValueError if interpolating ever
+        differs from the exact curve by more than this
     """
 
     def f(input_val: float) -> float:
@@ -86,17 +112,73 @@ def curve(
         else:
             return clamp(output_val, -max_mag, max_mag)
 
+    if table_size:
+        return _tabulate(f, deadband, table_size, max_error)
     return f
 
 
+def _tabulate(
+    f: Callable[[float], float], deadband: float, size: int, max_error: float
+) -> Callable[[float], float]:
+    """Returns f linearly interpolated from size samples of each side,
+    [deadband, 1] and [-1, -deadband]; the deadband itself is constant.
+    Sides are tabulated separately since f can jump at the deadband."""
+    if size < 2:
+        raise ValueError(f"table_size must be at least 2, got {size}")
+    step = (1 - deadband) / (size - 1)
+    # f may divide by the input (absolute_offset=False), so with no deadband
+    # the first samples are taken just off zero, on their own side
+    start = deadband if deadband > 0 else math.nextafter(0.0, 1.0)
+    positive = [f(max(deadband + i * step, start)) for i in range(size)]
+    negative = [f(-max(deadband + i * step, start)) for i in range(size)]
+    # the last segment is repeated so an input of exactly 1 needs no check
+    positive.append(positive[-1])
+    negative.append(negative[-1])
+    inside = f(0.0) if deadband > 0 else None
+    scale = 1 / step
+
+    def table_f(input_val: float) -> float:
+        """Apply a curve to an input from the lookup table."""
+        if input_val > 1 or input_val < -1:
+            return f(input_val)
+        if input_val >= deadband:
+            table = positive
+            t = (input_val - deadband) * scale
+        elif input_val <= -deadband:
+            table = negative
+            t = (-input_val - deadband) * scale
+        else:
+            return inside
+        i = int(t)
+        low = table[i]
+        return low + (table[i + 1] - low) * (t - i)
+
+    # check between the samples, where interpolation is furthest off
+    checks = 8 * size
+    worst = 0.0
+    for i in range(checks + 1):
+        x = max(deadband + (1 - deadband) * i / checks, start)
+        worst = max(worst, abs(table_f(x) - f(x)), abs(table_f(-x) - f(-x)))
+    if worst > max_error:
+        raise ValueError(
+            f"Curve table of {size} points is off by up to {worst:.3g}"
+            f" (max_error {max_error}); use a larger table_size"
+        )
+    table_f.max_error = worst
+    return table_f
+
+
 def linear_curve(
     scalar: float = 1.0,
     offset: float = 0.0,
     deadband: float = 0.0,
     max_mag: float = 0.0,
     absolute_offset: bool = True,
+    table_size: int = 0,
 ) -> Callable[[float], float]:
-    return curve(lambda x: scalar * x, offset, deadband, max_mag, absolute_offset)
+    return curve(
+        lambda x: scalar * x, offset, deadband, max_mag, absolute_offset, table_size
+    )
 
 
 def ollie_curve(
@@ -105,9 +187,15 @@ def ollie_curve(
     deadband: float = 0.0,
     max_mag: float = 0.0,
     absolute_offset: bool = True,
+    table_size: int = 0,
 ) -> Callable[[float], float]:
     return curve(
-        lambda x: scalar * x * abs(x), offset, deadband, max_mag, absolute_offset
+        lambda x: scalar * x * abs(x),
+        offset,
+        deadband,
+        max_mag,
+        absolute_offset,
+        table_size,
     )
 
 
@@ -117,8 +205,11 @@ def cubic_curve(
     deadband: float = 0.0,
     max_mag: float = 0.0,
     absolute_offset: bool = True,
+    table_size: int = 0,
 ) -> Callable[[float], float]:
-    return curve(lambda x: scalar * x**3, offset, deadband, max_mag, absolute_offset)
+    return curve(
+        lambda x: scalar * x**3, offset, deadband, max_mag, absolute_offset, table_size
+    )
 
 
 def SnapX(x, y) -> float:
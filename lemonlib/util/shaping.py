@@ -0,0 +1,259 @@
+"""Driver stick shaping: deadbands, curves, slew limiting, snapping and
+scaling, declared as a list of stages and compiled into one function.
+
+```
+shape = compile_shaper(
+    left=[RadialDeadband(0.08), Curve(2), SlewRate(4.0), Scale(max_speed)],
+    right=[Deadband(0.05, axes="x"), Curve(3, axes="x")],
+)
+
+def teleopPeriodic(self):
+    vx, vy, omega, _ = shape(
+        self.joystick.getLeftX(), self.joystick.getLeftY(),
+        self.joystick.getRightX(), self.joystick.getRightY(),
+    )
+```
+
+The stages of both sticks are generated as straight-line code in a single
+function, so shaping costs one Python call per loop instead of one per
+stage and axis. ``shape.array`` is the same pipeline on NumPy arrays, eg.
+to plot a response or run recorded input through it; slew limiting there
+treats the arrays as successive samples.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+__all__ = [
+    "Deadband",
+    "RadialDeadband",
+    "Curve",
+    "SlewRate",
+    "Snap",
+    "Scale",
+    "compile_shaper",
+]
+
+
+@dataclass(frozen=True)
+class Deadband:
+    """Zeroes an axis inside width; outside, rescales so the output still
+    starts at 0 and reaches 1 (like `wpimath.applyDeadband`)."""
+
+    width: float
+    axes: str = "xy"
+
+    def code(self, v: str, env: dict) -> list[str]:
+        w = _const(self.width)
+        k = _const(1 / (1 - self.width))
+        return [
+            f"if {v} > {w}: {v} = ({v} - {w}) * {k}",
+            f"elif {v} < -{w}: {v} = ({v} + {w}) * {k}",
+            f"else: {v} = 0.0",
+        ]
+
+    def array_code(self, v: str, env: dict) -> list[str]:
+        w = _const(self.width)
+        k = _const(1 / (1 - self.width))
+        return [f"{v} = np.where(np.abs({v}) > {w}, ({v} - np.sign({v}) * {w}) * {k}, 0.0)"]
+
+
+@dataclass(frozen=True)
+class RadialDeadband:
+    """Zeroes the stick when its distance from center is inside width and
+    rescales the magnitude otherwise, keeping the direction. Unlike a
+    per-axis deadband, this doesn't pull diagonals towards the axes."""
+
+    width: float
+
+    def code(self, x: str, y: str, env: dict) -> list[str]:
+        w = _const(self.width)
+        k = _const(1 / (1 - self.width))
+        return [
+            f"m = math.hypot({x}, {y})",
+            f"if m > {w}:",
+            f"    m = (min(m, 1.0) - {w}) * {k} / m",
+            f"    {x} *= m",
+            f"    {y} *= m",
+            f"else: {x} = {y} = 0.0",
+        ]
+
+    def array_code(self, x: str, y: str, env: dict) -> list[str]:
+        w = _const(self.width)
+        k = _const(1 / (1 - self.width))
+        return [
+            f"m = np.hypot({x}, {y})",
+            f"m = np.where(m > {w}, (np.minimum(m, 1.0) - {w}) * {k} / np.where(m > 0, m, 1.0), 0.0)",
+            f"{x} = {x} * m",
+            f"{y} = {y} * m",
+        ]
+
+
+@dataclass(frozen=True)
+class Curve:
+    """Keeps the sign and raises the magnitude to exponent (2 behaves like
+    `ollie_curve`, 3 like `cubic_curve`), times scalar. A mapping function
+    replaces the power curve; it is called once per axis."""
+
+    exponent: float = 2.0
+    scalar: float = 1.0
+    mapping: Optional[Callable[[float], float]] = None
+    axes: str = "xy"
+
+    def code(self, v: str, env: dict) -> list[str]:
+        if self.mapping is not None:
+            return [f"{v} = {_name(env, 'mapping', self.mapping)}({v})"]
+        c = "" if self.scalar == 1 else f"{_const(self.scalar)} * "
+        if self.exponent == 1:
+            return [f"{v} = {c}{v}"]
+        if self.exponent == 2:
+            return [f"{v} = {c}{v} * abs({v})"]
+        if self.exponent == 3:
+            return [f"{v} = {c}{v} * {v} * {v}"]
+        return [f"{v} = {c}math.copysign(abs({v}) ** {_const(self.exponent)}, {v})"]
+
+    def array_code(self, v: str, env: dict) -> list[str]:
+        if self.mapping is not None:
+            vectorized = np.vectorize(self.mapping, otypes=[float])
+            return [f"{v} = {_name(env, 'mapping', vectorized)}({v})"]
+        c = _const(self.scalar)
+        return [f"{v} = {c} * np.sign({v}) * np.abs({v}) ** {_const(self.exponent)}"]
+
+
+@dataclass(frozen=True)
+class SlewRate:
+    """Limits how fast an axis can change, in units per second, assuming
+    the shaper is called once every period seconds."""
+
+    rate: float
+    period: float = 0.02
+    axes: str = "xy"
+
+    def code(self, v: str, env: dict) -> list[str]:
+        state = _name(env, "slew", [0.0])
+        step = _const(self.rate * self.period)
+        return [
+            f"{v} = min(max({v}, {state}[0] - {step}), {state}[0] + {step})",
+            f"{state}[0] = {v}",
+        ]
+
+    def array_code(self, v: str, env: dict) -> list[str]:
+        state = _name(env, "slew", [0.0])
+        step = _const(self.rate * self.period)
+        return [f"{v} = _slew_series({v}, {state}, {step})"]
+
+
+@dataclass(frozen=True)
+class Snap:
+    """Keeps only the larger axis of the stick (`SnapX` and `SnapY` in one)."""
+
+    def code(self, x: str, y: str, env: dict) -> list[str]:
+        return [
+            f"if abs({x}) > abs({y}): {y} = 0.0",
+            f"elif abs({y}) > abs({x}): {x} = 0.0",
+            f"else: {x} = {y} = 0.0",
+        ]
+
+    def array_code(self, x: str, y: str, env: dict) -> list[str]:
+        return [
+            f"m = np.abs({x}) - np.abs({y})",
+            f"{x}, {y} = np.where(m > 0, {x}, 0.0), np.where(m < 0, {y}, 0.0)",
+        ]
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Multiplies an axis by factor and adds offset, eg. ``Scale(0.5, 0.5)``
+    maps -1..1 to 0..1."""
+
+    factor: float
+    offset: float = 0.0
+    axes: str = "xy"
+
+    def code(self, v: str, env: dict) -> list[str]:
+        if self.offset == 0:
+            return [f"{v} = {v} * {_const(self.factor)}"]
+        return [f"{v} = {v} * {_const(self.factor)} + {_const(self.offset)}"]
+
+    array_code = code
+
+
+def _const(value: float) -> str:
+    return repr(float(value))
+
+
+def _name(env: dict, prefix: str, value) -> str:
+    """Adds value to the generated function's globals under a new name."""
+    name = f"_{prefix}{len(env)}"
+    env[name] = value
+    if prefix == "slew":
+        env["_states"].append(value)
+    return name
+
+
+def _slew_series(values, state: list, step: float) -> np.ndarray:
+    values = np.array(values, dtype=float)
+    flat = values.reshape(-1)
+    previous = state[0]
+    for i in range(len(flat)):
+        previous = flat[i] = min(max(flat[i], previous - step), previous + step)
+    state[0] = previous
+    return values
+
+
+def _stick_code(stages, x: str, y: str, env: dict, array: bool) -> list[str]:
+    lines = []
+    for stage in stages:
+        lines.append(f"# {stage!r}")
+        if hasattr(stage, "axes"):
+            for axis, v in (("x", x), ("y", y)):
+                if axis in stage.axes:
+                    lines += stage.array_code(v, env) if array else stage.code(v, env)
+        else:
+            lines += stage.array_code(x, y, env) if array else stage.code(x, y, env)
+    return lines
+
+
+def _compile(left, right, env: dict, array: bool, name: str) -> Callable:
+    body = _stick_code(left, "lx", "ly", env, array) + _stick_code(right, "rx", "ry", env, array)
+    if array:
+        body = [f"{v} = np.asarray({v}, dtype=float)" for v in ("lx", "ly", "rx", "ry")] + body
+    source = "\n".join(
+        [f"def {name}(lx, ly, rx=0.0, ry=0.0):"]
+        + [f"    {line}" for line in body]
+        + ["    return lx, ly, rx, ry"]
+    )
+    namespace = {}
+    exec(compile(source, f"<shaper {name}>", "exec"), env, namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+def compile_shaper(left: list = (), right: list = ()) -> Callable:
+    """Compiles the stages of each stick, applied in order, into one
+    function ``shape(lx, ly, rx=0.0, ry=0.0) -> (lx, ly, rx, ry)``.
+
+    Stages with an ``axes`` field ("x", "y" or "xy") act on each of those
+    axes; `RadialDeadband` and `Snap` act on the stick as a whole. The
+    returned function also has:
+    - ``array``: the same pipeline on NumPy arrays
+    - ``reset()``: clears the slew rate limiters' state
+    - ``source``: the generated code
+    """
+    env = {"math": math, "np": np, "_slew_series": _slew_series, "_states": []}
+    shape = _compile(left, right, env, False, "shape")
+    # the array version keeps its own slew state, so bulk evaluation
+    # doesn't disturb the live one
+    array_env = {"math": math, "np": np, "_slew_series": _slew_series, "_states": []}
+    shape.array = _compile(left, right, array_env, True, "shape_array")
+
+    def reset():
+        for state in env["_states"] + array_env["_states"]:
+            state[0] = 0.0
+
+    shape.reset = reset
+    return shape
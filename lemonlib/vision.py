@@ -1,10 +1,23 @@
 from photonlibpy.photonCamera import PhotonCamera
+from photonlibpy.targeting import PhotonPipelineResult
 from robotpy_apriltag import AprilTagFieldLayout, AprilTagField, AprilTagPoseEstimator
 from wpimath.geometry import Pose2d, Pose3d, Transform3d
 from wpimath import units
+from typing import Callable, NamedTuple, Optional, Sequence
 import math
 
 
+class VisionMeasurement(NamedTuple):
+    """A robot pose measured from a single camera frame."""
+
+    pose: Pose2d
+    timestamp: float
+    """capture time of the frame, in the FPGA timebase"""
+    distance: float
+    """average distance from the camera to the tags used (meters)"""
+    tag_count: int
+
+
 class LemonCamera(PhotonCamera):
     """Wrapper for photonlibpy PhotonCamera"""
 
@@ -22,6 +35,7 @@ class LemonCamera(PhotonCamera):
         PhotonCamera.__init__(self, name)
         self.camera_to_bot = camera_to_bot
         self.april_tag_field = april_tag_field
+        self.results = []
 
     def update(self):
         self.results = self.getAllUnreadResults()
@@ -54,3 +68,135 @@ class LemonCamera(PhotonCamera):
         if twod:
             return tag_pose.toPose2d()
         return tag_pose
+
+    def estimate_robot_pose(
+        self, result: PhotonPipelineResult, max_ambiguity: float = 0.2
+    ) -> Optional[VisionMeasurement]:
+        """Converts one pipeline result into a robot pose measurement.
+        Uses the coprocessor multi-tag solution when there is one, otherwise
+        the best single tag if its pose ambiguity is below max_ambiguity.
+        """
+        if not result.hasTargets():
+            return None
+        multitag = result.multitagResult
+        if multitag is not None and len(multitag.fiducialIDsUsed) > 1:
+            field_to_camera = Pose3d().transformBy(multitag.estimatedPose.best)
+            used = [
+                target
+                for target in result.getTargets()
+                if target.getFiducialId() in multitag.fiducialIDsUsed
+            ]
+            if not used:
+                return None
+            distance = sum(
+                target.getBestCameraToTarget().translation().norm() for target in used
+            ) / len(used)
+            tag_count = len(multitag.fiducialIDsUsed)
+        else:
+            target = result.getBestTarget()
+            if target is None or target.getPoseAmbiguity() > max_ambiguity:
+                return None
+            tag_pose = self.april_tag_field.getTagPose(target.getFiducialId())
+            if tag_pose is None:
+                return None
+            camera_to_target = target.getBestCameraToTarget()
+            field_to_camera = tag_pose.transformBy(camera_to_target.inverse())
+            distance = camera_to_target.translation().norm()
+            tag_count = 1
+        robot_pose = field_to_camera.transformBy(self.camera_to_bot)
+        return VisionMeasurement(
+            robot_pose.toPose2d(), result.getTimestampSeconds(), distance, tag_count
+        )
+
+    def get_robot_poses(self, max_ambiguity: float = 0.2) -> list[VisionMeasurement]:
+        """Returns a robot pose measurement for every result read by the
+        last `update()`, oldest first."""
+        measurements = []
+        for result in self.results:
+            measurement = self.estimate_robot_pose(result, max_ambiguity)
+            if measurement is not None:
+                measurements.append(measurement)
+        return measurements
+
+
+class LemonVisionFusion:
+    """Feeds every unread frame from a set of `LemonCamera`s into a pose
+    estimator, using the frame capture time rather than the time it was
+    read. Call `update()` once per loop. For example, with `LemonSwerve`
+    (which converts timestamps to the phoenix6 timebase itself):
+    ```
+    self.vision = LemonVisionFusion(
+        [front_camera, back_camera], self.drivetrain.add_vision_measurement
+    )
+    ```
+    A raw phoenix6 `SwerveDrivetrain` also needs
+    `timestamp_converter=phoenix6.utils.fpga_to_current_time`.
+    The standard deviations passed with each measurement grow with the
+    square of the tag distance and shrink with the number of tags seen.
+    """
+
+    def __init__(
+        self,
+        cameras: Sequence[LemonCamera],
+        add_vision_measurement: Callable[
+            [Pose2d, float, tuple[float, float, float]], None
+        ],
+        base_std_devs: tuple[float, float, float] = (0.1, 0.1, 0.2),
+        distance_scale: float = 0.5,
+        max_distance: float = 5.0,
+        max_ambiguity: float = 0.2,
+        timestamp_converter: Callable[[float], float] = None,
+    ):
+        """Args:
+        cameras -- cameras to read each loop
+        add_vision_measurement -- called as (pose, timestamp, std_devs) for
+            every accepted measurement
+        base_std_devs -- x, y (meters) and heading (radians) std devs for a
+            single tag at zero distance
+        distance_scale -- std devs are multiplied by 1 + distance_scale * distance^2
+        max_distance -- frames whose tags are further than this are dropped
+        max_ambiguity -- single-tag frames more ambiguous than this are dropped
+        timestamp_converter -- maps FPGA seconds to the estimator timebase
+        """
+        self.cameras = list(cameras)
+        self.add_vision_measurement = add_vision_measurement
+        self.base_std_devs = base_std_devs
+        self.distance_scale = distance_scale
+        self.max_distance = max_distance
+        self.max_ambiguity = max_ambiguity
+        self.timestamp_converter = timestamp_converter
+        self.measurements: list[VisionMeasurement] = []
+
+    def std_devs(self, measurement: VisionMeasurement) -> tuple[float, float, float]:
+        """Standard deviations to trust a measurement with."""
+        scale = (
+            1 + self.distance_scale * measurement.distance**2
+        ) / measurement.tag_count
+        x, y, heading = self.base_std_devs
+        return (x * scale, y * scale, heading * scale)
+
+    def update(self) -> list[VisionMeasurement]:
+        """Reads all cameras and applies every accepted measurement in
+        capture order. Returns the measurements that were applied."""
+        measurements = []
+        for camera in self.cameras:
+            camera.update()
+            measurements.extend(camera.get_robot_poses(self.max_ambiguity))
+        measurements.sort(key=lambda measurement: measurement.timestamp)
+        self.measurements = [
+            measurement
+            for measurement in measurements
+            if measurement.distance <= self.max_distance
+        ]
+        convert = self.timestamp_converter
+        for measurement in self.measurements:
+            self.add_vision_measurement(
+                measurement.pose,
+                (
+                    convert(measurement.timestamp)
+                    if convert is not None
+                    else measurement.timestamp
+                ),
+                self.std_devs(measurement),
+            )
+        return self.measurements
@@ -0,0 +1,27 @@
+from pyfrc.physics.core import PhysicsInterface
+from wpilib import RobotController
+
+from lemonlib.simulation import SwerveDriveSim
+
+
+class PhysicsEngine:
+    """Simulates the swerve drivetrain when running `robotpy sim` or `robotpy test`."""
+
+    def __init__(self, physics_controller: PhysicsInterface, robot):
+        self.physics_controller = physics_controller
+        self.robot = robot
+        self.swerve_sim = None
+
+    def update_sim(self, now: float, tm_diff: float) -> None:
+        if self.swerve_sim is None:
+            # the drivetrain only exists once magicbot has run setup()
+            swerve = getattr(self.robot, "drivetrain", None)
+            if swerve is None or not hasattr(swerve, "drivetrain"):
+                return
+            constants = swerve.constants
+            self.swerve_sim = SwerveDriveSim(
+                swerve.drivetrain,
+                [constants.FL, constants.FR, constants.BL, constants.BR],
+            )
+        self.swerve_sim.update(tm_diff, RobotController.getBatteryVoltage())
+        self.physics_controller.field.setRobotPose(self.swerve_sim.get_pose())
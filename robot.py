@@ -1,15 +1,19 @@
 from lemonlib import LemonRobot
 from lemonlib import LemonInput
+from lemonlib.util import Scale, compile_shaper
 from components.drivetrain import LemonSwerve
 
+# right X is used from 0 (full left) to 1 (full right)
+shape_input = compile_shaper(right=[Scale(0.5, 0.5, axes="x")])
+
 class MyRobot(LemonRobot):
     drivetrain: LemonSwerve
     joystick: LemonInput
     def createObjects(self):
-        self.drivetrain = LemonSwerve()
+        # drivetrain is created by magicbot so that its setup() and execute() run
         self.joystick = LemonInput(0)
     def teleopPeriodic(self):
-        vX = self.joystick.getLeftX()
-        vY = self.joystick.getLeftY()
-        rotations = (self.joystick.getRightX() + 1.0) / 2.0 #not sure I like this
-        self.drivetrain.drive(vX, vY, rotations, "field")
\ No newline at end of file
+        vX, vY, rotations, _ = shape_input(
+            self.joystick.getLeftX(), self.joystick.getLeftY(), self.joystick.getRightX()
+        )
+        self.drivetrain.drive(vX, vY, rotations, "field")
@@ -0,0 +1,78 @@
+import threading
+
+from lemonlib.smart import ChangeNotifier, dispatch_changes
+
+
+def test_latest_value_once_per_dispatch():
+    dispatch_changes()
+    notifier = ChangeNotifier()
+    seen = []
+    notifier.subscribe(seen.append)
+    notifier.mark("kP", 1.0)
+    notifier.mark("kP", 2.0)
+    notifier.mark("kD", 0.5)
+    assert seen == []
+    dispatch_changes()
+    assert seen == [{"kP": 2.0, "kD": 0.5}]
+    dispatch_changes()
+    assert len(seen) == 1
+
+
+def test_subscribers_only_see_their_keys():
+    dispatch_changes()
+    notifier = ChangeNotifier()
+    gains, feedforward = [], []
+    notifier.subscribe(gains.append, ("kP", "kD"))
+    handle = notifier.subscribe(feedforward.append, ["kS"])
+    notifier.mark("kP", 1.0)
+    dispatch_changes()
+    assert gains == [{"kP": 1.0}]
+    assert feedforward == []
+
+    notifier.unsubscribe(handle)
+    notifier.mark("kS", 0.1)
+    dispatch_changes()
+    assert feedforward == []
+
+
+def test_notifiers_are_independent():
+    dispatch_changes()
+    first, second = ChangeNotifier(), ChangeNotifier()
+    seen = []
+    first.subscribe(lambda changed: seen.append(("first", changed)))
+    second.subscribe(lambda changed: seen.append(("second", changed)))
+    second.mark("x", 1)
+    dispatch_changes()
+    assert seen == [("second", {"x": 1})]
+
+
+def test_failing_callback_doesnt_stop_others():
+    dispatch_changes()
+    notifier = ChangeNotifier()
+    seen = []
+
+    def fail(changed):
+        raise RuntimeError("broken callback")
+
+    notifier.subscribe(fail)
+    notifier.subscribe(seen.append)
+    notifier.mark("kP", 1.0)
+    dispatch_changes()
+    assert seen == [{"kP": 1.0}]
+
+
+def test_marks_from_other_threads():
+    dispatch_changes()
+    notifier = ChangeNotifier()
+    seen = []
+    notifier.subscribe(seen.append)
+    threads = [
+        threading.Thread(target=lambda i=i: [notifier.mark(f"k{i}", n) for n in range(100)])
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dispatch_changes()
+    assert seen == [{f"k{i}": 99 for i in range(4)}]
@@ -0,0 +1,89 @@
+import threading
+
+from phoenix6.configs import Slot0Configs
+from phoenix6.status_code import StatusCode
+
+from lemonlib.ctre import ConfigManager
+
+
+class _Configurator:
+    def __init__(self, device):
+        self.device = device
+
+    def apply(self, config, timeout):
+        device = self.device
+        device.gate.wait()
+        device.applies.append(config.k_p)
+        if device.failures:
+            device.failures -= 1
+            return StatusCode.CONFIG_FAILED
+        return StatusCode.OK
+
+
+class _Device:
+    """Stands in for a TalonFX: applies block until gate is set and the
+    first failures of them fail."""
+
+    def __init__(self, device_id: int, failures: int = 0):
+        self.device_id = device_id
+        self.network = "rio"
+        self.configurator = _Configurator(self)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failures = failures
+        self.applies = []
+
+
+def _slot0(kP: float) -> Slot0Configs:
+    return Slot0Configs().with_k_p(kP)
+
+
+def test_skips_acknowledged_configs():
+    manager = ConfigManager()
+    device = _Device(1)
+    assert manager.apply(device, _slot0(1.0)).result(1)
+    assert manager.apply(device, _slot0(1.0)).result(1)
+    assert device.applies == [1.0]
+    assert manager.apply(device, _slot0(2.0)).result(1)
+    manager.forget()
+    assert manager.apply(device, _slot0(2.0)).result(1)
+    assert device.applies == [1.0, 2.0, 2.0]
+
+
+def test_waits_for_apply_in_flight():
+    manager = ConfigManager()
+    device = _Device(1)
+    device.gate.clear()
+    first = manager.apply(device, _slot0(1.0))
+    second = manager.apply(device, _slot0(1.0))
+    # the same config isn't sent twice, but isn't reported done early either
+    assert not second.done()
+    assert not manager.ready
+    device.gate.set()
+    assert first.result(1) and second.result(1)
+    assert device.applies == [1.0]
+    assert manager.ready
+
+
+def test_reapplies_config_overwritten_in_flight():
+    manager = ConfigManager()
+    device = _Device(1)
+    assert manager.apply(device, _slot0(1.0)).result(1)
+    device.gate.clear()
+    manager.apply(device, _slot0(2.0))
+    back = manager.apply(device, _slot0(1.0))
+    device.gate.set()
+    assert back.result(1)
+    assert device.applies == [1.0, 2.0, 1.0]
+
+
+def test_failed_apply_is_retried_later():
+    manager = ConfigManager(retries=1)
+    device = _Device(1, failures=2)
+    other = _Device(2)
+    assert not manager.apply_all([(device, _slot0(1.0)), (other, _slot0(1.0))]).result(1)
+    assert device.applies == [1.0, 1.0]
+    # only the failed device is sent again
+    assert manager.apply_all([(device, _slot0(1.0)), (other, _slot0(1.0))]).result(1)
+    assert device.applies == [1.0, 1.0, 1.0]
+    assert other.applies == [1.0]
@@ -0,0 +1,91 @@
+import copy
+import json
+
+import pytest
+
+from components import constants
+from components.constants import CONSTANTS_PATH, LemonSwerveConstants, validate
+from lemonlib.ctre import DeviceMap, ModuleDevices
+
+EXPORT = json.loads(CONSTANTS_PATH.read_text())
+
+
+def _export(tmp_path, data) -> object:
+    path = tmp_path / "constants.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_export_is_valid():
+    validate(EXPORT)
+
+
+@pytest.mark.parametrize(
+    "edit, message",
+    [
+        (lambda c: c["SwerveOptions"].pop("Gyro"), r"constants\.SwerveOptions\.Gyro is missing"),
+        (
+            lambda c: c["Modules"][2]["DriveMotor"].update(Id="21"),
+            r"constants\.Modules\[2\]\.DriveMotor\.Id should be",
+        ),
+        # true is an int, but not a number here
+        (
+            lambda c: c["SwerveOptions"].update(kSpeedAt12Volts=True),
+            r"kSpeedAt12Volts should be",
+        ),
+        (lambda c: c.update(Modules={}), r"constants\.Modules should be a list"),
+    ],
+    ids=["missing", "wrong_type", "bool_number", "not_list"],
+)
+def test_validate_names_bad_entry(edit, message):
+    data = copy.deepcopy(EXPORT)
+    edit(data)
+    with pytest.raises(ValueError, match=message):
+        validate(data)
+
+
+def test_wrong_module_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(constants, "_cache", {})
+    data = copy.deepcopy(EXPORT)
+    data["Modules"].pop()
+    with pytest.raises(ValueError, match="3 modules"):
+        LemonSwerveConstants(_export(tmp_path, data))
+
+
+def test_parsed_once_per_contents(tmp_path, monkeypatch):
+    monkeypatch.setattr(constants, "_cache", {})
+    path = _export(tmp_path, EXPORT)
+    first = LemonSwerveConstants(path)
+    second = LemonSwerveConstants(path)
+    assert second.constants is first.constants
+    assert second.FL is first.FL
+    assert len(constants._cache) == 1
+
+    data = copy.deepcopy(EXPORT)
+    data["Modules"][0]["EncoderOffset"] = 0.125
+    changed = LemonSwerveConstants(_export(tmp_path, data))
+    assert changed.constants is not first.constants
+    assert changed.FL.encoder_offset == 0.125
+    assert len(constants._cache) == 2
+
+
+def test_device_map_overrides_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(constants, "_cache", {})
+    path = _export(tmp_path, EXPORT)
+    device_map = DeviceMap(
+        "canivore",
+        5,
+        {
+            key: ModuleDevices(10 * i + 1, 10 * i + 2, 10 * i + 3)
+            for i, key in enumerate(constants.MODULE_KEYS, start=1)
+        },
+    )
+    mapped = LemonSwerveConstants(path, device_map)
+    assert (mapped.FL.drive_motor_id, mapped.FL.steer_motor_id, mapped.FL.encoder_id) == (11, 12, 13)
+    assert mapped.BR.encoder_id == 43
+    assert mapped.DRIVETRAIN.pigeon2_id == 5
+    assert mapped.DRIVETRAIN.can_bus_name == "canivore"
+    # the plain export is cached separately and left untouched
+    plain = LemonSwerveConstants(path)
+    assert plain.FL.drive_motor_id == EXPORT["Modules"][0]["DriveMotor"]["Id"]
+    assert len(constants._cache) == 2
@@ -0,0 +1,122 @@
+import pytest
+from wpilib.event import EventLoop
+from wpilib.simulation import DriverStationSim, GenericHIDSim
+
+from lemonlib import ControllerWatcher, LemonInput
+
+PORT = 3
+
+
+@pytest.fixture
+def sim():
+    sim = GenericHIDSim(PORT)
+    sim.setButtonCount(16)
+    sim.setAxisCount(6)
+    sim.setPOVCount(1)
+    for button in range(1, 17):
+        sim.setRawButton(button, False)
+    sim.notifyNewData()
+    return sim
+
+
+def _set(sim, button: int, value: bool, loop) -> None:
+    sim.setRawButton(button, value)
+    DriverStationSim.notifyNewData()
+    if loop is not None:
+        LemonInput.next_loop()
+
+
+@pytest.mark.parametrize("loop", [None, 0], ids=["unsynchronized", "per_loop"])
+def test_press_survives_other_reads(sim, monkeypatch, loop):
+    monkeypatch.setattr(LemonInput, "_loop", loop)
+    joystick = LemonInput(PORT, "Xbox")
+    assert not joystick.getRawButtonPressed(1)
+    _set(sim, 1, True, loop)
+    # without next_loop() each of these takes a new snapshot
+    assert joystick.getAButton()
+    assert joystick.getAButton()
+    if loop is not None:
+        LemonInput.next_loop()
+    assert joystick.getAButton()
+    assert joystick.getRawButtonPressed(1)
+
+
+@pytest.mark.parametrize("loop", [None, 0], ids=["unsynchronized", "per_loop"])
+def test_edges_reported_once(sim, monkeypatch, loop):
+    monkeypatch.setattr(LemonInput, "_loop", loop)
+    joystick = LemonInput(PORT, "Xbox")
+    joystick.getAButton()
+    _set(sim, 1, True, loop)
+    assert joystick.getButtonPressed("kA")
+    assert not joystick.getButtonPressed("kA")
+    assert not joystick.getRawButtonPressed(1)
+
+    _set(sim, 1, False, loop)
+    assert not joystick.getRawButtonPressed(1)
+    assert joystick.getRawButtonReleased(1)
+    assert not joystick.getButtonReleased("kA")
+
+
+def test_snapshot_once_per_loop(sim, monkeypatch):
+    monkeypatch.setattr(LemonInput, "_loop", 0)
+    joystick = LemonInput(PORT, "Xbox")
+    sim.setRawAxis(0, 0.5)
+    sim.notifyNewData()
+    assert joystick.getLeftX() == pytest.approx(0.5)
+    sim.setRawAxis(0, -0.5)
+    sim.notifyNewData()
+    # same loop, same snapshot
+    assert joystick.getLeftX() == pytest.approx(0.5)
+    LemonInput.next_loop()
+    assert joystick.getLeftX() == pytest.approx(-0.5)
+
+
+@pytest.fixture
+def hotplug():
+    """Plugs an Xbox controller into port 4 and unplugs it afterwards."""
+    watcher = ControllerWatcher.get()
+    old = GenericHIDSim(4)
+    yield old
+    DriverStationSim.setJoystickName(4, "")
+    DriverStationSim.setJoystickName(5, "")
+    DriverStationSim.notifyNewData()
+    watcher.poll()
+
+
+def _plug(port: int, name: str) -> GenericHIDSim:
+    DriverStationSim.setJoystickName(port, name)
+    DriverStationSim.setJoystickIsXbox(port, True)
+    DriverStationSim.setJoystickAxisCount(port, 6)
+    DriverStationSim.setJoystickButtonCount(port, 10)
+    DriverStationSim.notifyNewData()
+    ControllerWatcher.get().poll()
+    return GenericHIDSim(port)
+
+
+def test_hotplug_moves_port(hotplug, monkeypatch):
+    monkeypatch.setattr(LemonInput, "_loop", None)
+    sim = _plug(4, "Xbox Controller")
+    joystick = LemonInput(None, "Xbox")
+    assert joystick.getPort() == 4
+    loop = EventLoop()
+    pressed = joystick.button(1, loop)
+    joystick.setOutputs(0b101)
+    joystick.setRumble(joystick.RumbleType.kLeftRumble, 1.0)
+    assert sim.getOutputs() == 0b101
+
+    # replugged into another port
+    DriverStationSim.setJoystickName(4, "")
+    moved = _plug(5, "Xbox Controller")
+    moved.setRawButton(1, True)
+    moved.notifyNewData()
+    assert joystick.getAButton()
+    assert joystick.getPort() == 5
+    assert joystick.getName() == "Xbox Controller"
+    assert joystick.isConnected()
+    assert joystick.getAxisCount() == 6
+    loop.poll()
+    assert pressed.getAsBoolean()
+    # outputs and rumble followed the controller
+    assert sim.getOutputs() == 0
+    assert moved.getOutputs() == 0b101
+    assert moved.getRumble(joystick.RumbleType.kLeftRumble) == pytest.approx(1.0, abs=1e-4)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from lemonlib.smart import SmartProfile
+
+FLYWHEEL_GAINS = {"kP": 0.8, "kI": 0.5, "kD": 0.01, "kS": 0.2, "kV": 0.12}
+TURRET_GAINS = dict(FLYWHEEL_GAINS, kMaxV=3.0, kMaxA=6.0)
+CONTINUOUS = {"kMinInput": -np.pi, "kMaxInput": np.pi}
+
+
+def _simulate(bank, controllers, references, steps=150):
+    """Drives each controller's plant (a first order lag) with the bank and
+    with the individual controllers, and returns both output histories."""
+    rng = np.random.default_rng(5113)
+    measurements = rng.uniform(-1, 1, len(controllers))
+    bank_outputs, single_outputs = [], []
+    for step in range(steps):
+        noisy = measurements + rng.normal(0, 0.01, len(controllers))
+        if step == steps // 2:
+            references = -references
+        bank_outputs.append(bank.calculate(noisy, references).copy())
+        single_outputs.append(
+            [c.calculate(m, r) for c, m, r in zip(controllers, noisy, references)]
+        )
+        measurements += (bank_outputs[-1] - measurements) * 0.05
+    return np.array(bank_outputs), np.array(single_outputs)
+
+
+@pytest.mark.parametrize("extra", [{}, CONTINUOUS], ids=["plain", "continuous"])
+def test_flywheel_bank_matches_controllers(extra):
+    profile = SmartProfile("bank_flywheel", dict(FLYWHEEL_GAINS, **extra), False)
+    references = np.array([2.5, -1.0, 0.0, 3.0, -2.9, 0.4, 1.2, -0.7])
+    bank = profile.create_flywheel_bank(len(references))
+    controllers = [
+        profile.create_flywheel_controller(f"flywheel{i}", False)
+        for i in range(len(references))
+    ]
+    bank_outputs, single_outputs = _simulate(bank, controllers, references)
+    np.testing.assert_allclose(bank_outputs, single_outputs, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("extra", [{}, CONTINUOUS], ids=["plain", "continuous"])
+def test_turret_bank_matches_controllers(extra):
+    profile = SmartProfile("bank_turret", dict(TURRET_GAINS, **extra), False)
+    references = np.array([2.5, -1.0, 0.0, 3.0, -2.9, 0.4, 1.2, -0.7])
+    bank = profile.create_turret_bank(len(references))
+    controllers = [
+        profile.create_turret_controller(f"turret{i}", False)
+        for i in range(len(references))
+    ]
+    bank_outputs, single_outputs = _simulate(bank, controllers, references)
+    np.testing.assert_allclose(bank_outputs, single_outputs, rtol=1e-9, atol=1e-9)
+
+
+def test_bank_tolerance_and_gain_changes():
+    profile = SmartProfile("bank_tolerance", dict(FLYWHEEL_GAINS), False)
+    bank = profile.create_flywheel_bank(3)
+    controllers = [profile.create_flywheel_controller(f"tol{i}", False) for i in range(3)]
+    bank.setTolerance(0.1)
+    for c in controllers:
+        c.setTolerance(0.1)
+    measurements = np.array([1.0, 0.95, -0.5])
+    references = np.array([1.0, 1.0, 1.0])
+    for step in range(20):
+        if step == 10:
+            profile.set_gain("kP", 2.0)
+        outputs = bank.calculate(measurements, references)
+        expected = [c.calculate(m, r) for c, m, r in zip(controllers, measurements, references)]
+        np.testing.assert_allclose(outputs, expected, rtol=1e-9, atol=1e-9)
+    assert list(bank.at_setpoint()) == [True, True, False]
@@ -0,0 +1,83 @@
+import numpy as np
+from ntcore import NetworkTableInstance
+
+from lemonlib.smart import SmartController
+from lemonlib.smart.controller import HISTORY_FIELDS
+from lemonlib.smart.telemetry import TelemetryScheduler
+
+
+def _controller(key: str) -> SmartController:
+    return SmartController(key, lambda measurement, reference: 2 * (reference - measurement), False)
+
+
+def _table(key: str):
+    return NetworkTableInstance.getDefault().getTable(f"SmartController/{key}_controller")
+
+
+def test_history_off_by_default():
+    controller = _controller("history_off")
+    controller.calculate(0.0, 1.0)
+    assert controller.history().shape == (0, len(HISTORY_FIELDS))
+    assert controller.timing_stats() == (0.0, 0.0)
+    assert controller.compute_time == 0.0
+
+
+def test_ring_buffer_keeps_newest_rows():
+    controller = _controller("history_ring")
+    controller.enable_history(capacity=4)
+    for reference in range(6):
+        controller.calculate(0.5, float(reference))
+    rows = controller.history()
+    assert rows.shape == (4, len(HISTORY_FIELDS))
+    assert rows[:, 1].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert rows[:, 2].tolist() == [0.5] * 4
+    np.testing.assert_allclose(rows[:, 3], rows[:, 1] - 0.5)
+    np.testing.assert_allclose(rows[:, 4], 2 * rows[:, 3])
+    assert np.all(np.diff(rows[:, 0]) >= 0)
+    controller.disable_history()
+
+
+def test_timing_stats():
+    controller = _controller("history_timing")
+    controller.enable_history()
+    for _ in range(10):
+        controller.calculate(0.0, 1.0)
+    mean, peak = controller.timing_stats()
+    assert 0.0 < mean <= peak
+    assert peak == controller.history()[:, 5].max()
+    controller.disable_history()
+    assert controller.timing_stats() == (0.0, 0.0)
+
+
+def test_reenabling_replaces_task():
+    scheduler = TelemetryScheduler.get()
+    before = len(scheduler)
+    controller = _controller("history_reenable")
+    controller.enable_history()
+    controller.calculate(0.0, 1.0)
+    controller.enable_history(capacity=8)
+    assert len(scheduler) == before + 1
+    assert len(controller.history()) == 0
+    controller.disable_history()
+    assert len(scheduler) == before
+
+
+def test_publishes_new_rows():
+    controller = _controller("history_publish")
+    table = _table("history_publish")
+    history = table.getDoubleArrayTopic("history").subscribe([])
+    controller.enable_history(publish_period=3600)
+    fields = table.getStringArrayTopic("history_fields").subscribe([])
+    assert fields.get() == list(HISTORY_FIELDS)
+
+    assert not controller._publish_history()
+    controller.calculate(0.0, 1.0)
+    controller.calculate(0.0, 2.0)
+    assert controller._publish_history()
+    rows = np.reshape(history.get(), (-1, len(HISTORY_FIELDS)))
+    assert rows[:, 1].tolist() == [1.0, 2.0]
+    # only rows recorded since the last publish are sent
+    controller.calculate(0.0, 3.0)
+    assert controller._publish_history()
+    assert np.reshape(history.get(), (-1, len(HISTORY_FIELDS)))[:, 1].tolist() == [3.0]
+    controller.disable_history()
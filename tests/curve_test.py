@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from lemonlib.util import cubic_curve, curve, linear_curve, ollie_curve
+
+INPUTS = np.linspace(-1, 1, 2001).tolist()
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda **kw: ollie_curve(0.8, 0.05, 0.1, 0.75, **kw),
+        lambda **kw: cubic_curve(1.0, 0.1, 0.05, 0.0, False, **kw),
+        lambda **kw: linear_curve(2.0, 0.0, 0.0, 0.0, **kw),
+    ],
+    ids=["ollie", "cubic", "linear"],
+)
+def test_table_matches_curve(make):
+    exact = make()
+    table = make(table_size=1024)
+    assert table.max_error <= 1e-3
+    for x in INPUTS:
+        if x != 0:
+            assert table(x) == pytest.approx(exact(x), abs=1e-3)
+
+
+def test_outside_table_is_exact():
+    exact = linear_curve(2)
+    table = linear_curve(2, table_size=8)
+    for x in (1.1, -1.1, 1.0001, 3.0):
+        assert table(x) == exact(x)
+    assert table(1.0) == pytest.approx(2.0)
+    assert table(-1.0) == pytest.approx(-2.0)
+
+
+def test_signed_offset_without_deadband():
+    # the exact curve divides by the input, so only nonzero inputs work
+    exact = linear_curve(1.0, 0.2, 0.0, 0.0, False)
+    table = linear_curve(1.0, 0.2, 0.0, 0.0, False, table_size=64)
+    for x in (0.001, -0.001, 0.5, -0.5, 1.0):
+        assert table(x) == pytest.approx(exact(x), abs=1e-3)
+
+
+def test_deadband_is_constant():
+    table = ollie_curve(1.0, 0.1, 0.2, table_size=64)
+    assert table(0.0) == table(0.19) == table(-0.19) == 0.1
+
+
+def test_coarse_table_rejected():
+    with pytest.raises(ValueError, match="table_size"):
+        curve(lambda x: np.sin(20 * x), 0.0, 0.0, 0.0, table_size=8)
+    with pytest.raises(ValueError):
+        linear_curve(table_size=1)
@@ -0,0 +1,98 @@
+import pytest
+
+from components.constants import CONSTANTS_PATH, module_groups
+from lemonlib.ctre import (
+    DeviceMap,
+    ModuleDevices,
+    SimulatedBus,
+    SwerveDiscovery,
+    module_groups_from_ids,
+)
+
+# the layout of constants.json: front left is 2x, back left 1x
+DEVICE_MAP = DeviceMap(
+    "rio",
+    30,
+    {
+        "fl": ModuleDevices(21, 22, 23),
+        "fr": ModuleDevices(31, 32, 33),
+        "bl": ModuleDevices(11, 12, 13),
+        "br": ModuleDevices(41, 42, 43),
+    },
+)
+
+
+def _discovery(bus, tmp_path, groups=None):
+    return SwerveDiscovery(
+        bus,
+        cache_path=tmp_path / "device_map.json",
+        module_groups=module_groups(CONSTANTS_PATH) if groups is None else groups,
+    )
+
+
+def test_module_groups_from_constants():
+    assert module_groups(CONSTANTS_PATH) == {2: "fl", 3: "fr", 1: "bl", 4: "br"}
+
+
+def test_scan_keeps_constants_layout(tmp_path):
+    bus = SimulatedBus.from_device_map(DEVICE_MAP)
+    assert _discovery(bus, tmp_path).scan() == DEVICE_MAP
+
+
+def test_scan_assigns_roles():
+    # steer motor 21 uses the CANcoder, so the higher ID drives
+    bus = SimulatedBus(
+        list(DEVICE_MAP.device_ids()),
+        {21: 23, 32: 33, 12: 13, 42: 43},
+        "rio",
+    )
+    modules = SwerveDiscovery(
+        bus, "unused", module_groups={2: "fl", 3: "fr", 1: "bl", 4: "br"}
+    ).scan().modules
+    assert modules["fl"] == ModuleDevices(22, 21, 23)
+    # no remote sensor configured: the lower ID drives
+    bus.remote_sensors.clear()
+    modules = SwerveDiscovery(
+        bus, "unused", module_groups={2: "fl", 3: "fr", 1: "bl", 4: "br"}
+    ).scan().modules
+    assert modules["fl"] == ModuleDevices(21, 22, 23)
+
+
+def test_scan_requires_module_groups(tmp_path):
+    bus = SimulatedBus.from_device_map(DEVICE_MAP)
+    with pytest.raises(RuntimeError, match="module_groups"):
+        SwerveDiscovery(bus, tmp_path / "device_map.json").scan()
+    with pytest.raises(RuntimeError, match="doesn't match"):
+        _discovery(bus, tmp_path, {1: "fl", 2: "fr", 3: "bl", 5: "br"}).scan()
+
+
+def test_ambiguous_module_groups():
+    with pytest.raises(ValueError, match="tens digit"):
+        module_groups_from_ids({"fl": (21, 22, 33)})
+    with pytest.raises(ValueError, match="both use"):
+        module_groups_from_ids({"fl": (21, 22, 23), "fr": (24, 25, 26)})
+
+
+def test_scan_missing_module(tmp_path):
+    devices = [d for d in DEVICE_MAP.device_ids() if d[1] != 43]
+    with pytest.raises(RuntimeError, match="expected 4"):
+        _discovery(SimulatedBus(devices, canbus="rio"), tmp_path).scan()
+
+
+def test_discover_uses_cache(tmp_path):
+    bus = SimulatedBus.from_device_map(DEVICE_MAP)
+    assert _discovery(bus, tmp_path).discover() == DEVICE_MAP
+    full_scan = bus.probes
+
+    bus.probes = 0
+    assert _discovery(bus, tmp_path).discover() == DEVICE_MAP
+    # only the 13 cached devices are probed
+    assert bus.probes == len(DEVICE_MAP.device_ids()) < full_scan
+
+
+def test_discover_rescans_when_devices_move(tmp_path):
+    _discovery(SimulatedBus.from_device_map(DEVICE_MAP), tmp_path).discover()
+    moved = DEVICE_MAP._replace(pigeon_id=5)
+    bus = SimulatedBus.from_device_map(moved)
+    assert _discovery(bus, tmp_path).discover() == moved
+    assert _discovery(bus, tmp_path).load_cached() == moved
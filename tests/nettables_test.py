@@ -0,0 +1,165 @@
+import socket
+import time
+
+import pytest
+from ntcore import NetworkTableInstance
+from wpimath.geometry import Pose2d, Rotation2d, Translation2d
+from wpimath.kinematics import SwerveModuleState
+
+from lemonlib.smart import SmartNT
+
+
+def _table(name: str):
+    return NetworkTableInstance.getDefault().getTable(name)
+
+
+def test_struct_channels_are_cached():
+    nt = SmartNT("nt_test_cache")
+    channel = nt.struct_channel("pose", Pose2d)
+    assert nt.struct_channel("pose", Pose2d) is channel
+    nt.set_struct("pose", Pose2d(1, 2, Rotation2d(0.5)), Pose2d)
+    subscriber = _table("nt_test_cache").getStructTopic("pose", Pose2d).subscribe(Pose2d())
+    assert subscriber.get().X() == pytest.approx(1.0)
+
+
+def test_struct_channel_type_mismatch():
+    nt = SmartNT("nt_test_mismatch")
+    nt.set_struct_array("states", [SwerveModuleState()] * 4, SwerveModuleState)
+    with pytest.raises(TypeError, match="SwerveModuleState"):
+        nt.set_struct_array("states", [Translation2d()], Translation2d)
+    with pytest.raises(TypeError, match="StructArrayChannel"):
+        nt.struct_channel("states", SwerveModuleState)
+
+
+def test_struct_array_channel_reuses_values():
+    nt = SmartNT("nt_test_array")
+    channel = nt.struct_array_channel("states", SwerveModuleState, 2)
+    values = channel.values
+    channel.publish([SwerveModuleState(1.0, Rotation2d()), SwerveModuleState(2.0, Rotation2d())])
+    assert channel.values is values
+    channel.values[0] = SwerveModuleState(3.0, Rotation2d())
+    channel.publish()
+    topic = _table("nt_test_array").getStructArrayTopic("states", SwerveModuleState)
+    subscriber = topic.subscribe([])
+    assert [state.speed for state in subscriber.get()] == [3.0, 2.0]
+
+
+def test_channel_decimation(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("lemonlib.smart.nettables.time.monotonic", lambda: now[0])
+    channel = SmartNT("nt_test_decimation").struct_channel("pose", Pose2d, 0.1)
+    sent = []
+    for _ in range(50):
+        sent.append(channel.publish(Pose2d()))
+        now[0] += 0.02
+    # one in five loops, starting with the first
+    assert sum(sent) == 10
+    assert sent[:6] == [True, False, False, False, False, True]
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def dashboard(monkeypatch, tmp_path):
+    """Points SmartNT at a fresh NT server and returns a client connected
+    to it, whose writes arrive as remote values."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = NetworkTableInstance.create()
+    server.startServer(str(tmp_path / "networktables.json"), "127.0.0.1", 0, port)
+    client = NetworkTableInstance.create()
+    client.setServer("127.0.0.1", port)
+    client.startClient4("dashboard")
+    _wait_for(client.isConnected)
+    monkeypatch.setattr(NetworkTableInstance, "getDefault", staticmethod(lambda: server))
+    yield client
+    client.stopClient()
+    server.stopServer()
+    NetworkTableInstance.destroy(client)
+    NetworkTableInstance.destroy(server)
+
+
+def test_properties_use_typed_topics():
+    nt = SmartNT("nt_test_typed")
+    nt.add_double_property("speed", lambda: 2, lambda value: None)
+    nt.add_boolean_property("enabled", lambda: True, lambda value: None)
+    nt.add_string_property("mode", lambda: "auto", lambda value: None)
+    assert nt.publish_changes()
+    table = _table("nt_test_typed")
+    assert table.getTopic("speed").getTypeString() == "double"
+    assert table.getTopic("enabled").getTypeString() == "boolean"
+    assert table.getTopic("mode").getTypeString() == "string"
+    assert table.getDoubleTopic("speed").subscribe(0.0).get() == 2.0
+
+
+def test_publish_changes_only_sends_new_values():
+    nt = SmartNT("nt_test_changes")
+    value = [1.0]
+    calls = []
+
+    def getter():
+        calls.append(value[0])
+        return value[0]
+
+    nt.add_double_property("value", getter, lambda v: None)
+    assert nt.publish_changes()
+    assert not nt.publish_changes()
+    value[0] = 3.0
+    assert nt.publish_changes()
+    assert calls == [1.0, 1.0, 3.0]
+
+
+def test_failing_getter_is_skipped():
+    nt = SmartNT("nt_test_getter")
+
+    def getter():
+        raise RuntimeError("sensor unplugged")
+
+    nt.add_double_property("broken", getter, lambda v: None)
+    nt.add_double_property("fine", lambda: 1.0, lambda v: None)
+    assert nt.publish_changes()
+
+
+def test_remote_value_reaches_setter(dashboard):
+    nt = SmartNT("nt_test_remote")
+    received = []
+    gain = [0.5]
+
+    def setter(value):
+        received.append(value)
+        gain[0] = value
+
+    nt.add_double_property("kP", lambda: gain[0], setter)
+    assert nt.publish_changes()
+
+    topic = dashboard.getTable("nt_test_remote").getDoubleTopic("kP")
+    # like a dashboard, only write once the robot's value has arrived;
+    # a write racing the topic announcement can be lost
+    subscriber = topic.subscribe(0.0)
+    _wait_for(lambda: subscriber.get() == 0.5)
+    publisher = topic.publish()
+    publisher.set(2.0)
+    _wait_for(lambda: received)
+    assert received == [2.0]
+    # the dashboard's value isn't echoed back
+    assert not nt.publish_changes()
+    gain[0] = 2.5
+    assert nt.publish_changes()
+
+
+def test_replaced_property_listener_is_released():
+    from lemonlib.smart import nettables
+
+    nt = SmartNT("nt_test_listener")
+    nt.add_double_property("value", lambda: 1.0, lambda value: None)
+    first = nt._properties["value"].listener
+    assert nettables._listeners[first] is nt.nt
+    nt.add_double_property("value", lambda: 2.0, lambda value: None)
+    assert first not in nettables._listeners
+    assert nt._properties["value"].listener in nettables._listeners
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from wpilib import Preferences
+
+from lemonlib.smart import SmartPreference, dispatch_changes
+
+
+def _wait_for(condition, timeout: float = 1.0) -> None:
+    # the listener runs on the NT thread
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "NT listener never ran"
+        time.sleep(0.005)
+
+
+class _Component:
+    pref_speed = SmartPreference(1.5)
+    pref_name = SmartPreference("left")
+
+
+class _LowBandwidth:
+    low_bandwidth = True
+    pref_quiet = SmartPreference(3)
+
+
+def test_reads_are_cached(monkeypatch):
+    component = _Component()
+    assert Preferences.getDouble("pref_speed", 0.0) == 1.5
+
+    def unused(*args):
+        raise AssertionError("read went to Preferences")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Preferences, "getDouble", unused)
+        assert component.pref_speed == 1.5
+    component.pref_speed = 2.0
+    assert component.pref_speed == 2.0
+    assert Preferences.getDouble("pref_speed", 0.0) == 2.0
+
+
+def test_follows_networktables():
+    component = _Component()
+    SmartPreference.has_changed()
+    Preferences.setString("pref_name", "right")
+    _wait_for(lambda: component.pref_name == "right")
+    assert SmartPreference.has_changed()
+    assert not SmartPreference.has_changed()
+
+
+def test_ignores_values_of_another_type():
+    component = _Component()
+    component.pref_speed = 1.5
+    component.pref_name = "left"
+    Preferences.setString("pref_speed", "fast")
+    Preferences.setDouble("pref_name", 2.0)
+    # a later valid write shows the listener has seen the bad ones
+    Preferences.setDouble("pref_speed", 4.0)
+    _wait_for(lambda: component.pref_speed == 4.0)
+    assert component.pref_name == "left"
+
+
+def test_set_checks_type():
+    with pytest.raises(TypeError):
+        _Component().pref_speed = "fast"
+    with pytest.raises(TypeError):
+        SmartPreference([1])
+
+
+def test_low_bandwidth_skips_networktables():
+    component = _LowBandwidth()
+    component.pref_quiet = 4
+    assert component.pref_quiet == 4
+    assert not Preferences.containsKey("pref_quiet")
+
+
+def test_on_change_once_per_loop():
+    component = _Component()
+    component.pref_speed = 1.0
+    dispatch_changes()
+    seen = []
+    handle = SmartPreference.on_change("pref_speed", seen.append)
+    try:
+        Preferences.setDouble("pref_speed", 5.0)
+        Preferences.setDouble("pref_speed", 6.0)
+        _wait_for(lambda: component.pref_speed == 6.0)
+        assert seen == []
+        dispatch_changes()
+        assert seen == [6.0]
+    finally:
+        SmartPreference.remove_on_change(handle)
+    Preferences.setDouble("pref_speed", 7.0)
+    _wait_for(lambda: component.pref_speed == 7.0)
+    dispatch_changes()
+    assert seen == [6.0]
@@ -0,0 +1,56 @@
+import pytest
+
+from lemonlib.smart import SmartProfile
+
+TURRET_GAINS = {
+    "kP": 1.0,
+    "kI": 0.0,
+    "kD": 0.0,
+    "kS": 0.1,
+    "kV": 0.5,
+    "kMaxV": 2.0,
+    "kMaxA": 4.0,
+}
+
+
+def test_pid_controller_follows_gain_edits():
+    profile = SmartProfile("bind_pid", {"kP": 1.0, "kI": 0.0, "kD": 0.0}, False)
+    controller = profile.create_pid_controller("bind_pid", False)
+    assert controller.calculate(0.0, 1.0) == pytest.approx(1.0)
+    profile.set_gain("kP", 3.0)
+    assert controller.calculate(0.0, 1.0) == pytest.approx(3.0)
+
+
+def test_flywheel_controller_follows_gain_edits():
+    profile = SmartProfile(
+        "bind_flywheel", {"kP": 1.0, "kI": 0.0, "kD": 0.0, "kS": 0.1, "kV": 0.5}, False
+    )
+    controller = profile.create_flywheel_controller("bind_flywheel", False)
+    assert controller.calculate(1.0, 2.0) == pytest.approx(1.0 + 0.1 + 0.5 * 2.0)
+    profile.set_gain("kP", 2.0)
+    profile.set_gain("kV", 0.25)
+    assert controller.calculate(1.0, 2.0) == pytest.approx(2.0 + 0.1 + 0.25 * 2.0)
+
+
+@pytest.mark.parametrize(
+    "gain, value",
+    [("kP", 4.0), ("kV", 1.5), ("kMaxV", 0.5), ("kMaxA", 1.0)],
+)
+def test_turret_controller_follows_gain_edits(gain, value):
+    profile = SmartProfile(f"bind_turret_{gain}", dict(TURRET_GAINS), False)
+    controller = profile.create_turret_controller("bind_turret", False)
+    unedited = _outputs(profile.create_turret_controller("bind_turret_unedited", False))
+
+    profile.set_gain(gain, value)
+    edited = SmartProfile(
+        f"bind_turret_{gain}_new", dict(TURRET_GAINS, **{gain: value}), False
+    )
+    rebuilt = _outputs(edited.create_turret_controller("bind_turret_new", False))
+    # built before the edit, but calculates like one built after it
+    outputs = _outputs(controller)
+    assert outputs == pytest.approx(rebuilt)
+    assert outputs != pytest.approx(unedited)
+
+
+def _outputs(controller, steps: int = 50) -> list[float]:
+    return [controller.calculate(0.0, 1.0) for _ in range(steps)]
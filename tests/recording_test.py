@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+from wpilib.simulation import GenericHIDSim
+
+from lemonlib import LemonInput
+from lemonlib.recording import HEADER, InputPlayer, InputRecorder
+
+PORT = 2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [10.0]
+    monkeypatch.setattr(
+        "lemonlib.recording.Timer", SimpleNamespace(getFPGATimestamp=lambda: now[0])
+    )
+    return now
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    monkeypatch.setattr(LemonInput, "_loop", None)
+    sim = GenericHIDSim(PORT)
+    sim.setAxisCount(6)
+    sim.setButtonCount(16)
+    sim.setPOVCount(1)
+    return sim
+
+
+def _set(sim, axes, buttons: int, pov: int) -> None:
+    for axis, value in enumerate(axes):
+        sim.setRawAxis(axis, value)
+    for button in range(1, 17):
+        sim.setRawButton(button, bool(buttons >> (button - 1) & 1))
+    sim.setPOV(pov)
+    sim.notifyNewData()
+
+
+# time (exact in binary, so sampling at it hits the record), axes, buttons, POV
+FRAMES = [
+    (0.0, [0.0, 0.0, 0.0, 0.0, 0.0, 0.0], 0b0000, -1),
+    (0.25, [0.5, -1.0, 0.25, 0.0, 0.0, 1.0], 0b0001, 90),
+    (0.5, [1.0, -0.5, 0.25, 0.0, 0.0, 1.0], 0b1001, 90),
+]
+
+
+def _record(path, sim, clock) -> InputRecorder:
+    recorder = InputRecorder(LemonInput(PORT, "Xbox"), path)
+    for t, axes, buttons, pov in FRAMES:
+        clock[0] = 10.0 + t
+        _set(sim, axes, buttons, pov)
+        recorder.record()
+    recorder.close()
+    return recorder
+
+
+def test_round_trip(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    recorder = _record(path, sim, clock)
+    assert recorder.records == 3
+    assert path.stat().st_size == HEADER.size + 3 * (8 + 6 * 4 + 4 + 2)
+
+    player = InputPlayer(path)
+    assert (player.axis_count, player.button_count) == (6, 16)
+    assert player.duration == 0.5
+    for t, axes, buttons, pov in FRAMES:
+        sample = player.sample(t)
+        assert sample[0] == buttons
+        assert sample[1] == pytest.approx(axes)
+        assert sample[2] == pov
+
+
+def test_interpolates_axes_and_holds_buttons(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    _record(path, sim, clock)
+    player = InputPlayer(path)
+    buttons, axes, pov = player.sample(0.375)
+    assert axes[:2] == pytest.approx([0.75, -0.75])
+    assert (buttons, pov) == (0b0001, 90)
+    # before the start and past the end: released and centered
+    assert player.sample(-0.01) == (0, [0.0] * 6, -1)
+    assert player.sample(0.75) == (0, [0.0] * 6, -1)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "auto.inputs"
+    path.write_bytes(HEADER.pack(b"WPIL", 1, 6, 16))
+    with pytest.raises(ValueError, match="input recording"):
+        InputPlayer(path)
+
+
+def test_playback_drives_controller(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    _record(path, sim, clock)
+    player = InputPlayer(path)
+    joystick = LemonInput(PORT, "Xbox")
+    joystick.set_source(player.sample_now)
+    assert joystick.snapshot() == (0, [0.0] * 6, -1)
+
+    player.start()
+    clock[0] += 0.25
+    assert joystick.getLeftX() == pytest.approx(0.5)
+    assert joystick.getAButton()
+    assert not player.finished()
+    clock[0] += 0.5
+    assert player.finished()
+
+
+def test_play_sim(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    _record(path, sim, clock)
+    _set(sim, [0.0] * 6, 0, -1)
+    InputPlayer(path).play_sim(sim, 0.5)
+    joystick = LemonInput(PORT, "Xbox")
+    assert joystick.getRawAxis(0) == pytest.approx(1.0)
+    assert joystick.getRawButton(1) and joystick.getRawButton(4)
+    assert joystick.getPOV() == 90
+
+
+def test_truncated_recording(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    _record(path, sim, clock)
+    # power lost halfway through writing the last record
+    path.write_bytes(path.read_bytes()[:-20])
+    player = InputPlayer(path)
+    assert len(player.times) == 2
+    assert player.duration == 0.25
+
+
+def test_flushes_while_recording(tmp_path, sim, clock):
+    path = tmp_path / "auto.inputs"
+    recorder = InputRecorder(LemonInput(PORT, "Xbox"), path, flush_period=0.5)
+    for t, axes, buttons, pov in FRAMES:
+        clock[0] = 10.0 + t
+        _set(sim, axes, buttons, pov)
+        recorder.record()
+    # readable without close()
+    assert InputPlayer(path).duration == 0.5
+    recorder.close()
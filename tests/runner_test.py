@@ -0,0 +1,94 @@
+import pytest
+
+from lemonlib.simulation import runner
+from lemonlib.simulation.runner import (
+    SimResult,
+    SimScenario,
+    main,
+    run_scenario,
+    run_scenarios,
+)
+
+
+def test_unknown_phase_is_an_error(monkeypatch):
+    monkeypatch.chdir(".")
+    result = run_scenario(SimScenario("bad", phases=(("warmup", 1.0),)), "robot.py")
+    assert not result.ok
+    assert "Unknown phase 'warmup'" in result.error
+    assert result.loops == 0
+
+
+def test_unchecked_pyfrc_version(monkeypatch):
+    monkeypatch.setattr(runner.importlib.metadata, "version", lambda name: "2099.1.0")
+    with pytest.raises(RuntimeError, match="pyfrc 2099.1.0 is installed"):
+        runner._attach_physics(object, ".")
+
+
+def test_main_builds_scenarios(monkeypatch, capsys):
+    calls = []
+
+    def fake_run(scenarios, robot_file, processes):
+        calls.append((scenarios, robot_file, processes))
+        return [
+            SimResult(s, sim_time=15.5, wall_time=1.0, error="crashed" if s.seed else None)
+            for s in scenarios
+        ]
+
+    monkeypatch.setattr(runner, "run_scenarios", fake_run)
+    code = main(
+        [
+            "--robot", "other/robot.py",
+            "--auto", "Left", "--auto", "Right",
+            "--alliance", "red", "blue",
+            "--seeds", "2",
+            "--disabled", "1",
+            "--auto-time", "10",
+            "--teleop-time", "5",
+            "--processes", "3",
+        ]
+    )
+    scenarios, robot_file, processes = calls[0]
+    assert (robot_file, processes) == ("other/robot.py", 3)
+    assert [s.name for s in scenarios[:4]] == [
+        "Left/red/0",
+        "Left/red/1",
+        "Left/blue/0",
+        "Left/blue/1",
+    ]
+    assert len(scenarios) == 8
+    assert {(s.auto_mode, s.alliance, s.seed) for s in scenarios} == {
+        (auto, alliance, seed)
+        for auto in ("Left", "Right")
+        for alliance in ("red", "blue")
+        for seed in (0, 1)
+    }
+    assert all(
+        list(s.phases) == [("disabled", 1.0), ("autonomous", 10.0), ("teleop", 5.0)]
+        for s in scenarios
+    )
+    # seed 1 "crashed" in every case
+    assert code == 1
+    assert "8 scenarios, 124.0s simulated" in capsys.readouterr().out
+
+
+def test_main_defaults(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        runner, "run_scenarios", lambda scenarios, *args: calls.append(scenarios) or []
+    )
+    assert main([]) == 0
+    (scenario,) = calls[0]
+    assert scenario.name == "default/blue/0"
+    assert (scenario.auto_mode, scenario.alliance) == (None, "blue")
+    assert list(scenario.phases) == [("disabled", 0.5), ("autonomous", 15.0)]
+
+
+def test_crashed_worker_becomes_error_result(tmp_path):
+    # dies in native code as far as the pool can tell
+    robot = tmp_path / "robot.py"
+    robot.write_text("import os\nos._exit(3)\n")
+    scenario = SimScenario("crash", phases=(("disabled", 0.1),))
+    (result,) = run_scenarios([scenario], str(robot), processes=1)
+    assert result.scenario == scenario
+    assert not result.ok
+    assert "BrokenProcessPool" in result.error
@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pytest
+from wpimath import applyDeadband
+
+from lemonlib.util import (
+    Curve,
+    Deadband,
+    RadialDeadband,
+    Scale,
+    SlewRate,
+    Snap,
+    compile_shaper,
+)
+
+GRID = np.linspace(-1.0, 1.0, 41)
+
+PIPELINES = {
+    "deadband": ([Deadband(0.1)], [Deadband(0.05, axes="x")]),
+    "radial": ([RadialDeadband(0.1), Curve(2)], []),
+    "curves": ([Curve(2), Curve(3, 0.5, axes="y")], [Curve(1.5), Curve(1, 2.0)]),
+    "mapping": ([Curve(mapping=math.sin)], [Curve(mapping=lambda v: v / 2, axes="x")]),
+    "snap": ([Snap(), Scale(4.0)], [Scale(0.5, 0.5)]),
+    "slew": ([Deadband(0.05), SlewRate(5.0)], [SlewRate(2.0, 0.01, axes="x")]),
+}
+
+
+def _samples():
+    lx, ly = np.meshgrid(GRID, GRID[::-1])
+    return lx.ravel(), ly.ravel(), -ly.ravel(), lx.ravel() / 2
+
+
+@pytest.mark.parametrize("left, right", PIPELINES.values(), ids=PIPELINES.keys())
+def test_array_matches_scalar(left, right):
+    shape = compile_shaper(left, right)
+    samples = _samples()
+    expected = np.array([shape(*sample) for sample in zip(*samples)]).T
+    np.testing.assert_allclose(shape.array(*samples), expected, atol=1e-12)
+
+
+def test_deadband_matches_wpimath():
+    shape = compile_shaper([Deadband(0.1)])
+    for value in GRID:
+        assert shape(value, value)[0] == pytest.approx(applyDeadband(value, 0.1))
+
+
+def test_radial_deadband_keeps_direction():
+    shape = compile_shaper([RadialDeadband(0.2)])
+    assert shape(0.1, 0.1)[:2] == (0.0, 0.0)
+    x, y, _, _ = shape(0.5, 0.5)
+    assert x == pytest.approx(y)
+    assert math.hypot(x, y) == pytest.approx((math.hypot(0.5, 0.5) - 0.2) / 0.8)
+    # clamped to the unit circle
+    assert math.hypot(*shape(1.0, 1.0)[:2]) == pytest.approx(1.0)
+
+
+def test_curves_keep_sign():
+    shape = compile_shaper([Curve(2), Curve(3, axes="y")], [Curve(2.5)])
+    assert shape(-0.5, -0.5, -0.5) == pytest.approx((-0.25, -(0.25 ** 3), -(0.5 ** 2.5), 0.0))
+
+
+def test_snap_keeps_larger_axis():
+    shape = compile_shaper([Snap()])
+    assert shape(0.3, -0.6)[:2] == (0.0, -0.6)
+    assert shape(0.7, 0.2)[:2] == (0.7, 0.0)
+    assert shape(0.5, 0.5)[:2] == (0.0, 0.0)
+
+
+def test_slew_rate_and_reset():
+    shape = compile_shaper([SlewRate(5.0)])
+    assert [shape(1.0, 0.0)[0] for _ in range(3)] == pytest.approx([0.1, 0.2, 0.3])
+    # the array version keeps its own state
+    np.testing.assert_allclose(shape.array(np.ones(3), np.zeros(3))[0], [0.1, 0.2, 0.3])
+    assert shape(1.0, 0.0)[0] == pytest.approx(0.4)
+    shape.reset()
+    assert shape(-1.0, 0.0)[0] == pytest.approx(-0.1)
+    np.testing.assert_allclose(shape.array([1.0], [0.0])[0], [0.1])
+
+
+def test_generated_source():
+    shape = compile_shaper([Deadband(0.1, axes="x")])
+    assert shape.source.startswith("def shape(lx, ly, rx=0.0, ry=0.0):")
+    assert "Deadband" in shape.source
+    assert "ly" not in shape.source.split("\n", 1)[1].replace("return lx, ly", "")
@@ -0,0 +1,85 @@
+import json
+import time
+from pathlib import Path
+
+from ntcore import NetworkTableInstance
+from wpilib import Preferences, getOperatingDirectory
+
+from lemonlib.smart import GainStore, SmartProfile
+
+
+def _store(path: Path, **kwargs) -> GainStore:
+    # flushed by hand below
+    return GainStore(path, flush_period=3600, **kwargs)
+
+
+def _wait_for(condition, timeout: float = 1.0) -> None:
+    # published from the telemetry thread
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_gains_survive_restart(tmp_path):
+    path = tmp_path / "gains.json"
+    store = _store(path)
+    profile = SmartProfile("store_restart", {"kP": 1.0, "kD": 0.0}, True, store)
+    profile.set_gain("kP", 2.5)
+    store.close()
+    assert json.loads(path.read_text()) == {
+        "default": {"store_restart": {"kD": 0.0, "kP": 2.5}}
+    }
+    assert not path.with_suffix(".tmp").exists()
+
+    store = _store(path)
+    profile = SmartProfile("store_restart", {"kP": 1.0, "kD": 0.0}, True, store)
+    assert profile.gains == {"kP": 2.5, "kD": 0.0}
+    store.close()
+
+
+def test_preferences_only_migrated_once(tmp_path):
+    path = tmp_path / "gains.json"
+    Preferences.setDouble("store_migrate_kP", 4.0)
+    store = _store(path)
+    profile = SmartProfile("store_migrate", {"kP": 1.0}, True, store)
+    assert profile.gains["kP"] == 4.0
+    profile.set_gain("kP", 5.0)
+    store.close()
+    # the store doesn't write the old key back
+    assert Preferences.getDouble("store_migrate_kP", 0.0) == 4.0
+
+    store = _store(path)
+    assert SmartProfile("store_migrate", {"kP": 1.0}, True, store).gains["kP"] == 5.0
+    store.close()
+
+
+def test_gain_sets(tmp_path):
+    store = _store(tmp_path / "gains.json")
+    profile = SmartProfile("store_sets", {"kP": 1.0}, True, store)
+    store.save_set("practice")
+    profile.set_gain("kP", 3.0)
+    store.use_set("practice")
+    assert profile.gains["kP"] == 1.0
+    assert store.gain_sets == ["default", "practice"]
+    store.close()
+
+
+def test_default_path_is_stable():
+    # the same file in every sim session, and never committed
+    first = GainStore(flush_period=3600)
+    second = GainStore(flush_period=3600)
+    assert first.path == second.path == Path(getOperatingDirectory()) / "gains.json"
+    first.close()
+    second.close()
+
+
+def test_gains_synced_to_networktables(tmp_path):
+    store = _store(tmp_path / "gains.json")
+    profile = SmartProfile("store_nt", {"kP": 1.0}, True, store)
+    table = NetworkTableInstance.getDefault().getTable("SmartDashboard/SmartProfile/store_nt")
+    entry = table.getDoubleTopic("kP").subscribe(0.0)
+    _wait_for(lambda: entry.get() == 1.0)
+    profile.set_gain("kP", 2.0)
+    _wait_for(lambda: entry.get() == 2.0)
+    store.close()
@@ -0,0 +1,84 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+from wpimath.geometry import Pose2d, Rotation2d
+from wpimath.kinematics import ChassisSpeeds, SwerveModuleState
+
+from lemonlib.drive import SwerveStateHistory
+
+
+def _state(t: float, x: float = None, heading: float = 0.0, speed: float = 0.0):
+    """A stand-in for SwerveDrivetrain.SwerveDriveState."""
+    x = t if x is None else x
+    return SimpleNamespace(
+        timestamp=t,
+        pose=Pose2d(x, 2 * x, Rotation2d(heading)),
+        speeds=ChassisSpeeds(x, 0.0, heading),
+        module_states=[SwerveModuleState(speed, Rotation2d(heading))] * 4,
+    )
+
+
+def _fill(history: SwerveStateHistory, times) -> None:
+    for t in times:
+        history.record(_state(t))
+
+
+@pytest.mark.parametrize("written", [3, 8, 21], ids=["partial", "full", "wrapped"])
+def test_sample_finds_surrounding_records(written):
+    history = SwerveStateHistory(8)
+    _fill(history, range(written))
+    oldest = max(0, written - 8)
+    assert len(history) == written - oldest
+    for t in range(oldest, written):
+        assert history.sample(t).pose.X() == pytest.approx(t)
+        if t + 1 < written:
+            sample = history.sample(t + 0.25)
+            assert sample.timestamp == pytest.approx(t + 0.25)
+            assert sample.pose.X() == pytest.approx(t + 0.25)
+            assert sample.pose.Y() == pytest.approx(2 * (t + 0.25))
+            assert sample.speeds.vx == pytest.approx(t + 0.25)
+    assert history.sample(oldest - 0.5) is None
+
+
+def test_sample_past_newest_returns_newest():
+    history = SwerveStateHistory(4)
+    assert history.latest() is None
+    _fill(history, [1.0, 2.0])
+    sample = history.sample(10.0)
+    assert sample.timestamp == 2.0
+    assert history.latest().pose == sample.pose
+
+
+def test_interpolates_angles_across_wrap():
+    history = SwerveStateHistory(4)
+    history.record(_state(0.0, 0.0, math.radians(170), speed=1.0))
+    history.record(_state(1.0, 0.0, math.radians(-170), speed=3.0))
+    sample = history.sample(0.5)
+    assert abs(sample.pose.rotation().degrees()) == pytest.approx(180)
+    module = sample.module_states[0]
+    assert module.speed == pytest.approx(2.0)
+    assert abs(module.angle.degrees()) == pytest.approx(180)
+
+
+def test_ignores_out_of_order_states():
+    history = SwerveStateHistory(4)
+    _fill(history, [1.0, 2.0, 1.5, 2.0])
+    assert len(history) == 2
+
+
+def test_read_new_batches():
+    history = SwerveStateHistory(4)
+    _fill(history, [0.0, 1.0])
+    assert history.read_new().timestamp.tolist() == [0.0, 1.0]
+    assert len(history.read_new().timestamp) == 0
+    # more than capacity in between: only the newest are kept
+    _fill(history, [2.0, 3.0, 4.0, 5.0, 6.0])
+    batch = history.read_new()
+    assert batch.timestamp.tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert batch.x.tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert batch.module_speeds.shape == (4, 4)
+
+    history.clear()
+    assert len(history) == 0
+    assert history.sample(5.0) is None
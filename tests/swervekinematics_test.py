@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+import pytest
+from wpimath.geometry import Rotation2d, Translation2d
+from wpimath.kinematics import (
+    ChassisSpeeds,
+    SwerveDrive4Kinematics,
+    SwerveModuleState,
+)
+
+from lemonlib.drive import SwerveKinematics
+
+LOCATIONS = [
+    Translation2d(0.3, 0.3),
+    Translation2d(0.3, -0.3),
+    Translation2d(-0.3, 0.3),
+    Translation2d(-0.3, -0.3),
+]
+
+# vx, vy, omega
+SPEEDS = np.array(
+    [
+        [1.0, 0.0, 0.0],
+        [0.0, -2.0, 0.0],
+        [0.5, 0.5, 1.0],
+        [-1.5, 0.2, -3.0],
+    ]
+)
+
+
+@pytest.fixture
+def kinematics():
+    return SwerveKinematics(LOCATIONS)
+
+
+@pytest.mark.parametrize("cor", [None, Translation2d(0.3, 0.3)], ids=["center", "corner"])
+def test_inverse_matches_wpilib(kinematics, cor):
+    wpilib_kinematics = SwerveDrive4Kinematics(*LOCATIONS)
+    speeds, angles = kinematics.to_module_states(*SPEEDS.T, center_of_rotation=cor)
+    assert speeds.shape == angles.shape == (len(SPEEDS), 4)
+    for row, (vx, vy, omega) in enumerate(SPEEDS):
+        states = wpilib_kinematics.toSwerveModuleStates(
+            ChassisSpeeds(vx, vy, omega), cor or Translation2d()
+        )
+        for module, state in enumerate(states):
+            assert speeds[row, module] == pytest.approx(state.speed, abs=1e-9)
+            if state.speed > 1e-9:
+                assert math.cos(angles[row, module] - state.angle.radians()) == pytest.approx(1.0)
+
+
+def test_forward_round_trip(kinematics):
+    speeds, angles = kinematics.to_module_states(*SPEEDS.T)
+    vx, vy, omega = kinematics.to_chassis_speeds(speeds, angles)
+    np.testing.assert_allclose(np.stack([vx, vy, omega], axis=1), SPEEDS, atol=1e-9)
+    # a single set of module states
+    vx, vy, omega = kinematics.to_chassis_speeds(speeds[2], angles[2])
+    assert vx.shape == (1,)
+    assert (vx[0], vy[0], omega[0]) == pytest.approx(tuple(SPEEDS[2]))
+
+
+def test_center_of_rotation_doesnt_change_forward(kinematics):
+    kinematics.to_module_states(1.0, 0.0, 1.0, Translation2d(1.0, 0.0))
+    speeds, angles = kinematics.to_module_states(*SPEEDS.T)
+    vx, _, _ = kinematics.to_chassis_speeds(speeds, angles)
+    np.testing.assert_allclose(vx, SPEEDS[:, 0], atol=1e-9)
+
+
+def test_desaturate_keeps_ratios():
+    speeds = np.array([[1.0, -4.0, 2.0, 0.0], [1.0, 1.0, 1.0, 1.0]])
+    out = SwerveKinematics.desaturate(speeds, 2.0)
+    np.testing.assert_allclose(out, [[0.5, -2.0, 1.0, 0.0], [1.0, 1.0, 1.0, 1.0]])
+
+
+@pytest.mark.parametrize(
+    "speed, angle, current",
+    [
+        (1.0, 0.0, 0.0),
+        (1.0, math.radians(170), 0.0),
+        (-2.0, math.radians(-100), math.radians(45)),
+        (1.5, math.radians(179), math.radians(-179)),
+        (0.5, math.radians(90), math.radians(-60)),
+    ],
+)
+def test_optimize_matches_wpilib(speed, angle, current):
+    state = SwerveModuleState(speed, Rotation2d(angle))
+    state.optimize(Rotation2d(current))
+    speeds, angles = SwerveKinematics.optimize([[speed]], [[angle]], current)
+    assert speeds[0, 0] == pytest.approx(state.speed)
+    assert math.cos(angles[0, 0] - state.angle.radians()) == pytest.approx(1.0)
+    assert -math.pi <= angles[0, 0] < math.pi
+    # never turns more than 90 degrees
+    assert math.cos(angles[0, 0] - current) >= -1e-9
+
+
+def test_optimize_holds_stopped_modules():
+    speeds, angles = SwerveKinematics.optimize(
+        [[0.0, 1.0]], [[0.0, 0.0]], [4.0, 0.0]
+    )
+    np.testing.assert_allclose(speeds, [[0.0, 1.0]])
+    assert angles[0, 0] == pytest.approx(4.0 - 2 * math.pi)
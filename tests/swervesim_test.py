@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pytest
+from wpimath.geometry import Pose2d, Rotation2d
+
+from components.constants import LemonSwerveConstants
+from lemonlib.simulation import SwerveDriveSim
+
+DT = 0.02
+
+
+@pytest.fixture
+def sim():
+    constants = LemonSwerveConstants()
+    return SwerveDriveSim(None, [constants.FL, constants.FR, constants.BL, constants.BR])
+
+
+def _drive(sim: SwerveDriveSim, drive_volts, steer_volts=0.0, seconds: float = 2.0):
+    """Runs the sim with constant voltages, returning the chassis speeds
+    (field frame) after each loop."""
+    speeds = []
+    for _ in range(round(seconds / DT)):
+        sim.step(
+            np.broadcast_to(drive_volts, (4,)), np.broadcast_to(steer_volts, (4,)), DT
+        )
+        speeds.append((sim.vx, sim.vy, sim.omega))
+    return np.array(speeds)
+
+
+def test_pose_integrates_velocity(sim):
+    speeds = _drive(sim, 3.0)
+    # reaches a steady speed below the wheels' free speed
+    assert speeds[-1, 0] == pytest.approx(speeds[-2, 0], rel=1e-3)
+    free_speed = 3.0 * sim._drive_k_volts[0] / sim._drive_damping[0] * sim.wheel_radius[0]
+    assert 0 < speeds[-1, 0] <= free_speed
+    # the position is the integral of the velocity
+    assert sim.x == pytest.approx(speeds[:, 0].sum() * DT, rel=0.02)
+    assert sim.y == pytest.approx(0.0, abs=1e-9)
+    assert not sim.slipping.any()
+
+
+@pytest.mark.parametrize("steer", [0.0, math.pi / 2, -3 * math.pi / 4])
+def test_translation_keeps_heading(sim, steer):
+    sim.reset(Pose2d(1.0, 2.0, Rotation2d(0.5)))
+    sim.steer_angle[:] = steer
+    _drive(sim, 2.0)
+    pose = sim.get_pose()
+    assert pose.rotation().radians() == pytest.approx(0.5, abs=1e-9)
+    travelled = math.atan2(pose.Y() - 2.0, pose.X() - 1.0)
+    # modules point relative to the robot
+    assert math.cos(travelled - (steer + 0.5)) == pytest.approx(1.0)
+    robot = sim.get_speeds()
+    assert robot.omega == pytest.approx(0.0, abs=1e-9)
+    assert math.atan2(robot.vy, robot.vx) == pytest.approx(steer)
+
+
+def test_modules_respond_to_commands(sim):
+    _drive(sim, [2.0, 2.0, -2.0, -2.0], [1.0, 0.0, -1.0, 0.0], seconds=0.2)
+    assert sim.steer_angle[0] > 0 > sim.steer_angle[2]
+    assert sim.steer_angle[1] == sim.steer_angle[3] == 0.0
+    assert sim.wheel_velocity[0] > 0 > sim.wheel_velocity[2]
+    # with no voltage the modules coast down
+    spinning = sim.steer_velocity.copy()
+    _drive(sim, 0.0, 0.0, seconds=0.5)
+    assert np.all(np.abs(sim.steer_velocity) < np.abs(spinning) + 1e-12)
+    assert np.abs(sim.steer_velocity[0]) < 0.01 * np.abs(spinning[0])
+
+
+def test_spins_in_place(sim):
+    # every module tangent to the circle through it, driving counter-clockwise
+    sim.steer_angle[:] = np.arctan2(sim.location_x, -sim.location_y)
+    speeds = _drive(sim, 2.0, seconds=1.0)
+    assert speeds[-1, 2] > 0
+    assert math.hypot(sim.x, sim.y) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_wheels_slip_past_friction(sim):
+    sim.wheel_cof = 0.05
+    sim._max_wheel_force = sim.wheel_cof * sim._module_mass * 9.81
+    _drive(sim, 12.0, seconds=0.1)
+    assert sim.slipping.all()
+    # the chassis can't accelerate faster than friction allows
+    assert sim.vx <= 0.05 * 9.81 * 0.1 + 1e-9
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from lemonlib.smart.telemetry import TelemetryScheduler, _Task
+
+
+def _scheduler(tasks: dict[str, tuple[float, float]]) -> tuple[TelemetryScheduler, dict]:
+    """A scheduler without its thread, holding one task per name added at
+    (period, time added)."""
+    scheduler = TelemetryScheduler()
+    named = {}
+    for name, (period, now) in tasks.items():
+        named[name] = _Task(lambda: False, period)
+        scheduler._schedule(named[name], now)
+    return scheduler, named
+
+
+def _deadlines(scheduler: TelemetryScheduler) -> dict[_Task, float]:
+    return {task: deadline for deadline, _, task in scheduler._queue}
+
+
+def test_deadlines_aligned_to_period():
+    scheduler, tasks = _scheduler(
+        {"a": (0.02, 10.003), "b": (0.02, 10.011), "slow": (0.1, 10.011)}
+    )
+    deadlines = _deadlines(scheduler)
+    assert deadlines[tasks["a"]] == deadlines[tasks["b"]] == pytest.approx(10.02)
+    assert deadlines[tasks["slow"]] == pytest.approx(10.1)
+
+
+def test_slower_periods_run_on_shared_ticks():
+    scheduler, tasks = _scheduler({"fast": (0.02, 10.0), "slow": (0.1, 10.0)})
+    runs = {task: [] for task in tasks.values()}
+    ticks = 0
+    now = 10.0
+    while now < 11.0 - 1e-9:
+        now = min(deadline for deadline, _, _ in scheduler._queue)
+        for task in scheduler._pop_due(now):
+            runs[task].append(now)
+        ticks += 1
+    # the slow task never wakes the thread on its own
+    assert ticks == len(runs[tasks["fast"]]) == 51
+    assert len(runs[tasks["slow"]]) == 11
+    assert set(runs[tasks["slow"]]) <= set(runs[tasks["fast"]])
+
+
+def test_stall_skips_missed_deadlines():
+    scheduler, tasks = _scheduler({"a": (0.02, 10.0)})
+    assert scheduler._pop_due(10.075) == [tasks["a"]]
+    assert _deadlines(scheduler)[tasks["a"]] == pytest.approx(10.08)
+    assert scheduler._pop_due(10.079) == []
+
+
+def test_removed_task_is_dropped():
+    scheduler, tasks = _scheduler({"a": (0.02, 10.0)})
+    scheduler.remove(tasks["a"])
+    assert len(scheduler) == 0
+    assert scheduler._pop_due(10.1) == []
+    assert scheduler._queue == []
+
+
+def test_thread_runs_callbacks():
+    scheduler = TelemetryScheduler()
+    ran = threading.Event()
+    task = scheduler.add(lambda: ran.set() or True, 0.01)
+    assert ran.wait(1.0)
+    scheduler.remove(task)
+    with pytest.raises(ValueError):
+        scheduler.add(lambda: False, 0)
@@ -0,0 +1,104 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from lemonlib.drive import SwerveTrajectory
+
+SAMPLES = [
+    # t, x, y, heading, vx, vy, omega
+    (0.0, 1.0, 2.0, 0.0, 0.0, 0.0, 0.0),
+    (0.5, 1.5, 2.0, 0.5, 2.0, 0.0, 1.0),
+    (1.0, 2.5, 2.5, 1.0, 2.0, 1.0, 1.0),
+]
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+    return path
+
+
+@pytest.fixture(params=["choreo_2025", "choreo_legacy", "csv"])
+def trajectory_file(request, tmp_path):
+    if request.param == "choreo_2025":
+        return _write(
+            tmp_path / "path.traj",
+            {
+                "name": "path",
+                "trajectory": {
+                    "samples": [
+                        dict(zip(("t", "x", "y", "heading", "vx", "vy", "omega"), s))
+                        for s in SAMPLES
+                    ]
+                },
+            },
+        )
+    if request.param == "choreo_legacy":
+        return _write(
+            tmp_path / "path.traj",
+            {
+                "samples": [
+                    dict(
+                        zip(
+                            (
+                                "timestamp",
+                                "x",
+                                "y",
+                                "heading",
+                                "velocityX",
+                                "velocityY",
+                                "angularVelocity",
+                            ),
+                            s,
+                        )
+                    )
+                    for s in SAMPLES
+                ]
+            },
+        )
+    path = tmp_path / "path.csv"
+    path.write_text(
+        "t,x,y,heading,vx,vy,omega\n"
+        + "".join(",".join(str(v) for v in s) + "\n" for s in SAMPLES)
+    )
+    return path
+
+
+def test_load(trajectory_file):
+    trajectory = SwerveTrajectory.load(str(trajectory_file))
+    np.testing.assert_array_equal(trajectory.samples, SAMPLES)
+    assert trajectory.name == "path"
+    assert trajectory.dt == pytest.approx(0.5)
+    assert trajectory.total_time == 1.0
+
+
+def test_sample_interpolates_and_clamps():
+    trajectory = SwerveTrajectory(np.array(SAMPLES))
+    sample = trajectory.sample(0.75)
+    assert sample.x == pytest.approx(2.0)
+    assert sample.y == pytest.approx(2.25)
+    assert sample.heading == pytest.approx(0.75)
+    assert sample.vy == pytest.approx(0.5)
+    assert trajectory.sample(-1.0) == trajectory.sample(0.0)
+    assert trajectory.sample(5.0).x == 2.5
+    assert trajectory.is_finished(1.0)
+
+
+def test_uniform_and_uneven_lookup_agree():
+    times = np.linspace(0, 2, 101)
+    uniform = np.column_stack([times] + [np.sin(times * (k + 1)) for k in range(6)])
+    uneven = uniform.copy()
+    uneven[:, 0] = times + 0.002 * np.sin(times * 50)
+    assert SwerveTrajectory(uniform).dt is not None
+    assert SwerveTrajectory(uneven).dt is None
+    for trajectory in (SwerveTrajectory(uniform), SwerveTrajectory(uneven)):
+        for t in np.linspace(-0.1, 2.1, 301):
+            index = np.searchsorted(trajectory.times, t, side="right") - 1
+            assert trajectory._index(t) == min(max(index, 0), len(trajectory) - 1)
+
+
+def test_heading_interpolates_across_wrap():
+    samples = np.array([(0.0, 0, 0, math.pi - 0.1, 0, 0, 0), (1.0, 0, 0, -math.pi + 0.1, 0, 0, 0)])
+    heading = SwerveTrajectory(samples).sample(0.5).heading
+    assert math.cos(heading) == pytest.approx(-1.0)
@@ -0,0 +1,134 @@
+import concurrent.futures
+
+import numpy as np
+import pytest
+
+from lemonlib.simulation import tuner
+from lemonlib.simulation.tuner import (
+    GainTuner,
+    MotorPlant,
+    SignalTest,
+    TuneResult,
+    format_table,
+)
+from lemonlib.smart import SmartProfile
+
+PLANT = MotorPlant("krakenX60", moi=0.01, gearing=1.0, mode="velocity")
+STEP = SignalTest("step", "step", 10.0, duration=1.0)
+PERIOD = 0.02
+
+
+class _Constant:
+    """A controller that always outputs the same voltage."""
+
+    def __init__(self, output: float):
+        self.output = output
+
+    def calculate(self, measurement, reference):
+        return self.output
+
+
+@pytest.fixture
+def pool():
+    with concurrent.futures.ThreadPoolExecutor(1) as pool:
+        yield pool
+
+
+def test_settling_time_after_last_excursion():
+    errors = np.array([1.0, 0.5, 0.1, 0.01, 0.0, 0.0])
+    assert tuner._settling_time(errors, 1.0, PERIOD, STEP) == pytest.approx(3 * PERIOD)
+    assert tuner._settling_time(np.zeros(6), 1.0, PERIOD, STEP) == 0.0
+
+
+def test_settling_time_counts_from_ramp_hold():
+    ramp = SignalTest("ramp", "ramp", 1.0, duration=0.3)
+    # the ramp reaches its final value at 0.1 s, loop 5
+    errors = np.array([0.5] * 5 + [0.1, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    assert tuner._settling_time(errors, 1.0, PERIOD, ramp) == pytest.approx(PERIOD)
+
+
+def test_unsettled_response_ranks_by_final_error():
+    near = tuner._settling_time(np.full(10, 0.04), 1.0, PERIOD, STEP)
+    far = tuner._settling_time(np.full(10, 0.4), 1.0, PERIOD, STEP)
+    # longer than any settled response, and closer misses rank better
+    assert 10 * PERIOD < near < far
+    # time left times the final error in 2% bands
+    assert far == pytest.approx(10 * PERIOD * 0.4 / 0.02)
+
+
+def test_run_test_scores_a_dead_controller():
+    metrics = tuner._run_test(_Constant(0.0), PLANT, STEP)
+    # the error stays the full amplitude for the whole test
+    assert metrics["iae"] == pytest.approx(STEP.duration)
+    assert metrics["overshoot"] == 0.0
+    assert metrics["chatter"] == 0.0
+    assert metrics["settling_time"] > STEP.duration
+
+
+def test_run_test_scores_overshoot_and_clamps_output():
+    metrics = tuner._run_test(_Constant(1000.0), PLANT, STEP)
+    # clamped to 12 V, the motor runs well past 10 rps
+    assert metrics["overshoot"] > 1.0
+    assert metrics["chatter"] == 0.0
+
+
+def test_better_gains_cost_less():
+    gains = {"kP": 0.0, "kI": 0.0, "kD": 0.0, "kS": 0.0, "kV": 0.0}
+    weights = GainTuner.WEIGHTS
+    idle = tuner.evaluate(gains, PLANT, [STEP], "flywheel", weights)
+    tuned = tuner.evaluate(dict(gains, kP=0.5, kV=0.12), PLANT, [STEP], "flywheel", weights)
+    assert tuned.cost < idle.cost
+    assert set(tuned.metrics) == {"step"}
+
+
+def _bowl(gains, plant, tests, controller, weights):
+    # cost with its minimum at kP = 3, kD = 0.25
+    cost = (gains["kP"] - 3.0) ** 2 + 10 * (gains["kD"] - 0.25) ** 2
+    return TuneResult(dict(gains), cost, {"bowl": {"cost": cost}})
+
+
+def test_refine_converges(monkeypatch, pool):
+    monkeypatch.setattr(tuner, "evaluate", _bowl)
+    profile = SmartProfile("tuner_refine", {"kP": 0.0, "kD": 0.0}, False)
+    search = GainTuner(profile, PLANT, {"kP": (0.0, 8.0), "kD": (0.0, 1.0)})
+    best = search.refine(pool, (0.0, 0.0), iterations=100, tolerance=1e-4)
+    assert best == pytest.approx((3.0, 0.25), abs=1e-3)
+    # repeated candidates are only evaluated once
+    assert search.evaluations == len(search._seen)
+
+
+def test_grid_ranks_candidates(monkeypatch, pool):
+    monkeypatch.setattr(tuner, "evaluate", _bowl)
+    profile = SmartProfile("tuner_grid", {"kP": 0.0, "kD": 0.0}, False)
+    search = GainTuner(profile, PLANT, {"kP": (0.0, 8.0), "kD": (0.0, 1.0)})
+    ranked = search.grid(pool, 5)
+    assert len(ranked) == 25
+    assert ranked[0] == (2.0, 0.25)
+
+
+def test_apply_sets_profile_gains():
+    profile = SmartProfile("tuner_apply", {"kP": 0.0, "kD": 0.0, "kS": 0.1}, False)
+    search = GainTuner(profile, PLANT, {"kP": (0.0, 8.0)})
+    search.apply(TuneResult({"kP": 2.5, "kD": 9.0, "kS": 0.1}, 0.0))
+    # only the searched gains
+    assert profile.gains == {"kP": 2.5, "kD": 0.0, "kS": 0.1}
+    assert profile.version == 1
+
+
+def test_format_table():
+    results = [
+        TuneResult({"kP": 1.0}, 0.5, {"a": {"iae": 0.2}, "b": {"iae": 0.4}}),
+        TuneResult({"kP": 2.0}, 0.75, {"a": {"iae": 0.5}, "b": {"iae": 0.5}}),
+    ]
+    lines = format_table(results).splitlines()
+    assert lines[0].split() == ["#", "cost", "kP", "iae"]
+    assert lines[1].split() == ["1", "0.5", "1", "0.3"]
+    assert lines[2].split() == ["2", "0.75", "2", "0.5"]
+    assert len(format_table(results, top=1).splitlines()) == 2
+    assert format_table([]) == "no results"
+
+
+def test_rejects_unknown_mode():
+    profile = SmartProfile("tuner_mode", {"kP": 0.0}, False)
+    with pytest.raises(ValueError, match="Unknown plant mode"):
+        GainTuner(profile, MotorPlant(mode="torque"), {"kP": (0.0, 1.0)})
@@ -0,0 +1,138 @@
+import math
+
+import pytest
+from photonlibpy.targeting import (
+    MultiTargetPNPResult,
+    PhotonPipelineResult,
+    PhotonTrackedTarget,
+    PnpResult,
+)
+from photonlibpy.targeting.photonPipelineResult import PhotonPipelineMetadata
+from robotpy_apriltag import AprilTag, AprilTagFieldLayout
+from wpimath.geometry import Pose2d, Pose3d, Rotation3d, Transform3d, Translation3d
+
+from lemonlib.vision import LemonCamera, LemonVisionFusion, VisionMeasurement
+
+ROBOT = Pose3d(3.0, 2.0, 0.0, Rotation3d(0.0, 0.0, 0.3))
+# camera 0.3 m ahead of the robot center and 0.5 m up
+CAMERA_TO_BOT = Transform3d(Translation3d(0.3, 0.0, 0.5), Rotation3d()).inverse()
+
+
+def _tag(tag_id: int, x: float, y: float) -> AprilTag:
+    tag = AprilTag()
+    tag.ID = tag_id
+    tag.pose = Pose3d(x, y, 0.5, Rotation3d(0.0, 0.0, math.pi))
+    return tag
+
+
+FIELD = AprilTagFieldLayout(
+    [_tag(1, 6.0, 2.0), _tag(2, 6.0, 3.5), _tag(3, 15.0, 2.0)], 16.5, 8.0
+)
+
+
+def _target(tag_id: int, robot: Pose3d = ROBOT, ambiguity: float = 0.05) -> PhotonTrackedTarget:
+    """What the camera on a robot at robot sees of tag_id."""
+    camera = robot.transformBy(CAMERA_TO_BOT.inverse())
+    return PhotonTrackedTarget(
+        fiducialId=tag_id,
+        bestCameraToTarget=Transform3d(camera, FIELD.getTagPose(tag_id)),
+        poseAmbiguity=ambiguity,
+    )
+
+
+def _result(targets, timestamp: float = 1.0, multitag: bool = False, robot: Pose3d = ROBOT):
+    result = PhotonPipelineResult(
+        int(timestamp * 1e6),
+        targets,
+        PhotonPipelineMetadata(1000, 1000),
+    )
+    if multitag:
+        camera = robot.transformBy(CAMERA_TO_BOT.inverse())
+        result.multitagResult = MultiTargetPNPResult(
+            PnpResult(best=Transform3d(Pose3d(), camera)),
+            [target.getFiducialId() for target in targets],
+        )
+    return result
+
+
+class _Camera(LemonCamera):
+    """A camera whose frames are queued by the test instead of read from NT."""
+
+    def __init__(self, name: str):
+        super().__init__(name, CAMERA_TO_BOT, FIELD)
+        self.frames = []
+
+    def update(self):
+        self.results, self.frames = self.frames, []
+
+
+def _assert_pose(pose: Pose2d, expected: Pose3d = ROBOT):
+    assert pose.X() == pytest.approx(expected.X())
+    assert pose.Y() == pytest.approx(expected.Y())
+    assert pose.rotation().radians() == pytest.approx(expected.rotation().Z())
+
+
+def test_single_tag_pose():
+    measurement = _Camera("vision_single").estimate_robot_pose(_result([_target(1)], 2.5))
+    _assert_pose(measurement.pose)
+    assert measurement.timestamp == pytest.approx(2.5)
+    assert measurement.tag_count == 1
+    camera = ROBOT.transformBy(CAMERA_TO_BOT.inverse())
+    tag = FIELD.getTagPose(1)
+    assert measurement.distance == pytest.approx(camera.translation().distance(tag.translation()))
+
+
+def test_ambiguous_single_tag_rejected():
+    camera = _Camera("vision_ambiguous")
+    assert camera.estimate_robot_pose(_result([_target(1, ambiguity=0.5)])) is None
+    assert camera.estimate_robot_pose(_result([_target(1, ambiguity=0.5)]), 0.6) is not None
+
+
+def test_no_usable_target():
+    camera = _Camera("vision_empty")
+    assert camera.estimate_robot_pose(_result([])) is None
+    # a tag that isn't on the field
+    unknown = _target(1)
+    unknown.fiducialId = 9
+    assert camera.estimate_robot_pose(_result([unknown])) is None
+
+
+def test_multitag_preferred():
+    # too ambiguous on their own, but the multi-tag solution is used
+    targets = [_target(1, ambiguity=0.9), _target(2, ambiguity=0.9)]
+    measurement = _Camera("vision_multi").estimate_robot_pose(_result(targets, multitag=True))
+    _assert_pose(measurement.pose)
+    assert measurement.tag_count == 2
+    distances = [t.getBestCameraToTarget().translation().norm() for t in targets]
+    assert measurement.distance == pytest.approx(sum(distances) / 2)
+
+
+def test_fusion_orders_and_filters_frames():
+    front, back = _Camera("vision_front"), _Camera("vision_back")
+    moved = ROBOT.transformBy(Transform3d(Translation3d(0.5, 0.0, 0.0), Rotation3d()))
+    front.frames = [_result([_target(1)], 3.0), _result([_target(1, moved)], 1.0, robot=moved)]
+    # tag 3 is 12 m away: dropped
+    back.frames = [_result([_target(3)], 2.0), _result([_target(1, ambiguity=0.9)], 2.5)]
+    applied = []
+    fusion = LemonVisionFusion(
+        [front, back],
+        lambda pose, timestamp, std_devs: applied.append((pose, timestamp, std_devs)),
+        timestamp_converter=lambda t: t + 100.0,
+    )
+    measurements = fusion.update()
+    assert [m.timestamp for m in measurements] == pytest.approx([1.0, 3.0])
+    assert [timestamp for _, timestamp, _ in applied] == pytest.approx([101.0, 103.0])
+    _assert_pose(applied[0][0], moved)
+    _assert_pose(applied[1][0])
+    # frames are only applied once
+    assert fusion.update() == []
+
+
+def test_std_devs_scale_with_distance_and_tags():
+    fusion = LemonVisionFusion([], lambda *args: None, (0.1, 0.1, 0.2), distance_scale=0.5)
+    near = fusion.std_devs(VisionMeasurement(Pose2d(), 0.0, 0.0, 1))
+    far = fusion.std_devs(VisionMeasurement(Pose2d(), 0.0, 2.0, 1))
+    far_two_tags = fusion.std_devs(VisionMeasurement(Pose2d(), 0.0, 2.0, 2))
+    assert near == pytest.approx((0.1, 0.1, 0.2))
+    assert far == pytest.approx((0.3, 0.3, 0.6))
+    assert far_two_tags == pytest.approx((0.15, 0.15, 0.3))